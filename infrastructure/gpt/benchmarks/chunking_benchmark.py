@@ -0,0 +1,142 @@
+# Chunking throughput (pages/s) with the previous tokenizer wrapper and the current fast path.
+#
+#   python -m infrastructure.gpt.benchmarks.chunking_benchmark --pages 200 --max-tokens 512
+#
+# The token-count pattern of HybridChunker (every element counted, then ever larger merged windows
+# of neighbouring elements) is replayed on generated pages, so the tokenizer cost is measured
+# without Docling. If Docling is installed, the same pages are also converted once and chunked
+# with HybridChunker under both wrappers.
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from infrastructure.gpt.files_intake.utils.tokenizer import OpenAITokenizerWrapper
+
+WORDS = ("login session checkout voucher payment defect severity tester charter observation "
+         "TrackingAgent PaymentGateway D-003 error timeout retry dialog button network offline").split()
+
+
+class LegacyTokenizerWrapper(OpenAITokenizerWrapper):
+    """The wrapper before the fast path: str token lists and a vocab rebuilt on every call."""
+
+    def tokenize(self, text: str, **kwargs) -> List[str]:
+        return [str(t) for t in self.tokenizer.encode(text)]
+
+    def get_vocab(self) -> Dict[str, int]:
+        return {str(i): i for i in range(self._vocab_size)}
+
+
+def generate_pages(count: int, paragraphs: int, seed: int = 0) -> List[List[str]]:
+    rng = random.Random(seed)
+    pages = []
+    for _ in range(count):
+        page = [f"Section {rng.randint(1, 99)}: {' '.join(rng.choices(WORDS, k=4))}"]
+        for _ in range(paragraphs):
+            sentences = [" ".join(rng.choices(WORDS, k=rng.randint(6, 20))).capitalize() + "."
+                         for _ in range(rng.randint(1, 5))]
+            page.append(" ".join(sentences))
+        pages.append(page)
+    return pages
+
+
+# HybridChunker-like counting: each element, then merged windows of peers until max_tokens is exceeded
+def replay_chunker_counts(tokenizer, page: List[str], max_tokens: int) -> int:
+    chunks, start = 0, 0
+    while start < len(page):
+        end = start + 1
+        len(tokenizer.tokenize(page[start]))
+        while end < len(page) and len(tokenizer.tokenize("\n".join(page[start:end + 1]))) <= max_tokens:
+            end += 1
+        # The merged chunk is counted once more when it is emitted
+        len(tokenizer.tokenize("\n".join(page[start:end])))
+        chunks += 1
+        start = end
+    return chunks
+
+
+def html_pages(pages: List[List[str]]) -> List[str]:
+    return [
+        f"<html><body><h1>{page[0]}</h1>" + "".join(f"<p>{paragraph}</p>" for paragraph in page[1:]) + "</body></html>"
+        for page in pages
+    ]
+
+
+def bench_replay(wrapper_cls, pages, max_tokens: int, repeats: int) -> dict:
+    timings = []
+    for _ in range(repeats):
+        tokenizer = wrapper_cls()   # fresh instance: nothing memoized from the previous repeat
+        start = time.perf_counter()
+        for page in pages:
+            replay_chunker_counts(tokenizer, page, max_tokens)
+        for _ in range(len(pages)):
+            tokenizer.get_vocab()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {"seconds": best, "pages_per_second": len(pages) / best}
+
+
+def bench_docling(wrapper_cls, documents, max_tokens: int, repeats: int) -> dict:
+    from docling.chunking import HybridChunker
+
+    timings, chunk_count = [], 0
+    for _ in range(repeats):
+        chunker = HybridChunker(tokenizer=wrapper_cls(), max_tokens=max_tokens, merge_peers=True)
+        start = time.perf_counter()
+        chunk_count = sum(len(list(chunker.chunk(dl_doc=document))) for document in documents)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {"seconds": best, "pages_per_second": len(documents) / best, "chunks": chunk_count}
+
+
+def convert_pages(pages: List[List[str]]):
+    from infrastructure.gpt.files_intake.converter_pool import html_document_stream
+    from infrastructure.gpt.files_intake.vector_db import get_converter_pool
+
+    pool = get_converter_pool()
+    return [
+        pool.convert(html_document_stream(f"https://bench.local/page-{i}", html)).document
+        for i, html in enumerate(html_pages(pages))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunking throughput of the tokenizer wrapper")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=30, help="Paragraphs per page")
+    parser.add_argument("--max-tokens", type=int, default=512)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    pages = generate_pages(args.pages, args.paragraphs)
+    results = {"pages": args.pages, "max_tokens": args.max_tokens, "replay": {}, "docling": {}}
+    wrappers = {"before": LegacyTokenizerWrapper, "after": OpenAITokenizerWrapper}
+
+    for name, wrapper_cls in wrappers.items():
+        results["replay"][name] = bench_replay(wrapper_cls, pages, args.max_tokens, args.repeats)
+
+    try:
+        documents = convert_pages(pages)
+    except ImportError as e:
+        print(f"⚠️ Docling not available, HybridChunker run skipped: {e}")
+    else:
+        for name, wrapper_cls in wrappers.items():
+            results["docling"][name] = bench_docling(wrapper_cls, documents, args.max_tokens, args.repeats)
+
+    for run, rows in results.items():
+        if not isinstance(rows, dict) or not rows:
+            continue
+        for name, row in rows.items():
+            print(f"   {run:<8} {name:<7} {row['pages_per_second']:>9.1f} pages/s  ({row['seconds']:.2f}s)")
+        print(f"   {run:<8} speedup {rows['before']['seconds'] / rows['after']['seconds']:.2f}x")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# Compares chunking profiles: retrieval quality, ingestion time, embedding cost and prompt tokens.
+#
+#   python -m infrastructure.gpt.benchmarks.chunking_profiles_benchmark --profiles legacy,document,webpage
+#   python -m infrastructure.gpt.benchmarks.chunking_profiles_benchmark --embeddings hashed   # no API calls
+#
+# The chunks of the retrieval evaluation set are embedded in long generated reports (one per project,
+# with filler sections in between), converted once with Docling and re-chunked under every profile.
+# A query counts as answered when a top-k chunk contains the text of one of its relevant chunks.
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import lancedb
+
+from infrastructure.gpt.benchmarks.chunking_benchmark import generate_pages
+from infrastructure.gpt.benchmarks.retrieval_eval import DEFAULT_EVAL_SET, build_table, get_embedder
+from infrastructure.gpt.configs.chunking_profiles import CHUNKING_PROFILES
+from infrastructure.gpt.files_intake.context_packer import CONTEXT_TOKEN_BUDGET, pack_context
+from infrastructure.gpt.files_intake.retrieval import hybrid_search_chunks
+
+# USD per 1M input tokens of text-embedding-3-large
+EMBEDDING_PRICE_PER_MILLION = 0.13
+
+
+def build_reports(eval_set: dict, filler_per_section: int, seed: int = 0) -> dict:
+    """One HTML report per project: every corpus chunk becomes a section, surrounded by filler text."""
+    rng = random.Random(seed)
+    sections = {}
+    for doc in eval_set["corpus"]:
+        sections.setdefault(doc["project_id"], []).append(doc["text"])
+
+    reports = {}
+    for project_id, texts in sections.items():
+        filler = generate_pages(len(texts), filler_per_section, seed=rng.randint(0, 10**6))
+        body = "".join(
+            f"<h2>{page[0]}</h2>" + "".join(f"<p>{paragraph}</p>" for paragraph in page[1:filler_per_section // 2 + 1])
+            + f"<p>{text}</p>"
+            + "".join(f"<p>{paragraph}</p>" for paragraph in page[filler_per_section // 2 + 1:])
+            for text, page in zip(texts, filler)
+        )
+        reports[project_id] = f"<html><body><h1>Test report {project_id}</h1>{body}</body></html>"
+    return reports
+
+
+def convert_reports(reports: dict) -> dict:
+    from infrastructure.gpt.files_intake.converter_pool import html_document_stream
+    from infrastructure.gpt.files_intake.vector_db import get_converter_pool
+
+    pool = get_converter_pool()
+    return {
+        project_id: pool.convert(html_document_stream(f"https://bench.local/{project_id}", html)).document
+        for project_id, html in reports.items()
+    }
+
+
+def evaluate_profile(profile, documents: dict, eval_set: dict, embed, count_tokens, k: int) -> dict:
+    from infrastructure.gpt.files_intake.vector_db import chunk_document
+
+    start = time.perf_counter()
+    chunks = [
+        {"id": f"{project_id}-{i}", "project_id": project_id, "text": chunk["text"]}
+        for project_id, document in documents.items()
+        for i, chunk in enumerate(chunk_document(document, profile))
+    ]
+    chunk_seconds = time.perf_counter() - start
+
+    tokens = [count_tokens(chunk["text"]) for chunk in chunks]
+    relevant_texts = {doc["id"]: doc["text"] for doc in eval_set["corpus"]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        table = build_table(lancedb.connect(tmp), chunks, embed)
+        ingest_seconds = chunk_seconds + time.perf_counter() - start
+
+        query_vectors = embed([query["query"] for query in eval_set["queries"]])
+        recalls, raw_tokens, packed_tokens = [], [], []
+        for query, vector in zip(eval_set["queries"], query_vectors):
+            results = hybrid_search_chunks(table, query["query"], vector, k, project_id=query["project_id"])
+            texts = list(results["text"]) if not results.empty else []
+            found = [doc_id for doc_id in query["relevant"] if any(relevant_texts[doc_id] in text for text in texts)]
+            recalls.append(len(found) / len(query["relevant"]))
+
+            raw_tokens.append(count_tokens("\n\n".join(texts)))
+            packed = pack_context(((text, "") for text in texts), query["query"], count_tokens, CONTEXT_TOKEN_BUDGET)
+            packed_tokens.append(packed.tokens)
+
+    embedded_tokens = sum(tokens)
+    return {
+        "chunks": len(chunks),
+        "avg_chunk_tokens": embedded_tokens / max(1, len(chunks)),
+        "max_chunk_tokens": max(tokens, default=0),
+        "ingest_seconds": ingest_seconds,
+        "chunk_seconds": chunk_seconds,
+        "embedding_tokens": embedded_tokens,
+        "embedding_cost_usd": embedded_tokens / 1e6 * EMBEDDING_PRICE_PER_MILLION,
+        "recall": sum(recalls) / len(recalls),
+        "avg_prompt_tokens": sum(raw_tokens) / len(raw_tokens),
+        "avg_packed_prompt_tokens": sum(packed_tokens) / len(packed_tokens),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality and cost of the chunking profiles")
+    parser.add_argument("--profiles", default=",".join(name for name in CHUNKING_PROFILES if name != "spreadsheet"))
+    parser.add_argument("--eval-set", default=str(DEFAULT_EVAL_SET))
+    parser.add_argument("--filler", type=int, default=12, help="Filler paragraphs around every relevant chunk")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--embeddings", choices=("openai", "hashed"), default="openai")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    from infrastructure.gpt.files_intake.vector_db import get_tokenizer
+
+    eval_set = json.loads(Path(args.eval_set).read_text())
+    embed = get_embedder(args.embeddings)
+    count_tokens = get_tokenizer().count_tokens
+
+    documents = convert_reports(build_reports(eval_set, args.filler))
+    results = {
+        name: evaluate_profile(CHUNKING_PROFILES[name], documents, eval_set, embed, count_tokens, args.k)
+        for name in args.profiles.split(",")
+    }
+
+    print(f"📐 {len(eval_set['queries'])} queries, recall@{args.k} ({args.embeddings} embeddings)")
+    for name, row in results.items():
+        print(f"   {name:<10} {row['chunks']:>5} chunks  avg {row['avg_chunk_tokens']:>6.0f} tok  "
+              f"recall {row['recall']:.2f}  ingest {row['ingest_seconds']:>6.2f}s  "
+              f"embed ${row['embedding_cost_usd']:.5f}  prompt {row['avg_prompt_tokens']:>6.0f} tok "
+              f"(packed {row['avg_packed_prompt_tokens']:.0f})")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
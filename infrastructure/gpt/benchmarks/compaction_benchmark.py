@@ -0,0 +1,106 @@
+# Search latency on a table built from many small appends, before and after compaction.
+#
+#   python -m infrastructure.gpt.benchmarks.compaction_benchmark --appends 2000 --rows-per-append 5
+
+import argparse
+import json
+import tempfile
+import time
+import warnings
+from datetime import timedelta
+from pathlib import Path
+
+import lancedb
+
+from infrastructure.gpt.benchmarks.vector_index_benchmark import percentile, synthetic_vectors
+from infrastructure.gpt.files_intake.table_writer import compact_table, table_layout
+
+
+def build_fragmented_table(db, appends: int, rows_per_append: int, dimensions: int, projects: int):
+    vectors = synthetic_vectors(appends * rows_per_append, dimensions, clusters=16)
+    table = None
+    for i in range(appends):
+        # One append per "page", as store_chunks_in_lancedb did before the write buffer
+        rows = [
+            {
+                "id": i * rows_per_append + j,
+                "vector": vectors[i * rows_per_append + j],
+                "project_id": f"project-{i % projects}",
+                "dedup_key": f"page-{i}",
+            }
+            for j in range(rows_per_append)
+        ]
+        if table is None:
+            table = db.create_table("bench", data=rows)
+        else:
+            table.add(rows)
+
+    # Re-crawled pages: their old chunks are deleted, leaving deletion files behind
+    for i in range(0, appends, 10):
+        table.delete(f"dedup_key = 'page-{i}'")
+    return table
+
+
+def measure(table, queries, k: int) -> dict:
+    latencies = {"vector": [], "filtered": []}
+    for q in queries:
+        start = time.perf_counter()
+        table.search(q).limit(k).select(["id", "_distance"]).to_arrow()
+        latencies["vector"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        (table.search(q).where("project_id = 'project-0'", prefilter=True)
+         .limit(k).select(["id", "_distance"]).to_arrow())
+        latencies["filtered"].append(time.perf_counter() - start)
+
+    return {
+        name: {"p50_ms": percentile(values, 50), "p99_ms": percentile(values, 99)}
+        for name, values in latencies.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search latency before/after fragment compaction")
+    parser.add_argument("--appends", type=int, default=2000)
+    parser.add_argument("--rows-per-append", type=int, default=5)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    queries = synthetic_vectors(args.queries, args.dimensions, clusters=8, seed=1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = lancedb.connect(tmp)
+        start = time.perf_counter()
+        table = build_fragmented_table(db, args.appends, args.rows_per_append, args.dimensions, args.projects)
+        print(f"🧱 Built table from {args.appends} appends in {time.perf_counter() - start:.1f}s")
+
+        # Warm up caches so both measurements start from the same state
+        measure(table, queries[:5], args.k)
+        results = {"layout_before": table_layout(table), "before": measure(table, queries, args.k)}
+
+        # Nothing else uses the temporary table, so every old version can go
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            compaction = compact_table(table, retention=timedelta(0))
+        results["compaction_s"] = compaction["seconds"]
+
+        measure(table, queries[:5], args.k)
+        results["layout_after"] = table_layout(table)
+        results["after"] = measure(table, queries, args.k)
+
+    for phase in ("before", "after"):
+        layout = results[f"layout_{phase}"]
+        print(f"   {phase:<6} {layout['fragments']:>5} fragments {layout['versions']:>5} versions  "
+              f"vector p50 {results[phase]['vector']['p50_ms']:.2f} ms p99 {results[phase]['vector']['p99_ms']:.2f} ms  "
+              f"filtered p50 {results[phase]['filtered']['p50_ms']:.2f} ms p99 {results[phase]['filtered']['p99_ms']:.2f} ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+# End-to-end benchmark: file and website ingestion, vector context retrieval and assistant requests,
+# all against a local mock of the OpenAI API (deterministic fake embeddings, configurable latency).
+#
+#   python -m infrastructure.gpt.benchmarks.e2e_benchmark --output e2e.json
+#   python -m infrastructure.gpt.benchmarks.e2e_benchmark --response-latency-ms 800 --embedding-latency-ms 150
+#   python -m infrastructure.gpt.benchmarks.e2e_benchmark --output e2e-new.json --compare e2e.json
+#
+# A corpus of PDF, DOCX and CSV files and a small static website are generated in a temporary folder;
+# the website is served locally with a sitemap. LanceDB and the embedding cache are created in the same
+# folder (LANCEDB_PATH / VECTOR_CACHE_DIR), so every run starts cold and the project database is untouched.
+# Results are written as JSON together with the git commit, so runs can be compared across commits.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime, timezone
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List
+from xml.sax.saxutils import escape
+
+from infrastructure.gpt.benchmarks.chunking_benchmark import WORDS, generate_pages, html_pages
+from infrastructure.gpt.benchmarks.vector_index_benchmark import percentile
+from infrastructure.gpt.test_data.mock_openai_server import MockOpenAIServer
+
+# Project root (the folder that contains the `infrastructure` package)
+ROOT_DIR = Path(__file__).resolve().parents[3]
+
+FILES_PROJECT = "bench-files"
+SITE_PROJECT = "bench-site"
+
+#------------------Corpus Generation---------------------------------------------------------------
+
+def _wrap(text: str, width: int) -> List[str]:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    return lines + [line] if line else lines
+
+
+def _pdf_string(text: str) -> str:
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+# Minimal text-only PDF (Helvetica, one content stream per page); returns the number of pages written
+def write_pdf(path: Path, pages: List[List[str]], lines_per_page: int = 52, width: int = 95) -> int:
+    lines = []
+    for page in pages:
+        for paragraph in page:
+            lines += _wrap(paragraph, width) + [""]
+    pdf_pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pdf_pages))), len(pdf_pages)),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, page_lines in enumerate(pdf_pages):
+        content = "BT /F1 10 Tf 14 TL 50 800 Td\n" + "".join(f"{_pdf_string(line)} Tj T*\n" for line in page_lines) + "ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(content.encode('latin-1'))} >>\nstream\n{content}\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    path.write_bytes(bytes(out))
+    return len(pdf_pages)
+
+
+DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+# Minimal DOCX: a bold heading and plain paragraphs per page, with page breaks in between
+def write_docx(path: Path, pages: List[List[str]]) -> int:
+    body = []
+    for i, page in enumerate(pages):
+        if i:
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+        body.append(f'<w:p><w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">{escape(page[0])}</w:t></w:r></w:p>')
+        body += [f'<w:p><w:r><w:t xml:space="preserve">{escape(paragraph)}</w:t></w:r></w:p>' for paragraph in page[1:]]
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{"".join(body)}</w:body></w:document>'
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", DOCX_CONTENT_TYPES)
+        docx.writestr("_rels/.rels", DOCX_RELS)
+        docx.writestr("word/document.xml", document)
+    return len(pages)
+
+
+# Test case table, one row per test case
+def write_csv(path: Path, rows: int, rng: random.Random) -> int:
+    lines = ["Test Case,Area,Steps,Expected Result,Status"]
+    for i in range(rows):
+        area, steps, expected = (" ".join(rng.choices(WORDS, k=n)) for n in (2, 12, 8))
+        lines.append(f"TC-{i + 1:04d},{area},{steps},{expected},{rng.choice(('passed', 'failed', 'blocked'))}")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return 1
+
+
+def generate_corpus(folder: Path, files: int, pages_per_file: int, paragraphs: int, csv_rows: int, seed: int = 0) -> dict:
+    """Writes `files` documents of each type; returns the pages written per file type (a CSV counts as one page)."""
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    pages = {"pdf": 0, "docx": 0, "csv": 0}
+    for i in range(files):
+        pages["pdf"] += write_pdf(folder / f"report-{i:03d}.pdf", generate_pages(pages_per_file, paragraphs, seed=rng.random()))
+        pages["docx"] += write_docx(folder / f"charter-{i:03d}.docx", generate_pages(pages_per_file, paragraphs, seed=rng.random()))
+        pages["csv"] += write_csv(folder / f"test-cases-{i:03d}.csv", csv_rows, rng)
+    return pages
+
+
+def generate_site(folder: Path, pages: int, paragraphs: int, seed: int = 0) -> List[str]:
+    """Static site with an index linking every page; returns the page paths."""
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = [f"page-{i:03d}.html" for i in range(pages)]
+    for i, html in enumerate(html_pages(generate_pages(pages, paragraphs, seed=seed))):
+        nav = f'<nav><a href="index.html">Home</a> <a href="{paths[(i + 1) % pages]}">Next</a></nav>'
+        (folder / paths[i]).write_text(html.replace("<body>", f"<body>{nav}", 1), encoding="utf-8")
+    links = "".join(f'<li><a href="{path}">{path}</a></li>' for path in paths)
+    (folder / "index.html").write_text(f"<html><body><h1>Bench site</h1><ul>{links}</ul></body></html>", encoding="utf-8")
+    return ["index.html"] + paths
+
+
+def write_sitemap(folder: Path, base_url: str, paths: List[str]):
+    entries = "".join(f"<url><loc>{base_url}{path}</loc><lastmod>2025-01-01</lastmod></url>" for path in paths)
+    (folder / "sitemap.xml").write_text(
+        f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>',
+        encoding="utf-8",
+    )
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_folder(folder: Path) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(folder)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+#------------------Measurements--------------------------------------------------------------------
+
+# Peak resident set size so far, of this process and of finished child processes (ingestion workers)
+def peak_rss_mb() -> dict:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return {"self": None, "children": None}
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 2**20,
+    }
+
+
+def latency_stats(seconds: List[float]) -> dict:
+    if not seconds:
+        return {"count": 0}
+    return {
+        "count": len(seconds),
+        "p50_ms": percentile(seconds, 50),
+        "p99_ms": percentile(seconds, 99),
+        "mean_ms": statistics.mean(seconds) * 1000,
+    }
+
+
+def count_chunks() -> int:
+    from infrastructure.gpt.files_intake.vector_db import get_db
+    db = get_db()
+    return db.open_table("files").count_rows() if "files" in db.table_names() else 0
+
+
+def timed_ingestion(run, pages: int) -> dict:
+    chunks_before = count_chunks()
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    chunks = count_chunks() - chunks_before
+    return {
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": seconds,
+        "pages_per_s": pages / seconds,
+        "chunks_per_s": chunks / seconds,
+    }
+
+
+class TraceCollector:
+    """Tracing exporter that keeps the request traces for the span breakdown."""
+
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+
+def span_breakdown(traces) -> dict:
+    names = sorted({span["name"] for trace in traces for span in trace.spans})
+    return {name: latency_stats([trace.span_seconds(name) for trace in traces]) for name in names}
+
+
+def sample_queries(folder_pages: List[List[str]], count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    paragraphs = [paragraph for page in folder_pages for paragraph in page[1:]]
+    return [" ".join(rng.choice(paragraphs).split()[:12]) for _ in range(count)]
+
+#------------------Benchmark Phases----------------------------------------------------------------
+
+def bench_ingestion(args, corpus_dir: Path, site_dir: Path) -> dict:
+    from infrastructure.gpt.files_intake.vector_db import (
+        crawl_and_process_site, process_all_supported_files_in_folder, process_entire_website
+    )
+
+    pages = generate_corpus(corpus_dir, args.files, args.pages_per_file, args.paragraphs, args.csv_rows)
+    site_paths = generate_site(site_dir, args.site_pages, args.paragraphs)
+    site_server = serve_folder(site_dir)
+    base_url = f"http://127.0.0.1:{site_server.server_address[1]}/"
+
+    results = {}
+    results["files"] = timed_ingestion(
+        lambda: process_all_supported_files_in_folder(str(corpus_dir), FILES_PROJECT, "Benchmark corpus",
+                                                      parallel=args.parallel),
+        sum(pages.values()),
+    )
+    results["files"]["pages_by_type"] = pages
+
+    if args.site_mode == "sitemap":
+        write_sitemap(site_dir, base_url, site_paths)
+        ingest_site = lambda: process_entire_website(base_url, SITE_PROJECT, "Benchmark site", max_links=len(site_paths))
+    else:
+        ingest_site = lambda: crawl_and_process_site(base_url, SITE_PROJECT, "Benchmark site", max_links=len(site_paths))
+    results["website"] = timed_ingestion(ingest_site, len(site_paths))
+    results["website"]["mode"] = args.site_mode
+
+    site_server.shutdown()
+    return results
+
+
+def bench_retrieval(queries: List[str]) -> dict:
+    from infrastructure.gpt.repositories.assistant_gpt_repository import get_vector_context
+
+    projects = [FILES_PROJECT, SITE_PROJECT]
+    # The first query also opens the table and builds the full-text index on it
+    start = time.perf_counter()
+    get_vector_context(queries[0], project_id=FILES_PROJECT)
+    first_query = time.perf_counter() - start
+
+    runs = {}
+    # "cold": query embedding and search computed; "warm": the same queries again, served by the retrieval caches
+    for run in ("cold", "warm"):
+        timings = []
+        for i, query in enumerate(queries[1:]):
+            start = time.perf_counter()
+            get_vector_context(query, project_id=projects[i % 2])
+            timings.append(time.perf_counter() - start)
+        runs[run] = latency_stats(timings)
+    return {"first_query_ms": first_query * 1000, **runs}
+
+
+def bench_requests(queries: List[str], requests: int, concurrency: int) -> dict:
+    from infrastructure.gpt.utils.tracing import set_exporters
+    from infrastructure.gpt.models.assistant_name import AssistantName
+    from infrastructure.gpt.repositories.assistant_gpt_repository import send_request, send_requests
+
+    results = {}
+    scenarios = {
+        # Vector-enriched prompt: retrieval, packing and the Responses API call
+        "exploratory_testing": (AssistantName.EXPLORATORY_TESTING, FILES_PROJECT),
+        # Static developer context only
+        "summarizing": (AssistantName.SUMMARIZING, None),
+    }
+    for name, (assistant, project_id) in scenarios.items():
+        collector = TraceCollector()
+        set_exporters([collector])
+        timings, failures = [], 0
+        for i in range(requests):
+            query = queries[i % len(queries)]
+            start = time.perf_counter()
+            _, response_id = send_request(f"Design a test for: {query}", assistant, project_id=project_id)
+            timings.append(time.perf_counter() - start)
+            failures += response_id is None
+        results[name] = {**latency_stats(timings), "failures": failures, "spans": span_breakdown(collector.traces)}
+
+    # Many prompts in flight at once (the client limits how many are sent concurrently)
+    set_exporters([])
+    jobs = [
+        {"prompt": f"Variation {i}: {query}", "assistant_name": AssistantName.EXPLORATORY_TESTING, "project_id": FILES_PROJECT}
+        for i, query in enumerate(queries[i % len(queries)] for i in range(concurrency))
+    ]
+    start = time.perf_counter()
+    outcomes = send_requests(jobs)
+    seconds = time.perf_counter() - start
+    results["parallel"] = {
+        "requests": len(jobs),
+        "seconds": seconds,
+        "requests_per_s": len(jobs) / seconds,
+        "failures": sum(1 for outcome in outcomes if isinstance(outcome, Exception) or outcome[1] is None),
+    }
+    return results
+
+#------------------Reporting-----------------------------------------------------------------------
+
+def git_revision() -> dict:
+    def git(*args):
+        proc = subprocess.run(["git", *args], cwd=ROOT_DIR, capture_output=True, text=True)
+        return proc.stdout.strip() if proc.returncode == 0 else None
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+# Numeric leaves of a nested result, keyed by their dotted path
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def print_comparison(results: dict, baseline: dict):
+    print(f"\n📊 Compared with {baseline.get('meta', {}).get('git', {}).get('commit') or 'baseline'}:")
+    current, previous = flatten(results["metrics"]), flatten(baseline.get("metrics", {}))
+    for key, value in current.items():
+        if previous.get(key):
+            print(f"   {key:<55} {previous[key]:>12.2f} → {value:>12.2f} ({(value / previous[key] - 1) * 100:+.1f}%)")
+
+
+def print_summary(metrics: dict):
+    for name, row in metrics["ingestion"].items():
+        print(f"📥 {name}: {row['pages']} pages, {row['chunks']} chunks in {row['seconds']:.1f}s "
+              f"({row['pages_per_s']:.2f} pages/s, {row['chunks_per_s']:.1f} chunks/s)")
+    for run in ("cold", "warm"):
+        row = metrics["retrieval"][run]
+        print(f"🔎 get_vector_context ({run}): p50 {row['p50_ms']:.1f} ms, p99 {row['p99_ms']:.1f} ms")
+    for name, row in metrics["requests"].items():
+        if name == "parallel":
+            print(f"🚀 {row['requests']} parallel requests: {row['requests_per_s']:.1f} req/s, {row['failures']} failed")
+        else:
+            print(f"📨 send_request {name}: p50 {row['p50_ms']:.1f} ms, p99 {row['p99_ms']:.1f} ms, {row['failures']} failed")
+    rss = {key: "n/a" if value is None else f"{value:.0f}" for key, value in metrics["peak_rss_mb"].items()}
+    print(f"🧠 Peak RSS: {rss['self']} MB (ingestion workers: {rss['children']} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ingestion/retrieval/request benchmark against a mock OpenAI API")
+    parser.add_argument("--files", type=int, default=4, help="Generated files of each type (PDF, DOCX, CSV)")
+    parser.add_argument("--pages-per-file", type=int, default=5)
+    parser.add_argument("--paragraphs", type=int, default=8, help="Paragraphs per generated page")
+    parser.add_argument("--csv-rows", type=int, default=50)
+    parser.add_argument("--site-pages", type=int, default=20)
+    parser.add_argument("--site-mode", choices=("sitemap", "crawl"), default="sitemap")
+    parser.add_argument("--parallel", action="store_true", help="Ingest the files with the process pool")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="Sequential send_request calls per assistant")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests sent at once with send_requests")
+    parser.add_argument("--response-latency-ms", type=float, default=0.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--output", default="e2e_benchmark.json", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Print the change of every metric against an earlier results file")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of the pipelines")
+    args = parser.parse_args()
+
+    mock = MockOpenAIServer(response_latency=args.response_latency_ms / 1000,
+                            embedding_latency=args.embedding_latency_ms / 1000,
+                            latency_jitter=args.latency_jitter).start_in_background()
+
+    with tempfile.TemporaryDirectory(prefix="e2e-bench-") as tmp:
+        work_dir = Path(tmp)
+        # Read when the project modules are first imported (below), and inherited by ingestion workers
+        os.environ.update({
+            "OPENAI_BASE_URL": mock.base_url,
+            "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or "mock-key",
+            "LANCEDB_PATH": str(work_dir / "lancedb"),
+            "VECTOR_CACHE_DIR": str(work_dir / "cache"),
+            "TRACE_EXPORTERS": "none",
+        })
+
+        output = None if args.verbose else io.StringIO()
+        metrics = {}
+        with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+            start = time.perf_counter()
+            metrics["ingestion"] = bench_ingestion(args, work_dir / "corpus", work_dir / "site")
+            metrics["peak_rss_after_ingestion_mb"] = peak_rss_mb()
+
+            queries = sample_queries(generate_pages(args.files * args.pages_per_file, args.paragraphs), args.queries + 1)
+            metrics["retrieval"] = bench_retrieval(queries)
+            metrics["requests"] = bench_requests(queries, args.requests, args.concurrency)
+            metrics["total_seconds"] = time.perf_counter() - start
+            metrics["peak_rss_mb"] = peak_rss_mb()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": vars(args),
+            "mock_requests": {"responses": mock.response_count},
+        },
+        "metrics": metrics,
+    }
+
+    print_summary(metrics)
+    if args.compare:
+        print_comparison(results, json.loads(Path(args.compare).read_text()))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"💾 Results written to {args.output}")
+    mock.shutdown()
+
+
+if __name__ == "__main__":
+    main()
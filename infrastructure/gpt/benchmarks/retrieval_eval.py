@@ -0,0 +1,148 @@
+# Offline retrieval evaluation: recall@k and latency of vector, keyword and hybrid search on a fixed query set.
+#
+#   python -m infrastructure.gpt.benchmarks.retrieval_eval --k 3,5
+#   python -m infrastructure.gpt.benchmarks.retrieval_eval --embeddings hashed   # no API calls
+#
+# The default query set (benchmarks/data/retrieval_eval_set.json) mixes exact identifiers
+# ("D-003", error codes, component names) with paraphrased questions. Real embeddings go through
+# embed_texts, so after the first run they come from the embedding cache. `--embeddings hashed`
+# uses a local bag-of-words embedding instead: useful to check the harness and the keyword side,
+# but its vector recall says nothing about the real embedding model.
+
+import argparse
+import hashlib
+import json
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import lancedb
+import numpy as np
+
+from infrastructure.gpt.benchmarks.vector_index_benchmark import percentile
+from infrastructure.gpt.files_intake.retrieval import (
+    hybrid_search_chunks, keyword_search_chunks, search_chunks
+)
+
+DEFAULT_EVAL_SET = Path(__file__).parent / "data" / "retrieval_eval_set.json"
+MODES = ("vector", "keyword", "hybrid")
+
+
+# Feature-hashed bag of words, normalized; deterministic and offline
+def hashed_embeddings(texts, dimensions: int = 512):
+    vectors = np.zeros((len(texts), dimensions), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for token in re.findall(r"\w+", text.lower()):
+            vectors[i, int(hashlib.md5(token.encode()).hexdigest(), 16) % dimensions] += 1.0
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+    return [list(vector) for vector in vectors]
+
+
+def get_embedder(name: str):
+    if name == "hashed":
+        return hashed_embeddings
+    from infrastructure.gpt.files_intake.vector_db import embed_texts
+    return embed_texts
+
+
+def build_table(db, corpus, embed):
+    from infrastructure.gpt.files_intake.vector_db import ensure_scalar_indexes
+
+    vectors = embed([doc["text"] for doc in corpus])
+    table = db.create_table("eval", data=[
+        {
+            "text": doc["text"],
+            "vector": vector,
+            # The chunk id is stored as the filename, so results can be mapped back to the corpus
+            "metadata": {"filename": doc["id"], "project_id": doc["project_id"], "file_type": "eval"},
+        }
+        for doc, vector in zip(corpus, vectors)
+    ])
+    # Same indexes as a real chunk table, including the full-text index
+    ensure_scalar_indexes(table)
+    return table
+
+
+def run_query(table, mode: str, query: dict, vector, k: int):
+    start = time.perf_counter()
+    if mode == "vector":
+        results = search_chunks(table, vector, k, project_id=query["project_id"])
+    elif mode == "keyword":
+        results = keyword_search_chunks(table, query["query"], k, project_id=query["project_id"])
+    else:
+        results = hybrid_search_chunks(table, query["query"], vector, k, project_id=query["project_id"])
+    seconds = time.perf_counter() - start
+
+    ids = [] if results is None or results.empty else [meta["filename"] for meta in results["metadata"]]
+    return ids, seconds
+
+
+def evaluate(table, queries, vectors, k: int, repeats: int) -> dict:
+    results = {}
+    for mode in MODES:
+        recalls, reciprocal_ranks, latencies, misses = [], [], [], []
+        for query, vector in zip(queries, vectors):
+            for _ in range(repeats):
+                ids, seconds = run_query(table, mode, query, vector, k)
+                latencies.append(seconds)
+
+            relevant = set(query["relevant"])
+            found = relevant & set(ids)
+            recalls.append(len(found) / len(relevant))
+            first_hit = next((rank for rank, chunk_id in enumerate(ids, start=1) if chunk_id in relevant), None)
+            reciprocal_ranks.append(1 / first_hit if first_hit else 0.0)
+            if not found:
+                misses.append(query["query"])
+
+        results[mode] = {
+            "recall": float(np.mean(recalls)),
+            "mrr": float(np.mean(reciprocal_ranks)),
+            "p50_ms": percentile(latencies, 50),
+            "p99_ms": percentile(latencies, 99),
+            "missed": misses,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k and latency of vector, keyword and hybrid retrieval")
+    parser.add_argument("--eval-set", default=str(DEFAULT_EVAL_SET), help="JSON file with `corpus` and `queries`")
+    parser.add_argument("--k", default="3,5", help="Comma-separated cut-offs")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per query for the latency figures")
+    parser.add_argument("--embeddings", choices=("openai", "hashed"), default="openai")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    eval_set = json.loads(Path(args.eval_set).read_text())
+    embed = get_embedder(args.embeddings)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        table = build_table(lancedb.connect(tmp), eval_set["corpus"], embed)
+        query_vectors = embed([query["query"] for query in eval_set["queries"]])
+
+        # Warm up so the first measured query does not pay for opening the indexes
+        for mode in MODES:
+            run_query(table, mode, eval_set["queries"][0], query_vectors[0], 1)
+
+        results = {
+            "corpus": len(eval_set["corpus"]),
+            "queries": len(eval_set["queries"]),
+            "embeddings": args.embeddings,
+            "k": {},
+        }
+        for k in (int(value) for value in args.k.split(",")):
+            results["k"][k] = evaluate(table, eval_set["queries"], query_vectors, k, args.repeats)
+
+    print(f"🔎 {results['queries']} queries over {results['corpus']} chunks ({args.embeddings} embeddings)")
+    for k, modes in results["k"].items():
+        for mode, row in modes.items():
+            print(f"   recall@{k:<3} {mode:<8} {row['recall']:.2f}  MRR {row['mrr']:.2f}  "
+                  f"p50 {row['p50_ms']:.2f} ms  p99 {row['p99_ms']:.2f} ms  missed {len(row['missed'])}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Startup-time benchmark: measures import cost of the repository and GUI modules in fresh interpreters
+# and reports which heavy subsystems got imported along the way.
+#
+#   python -m infrastructure.gpt.benchmarks.startup_benchmark --runs 5 --output startup.json
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Project root (the folder that contains the `infrastructure` package)
+ROOT_DIR = Path(__file__).resolve().parents[3]
+
+# Subsystems that must not be loaded unless vector features are used
+HEAVY_MODULES = ["docling", "transformers", "torch", "lancedb", "pyarrow", "openai"]
+
+# Code executed in each child interpreter; prints one JSON line with the measurements
+CHILD_TEMPLATE = """
+import json, sys, time
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+heavy = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"seconds": elapsed, "heavy_modules": heavy}}))
+"""
+
+SCENARIOS = {
+    "import_repository": "import infrastructure.gpt.repositories.assistant_gpt_repository",
+    "import_gui": "import infrastructure.gpt.test_data.gui",
+    # Send a SUMMARIZING prompt to the local mock API, so only import/build cost is measured
+    "summarizing_prompt": """
+import os
+from infrastructure.gpt.test_data.mock_openai_server import MockOpenAIServer
+os.environ["OPENAI_BASE_URL"] = MockOpenAIServer().start_in_background().base_url
+from infrastructure.gpt.models.assistant_name import AssistantName
+from infrastructure.gpt.repositories.assistant_gpt_repository import send_request
+send_request("Summarize the report", AssistantName.SUMMARIZING)
+""",
+}
+
+
+def run_scenario(body: str) -> dict:
+    code = CHILD_TEMPLATE.format(body=body, heavy=HEAVY_MODULES)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# Top modules by cumulative import time, from `python -X importtime`
+def import_time_breakdown(module: str, top: int = 15) -> list:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT_DIR, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        # Format: "import time: <self us> | <cumulative us> | <module>"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|", 2)
+        rows.append({"module": name.strip(), "cumulative_ms": int(cumulative_us) / 1000})
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup/import-time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero if a heavy module was imported")
+    args = parser.parse_args()
+
+    results = {}
+    for name, body in SCENARIOS.items():
+        samples = [run_scenario(body) for _ in range(args.runs)]
+        errors = [sample["error"] for sample in samples if "error" in sample]
+        if errors:
+            results[name] = {"error": errors[0]}
+            print(f"⚠️ {name}: {errors[0]}")
+            continue
+
+        seconds = [sample["seconds"] for sample in samples]
+        results[name] = {
+            "median_ms": statistics.median(seconds) * 1000,
+            "min_ms": min(seconds) * 1000,
+            "heavy_modules": samples[-1]["heavy_modules"],
+        }
+        print(f"⏱️ {name}: median {results[name]['median_ms']:.1f} ms, "
+              f"heavy modules: {results[name]['heavy_modules'] or 'none'}")
+
+    results["import_breakdown"] = import_time_breakdown("infrastructure.gpt.repositories.assistant_gpt_repository")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+    if args.strict and any(result.get("heavy_modules") for result in results.values() if isinstance(result, dict)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
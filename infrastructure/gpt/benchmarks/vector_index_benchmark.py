@@ -0,0 +1,106 @@
+# Recall-vs-latency benchmark of the ANN index against brute-force search, on synthetic vectors.
+#
+#   python -m infrastructure.gpt.benchmarks.vector_index_benchmark --rows 20000 --dimensions 3072
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import lancedb
+import numpy as np
+
+from infrastructure.gpt.files_intake.vector_index import create_vector_index, tune_query
+
+
+# Clustered random vectors, closer to real embeddings than uniform noise
+def synthetic_vectors(rows: int, dimensions: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions))
+    vectors = centers[rng.integers(0, clusters, rows)] + 0.3 * rng.normal(size=(rows, dimensions))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def timed_search(table, vector, k: int, **tuning):
+    start = time.perf_counter()
+    if tuning.pop("brute_force", False):
+        query = table.search(vector).bypass_vector_index().limit(k)
+    else:
+        query = tune_query(table.search(vector).limit(k), **tuning)
+    ids = query.select(["id", "_distance"]).to_arrow()["id"].to_pylist()
+    return ids, time.perf_counter() - start
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN index recall/latency benchmark")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--index-type", default="IVF_PQ")
+    parser.add_argument("--nprobes", default="5,10,20,50")
+    parser.add_argument("--refine-factors", default="0,5,10")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.rows, args.dimensions, clusters=max(8, args.rows // 500))
+    queries = synthetic_vectors(args.queries, args.dimensions, clusters=8, seed=1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = lancedb.connect(tmp)
+        table = db.create_table("bench", data=[{"id": i, "vector": v} for i, v in enumerate(vectors)])
+
+        start = time.perf_counter()
+        create_vector_index(table, index_type=args.index_type)
+        build_seconds = time.perf_counter() - start
+
+        # Ground truth and latency baseline
+        truth, brute_latencies = [], []
+        for q in queries:
+            ids, seconds = timed_search(table, q, args.k, brute_force=True)
+            truth.append(set(ids))
+            brute_latencies.append(seconds)
+
+        results = {
+            "rows": args.rows,
+            "dimensions": args.dimensions,
+            "index_type": args.index_type,
+            "index_build_s": build_seconds,
+            "brute_force": {"p50_ms": percentile(brute_latencies, 50), "p99_ms": percentile(brute_latencies, 99)},
+            "ann": [],
+        }
+        print(f"🔎 Brute force: p50 {results['brute_force']['p50_ms']:.2f} ms "
+              f"(index built in {build_seconds:.1f}s)")
+
+        for nprobes in [int(n) for n in args.nprobes.split(",")]:
+            for refine in [int(r) for r in args.refine_factors.split(",")]:
+                recalls, latencies = [], []
+                for q, expected in zip(queries, truth):
+                    ids, seconds = timed_search(table, q, args.k, nprobes=nprobes, refine_factor=refine or None)
+                    recalls.append(len(expected & set(ids)) / args.k)
+                    latencies.append(seconds)
+
+                row = {
+                    "nprobes": nprobes,
+                    "refine_factor": refine,
+                    f"recall@{args.k}": statistics.mean(recalls),
+                    "p50_ms": percentile(latencies, 50),
+                    "p99_ms": percentile(latencies, 99),
+                }
+                results["ann"].append(row)
+                print(f"   nprobes={nprobes:<3} refine={refine:<3} recall@{args.k}={row[f'recall@{args.k}']:.3f} "
+                      f"p50={row['p50_ms']:.2f} ms p99={row['p99_ms']:.2f} ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
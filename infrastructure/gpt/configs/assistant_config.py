@@ -1,5 +1,7 @@
 class AssistantConfig:
-    def __init__(self, system, output_format, requires_vector_context=False):
+    def __init__(self, system, output_format, requires_vector_context=False, context_token_budget=None):
         self.system = system
         self.output_format = output_format
-        self.requires_vector_context = requires_vector_context
\ No newline at end of file
+        self.requires_vector_context = requires_vector_context
+        # Tokens of retrieved context per request (None: CONTEXT_TOKEN_BUDGET)
+        self.context_token_budget = context_token_budget
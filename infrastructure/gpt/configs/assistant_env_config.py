@@ -8,6 +8,7 @@ load_dotenv()
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'  # Disables oneDNN optimizations (for compatibility issues)
 os.environ['HF_HUB_DISABLE_SYMLINKS_WARNING'] = '1'  # Suppresses symlink warnings from HuggingFace Hub
 
-# OpenAI API configuration
+# OpenAI API configuration (OPENAI_BASE_URL can point at test_data/mock_openai_server.py)
 API_KEY = os.getenv("OPENAI_API_KEY")
-API_URL = "https://api.openai.com/v1/responses"
\ No newline at end of file
+API_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+API_URL = f"{API_BASE_URL}/responses"
@@ -0,0 +1,58 @@
+import os
+
+
+class ChunkingProfile:
+    def __init__(self, name, max_tokens, overlap_tokens=0, merge_peers=True, strategy="hybrid", rows_per_chunk=1):
+        self.name = name
+        # Token limit of a chunk (HybridChunker); overlap is added on top of it
+        self.max_tokens = max_tokens
+        # Trailing sentences of the previous chunk (up to this many tokens) repeated at the start of the next one
+        self.overlap_tokens = overlap_tokens
+        # Merge undersized neighbouring chunks with the same headings
+        self.merge_peers = merge_peers
+        # "hybrid" (HybridChunker) or "table_rows" (one chunk per `rows_per_chunk` spreadsheet rows)
+        self.strategy = strategy
+        self.rows_per_chunk = rows_per_chunk
+
+    def __repr__(self):
+        return (f"ChunkingProfile({self.name!r}, max_tokens={self.max_tokens}, overlap_tokens={self.overlap_tokens}, "
+                f"merge_peers={self.merge_peers}, strategy={self.strategy!r})")
+
+
+CHUNKING_PROFILES = {
+    # Reports, specifications, manuals: section-sized chunks with a little context carried over
+    "document": ChunkingProfile("document", max_tokens=512, overlap_tokens=64),
+    # Web pages are shorter and more repetitive (navigation, footers); smaller chunks keep them precise
+    "webpage": ChunkingProfile("webpage", max_tokens=384, overlap_tokens=48),
+    # Spreadsheets: every row stays a self-contained chunk with the header repeated
+    "spreadsheet": ChunkingProfile("spreadsheet", max_tokens=512, strategy="table_rows", rows_per_chunk=1),
+    # Previous behaviour (chunks up to the embedding model's input limit), kept for comparisons
+    "legacy": ChunkingProfile("legacy", max_tokens=8191, overlap_tokens=0),
+}
+
+# Profile used for each file type (as stored in metadata.file_type)
+FILE_TYPE_PROFILES = {
+    "pdf": "document",
+    "docx": "document",
+    "webpage": "webpage",
+    "excel": "spreadsheet",
+    "csv": "spreadsheet",
+    # GUI uploads pass the generic type for .xlsx/.xls/.csv alike
+    "spreadsheet": "spreadsheet",
+}
+
+# Per target table overrides of FILE_TYPE_PROFILES, e.g. {"reports": {"pdf": "legacy"}}
+TABLE_PROFILES = {}
+
+# Forces one profile for every file type and table chunked as prose (e.g. CHUNKING_PROFILE=legacy);
+# spreadsheets keep their row-based profile
+CHUNKING_PROFILE_OVERRIDE = os.getenv("CHUNKING_PROFILE")
+
+
+def get_chunking_profile(file_type: str, table_name: str = "files") -> ChunkingProfile:
+    name = TABLE_PROFILES.get(table_name, {}).get(file_type) or FILE_TYPE_PROFILES.get(file_type, "document")
+    if CHUNKING_PROFILE_OVERRIDE and CHUNKING_PROFILES.get(name, CHUNKING_PROFILES["document"]).strategy == "hybrid":
+        name = CHUNKING_PROFILE_OVERRIDE
+    if name not in CHUNKING_PROFILES:
+        raise ValueError(f"Unknown chunking profile: {name}")
+    return CHUNKING_PROFILES[name]
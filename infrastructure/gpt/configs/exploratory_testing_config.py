@@ -45,5 +45,6 @@ exploratory_testing_config = AssistantConfig(
             "strict": True
         }
     },
-    requires_vector_context=True
+    requires_vector_context=True,
+    context_token_budget=3000
 )
\ No newline at end of file
@@ -38,5 +38,6 @@ interview_questions_config = AssistantConfig(
             "strict": True
         }
     },
-    requires_vector_context=True
+    requires_vector_context=True,
+    context_token_budget=2000
 )
@@ -0,0 +1,137 @@
+import os
+import re
+from typing import Callable, Iterable, List, NamedTuple, Tuple
+
+# Tokens of retrieved context added to a prompt, unless the assistant config sets its own budget
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+# A single chunk may take at most this many tokens; longer chunks are trimmed to their most relevant sentences
+CONTEXT_MAX_CHUNK_TOKENS = int(os.getenv("CONTEXT_MAX_CHUNK_TOKENS", "600"))
+# A chunk whose sentences are at least this share already in the context is dropped as a duplicate
+CONTEXT_OVERLAP_THRESHOLD = float(os.getenv("CONTEXT_OVERLAP_THRESHOLD", "0.8"))
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[\w-]+")
+
+
+class PackedContext(NamedTuple):
+    text: str
+    tokens: int             # tokens of `text`
+    budget: int
+    chunks: int             # chunks (whole or trimmed) in `text`
+    trimmed: int            # chunks cut down to their most relevant sentences
+    duplicates: int         # chunks dropped because their content was already included
+    dropped: int            # chunks left out because the budget was used up
+
+    def summary(self) -> str:
+        return (f"{self.tokens}/{self.budget} tokens, {self.chunks} chunks "
+                f"({self.trimmed} trimmed, {self.duplicates} duplicates, {self.dropped} over budget)")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+
+def _normalize(sentence: str) -> str:
+    return " ".join(_WORD.findall(sentence.lower()))
+
+
+# Query terms; identifiers (digits, dashes, underscores, inner capitals) like "D-003" or "PaymentGateway" weigh more
+def query_terms(query: str) -> dict:
+    terms = {}
+    for word in _WORD.findall(query):
+        if len(word) < 3 and not any(char.isdigit() for char in word):
+            continue
+        identifier = any(char.isdigit() or char in "-_" for char in word) or any(char.isupper() for char in word[1:])
+        terms[word.lower()] = 3.0 if identifier else 1.0
+    return terms
+
+
+def sentence_score(sentence: str, terms: dict) -> float:
+    words = set(_WORD.findall(sentence.lower()))
+    return sum(weight for term, weight in terms.items() if term in words)
+
+
+def pack_context(chunks: Iterable[Tuple[str, str]],
+                 query: str,
+                 count_tokens: Callable[[str], int],
+                 budget: int = CONTEXT_TOKEN_BUDGET,
+                 max_chunk_tokens: int = CONTEXT_MAX_CHUNK_TOKENS,
+                 overlap_threshold: float = CONTEXT_OVERLAP_THRESHOLD) -> PackedContext:
+    """
+    Fits ranked `(text, source)` chunks into `budget` tokens, best-ranked first.
+
+    Sentences already in the context are skipped, so overlapping chunks (neighbouring chunks of
+    one document, the same page crawled under two URLs) are only paid for once; a chunk that
+    adds almost nothing new is dropped. A chunk longer than `max_chunk_tokens`, or than what is
+    left of the budget, keeps only the sentences that share the most terms with the query, in
+    their original order. Each chunk ends with its `source` line.
+    """
+    terms = query_terms(query)
+    seen = set()
+    parts, used = [], 0
+    chunk_count = trimmed = duplicates = dropped = 0
+    separator_tokens = count_tokens("\n\n")
+
+    for text, source in chunks:
+        sentences = split_sentences(text)
+        new_sentences = [sentence for sentence in sentences if _normalize(sentence) not in seen]
+        if not new_sentences or 1 - len(new_sentences) / len(sentences) >= overlap_threshold:
+            duplicates += 1
+            continue
+
+        source_tokens = count_tokens(source) + 1
+        available = min(max_chunk_tokens, budget - used - separator_tokens * bool(parts)) - source_tokens
+        if available <= 0:
+            dropped += 1
+            continue
+
+        # Untouched chunks keep their layout (tables, lists); rebuilt ones are joined sentence by sentence
+        body = text.strip() if len(new_sentences) == len(sentences) else " ".join(new_sentences)
+        body_tokens = count_tokens(body)
+        if body_tokens > available:
+            body, body_tokens = _trim_to_relevant(new_sentences, terms, count_tokens, available)
+            if not body:
+                dropped += 1
+                continue
+            trimmed += 1
+
+        parts.append(f"{body}\n{source}")
+        used += body_tokens + source_tokens + separator_tokens * (len(parts) > 1)
+        chunk_count += 1
+        seen.update(_normalize(sentence) for sentence in split_sentences(body))
+
+    return PackedContext("\n\n".join(parts), used, budget, chunk_count, trimmed, duplicates, dropped)
+
+
+def _trim_to_relevant(sentences: List[str], terms: dict, count_tokens: Callable[[str], int], available: int):
+    # Terms found in most sentences of the chunk ("about", the product name) do not tell them apart
+    words = [set(_WORD.findall(sentence.lower())) for sentence in sentences]
+    terms = {term: weight for term, weight in terms.items()
+             if sum(term in sentence_words for sentence_words in words) <= max(1, len(sentences) // 2)}
+
+    # Most relevant sentences first (ties keep the document order), then put back in document order
+    scores = [sentence_score(sentence, terms) for sentence in sentences]
+    ranked = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+    # Without any matching sentence (a purely semantic hit) the chunk is cut from its start instead
+    relevant_only = any(scores)
+    chosen, used = [], 0
+    for i in ranked:
+        if relevant_only and scores[i] == 0:
+            break
+        tokens = count_tokens(sentences[i]) + 1
+        if used + tokens > available:
+            continue
+        chosen.append(i)
+        used += tokens
+    if not chosen:
+        return "", 0
+    body = " ".join(sentences[i] for i in sorted(chosen))
+    return body, count_tokens(body)
+
+
+# Token counter backed by the same tokenizer as the chunker (cl100k_base)
+def tokenizer_counter(tokenizer=None) -> Callable[[str], int]:
+    if tokenizer is None:
+        from infrastructure.gpt.files_intake.vector_db import get_tokenizer
+        tokenizer = get_tokenizer()
+    return tokenizer.count_tokens
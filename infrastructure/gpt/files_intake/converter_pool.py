@@ -0,0 +1,122 @@
+import queue
+import threading
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from docling.chunking import HybridChunker
+from docling.datamodel.base_models import DocumentStream, InputFormat
+from docling.document_converter import DocumentConverter, FormatOption
+
+# Map the file types used in our metadata to Docling input formats
+FILE_TYPE_FORMATS = {
+    "pdf": InputFormat.PDF,
+    "docx": InputFormat.DOCX,
+    "excel": InputFormat.XLSX,
+    "spreadsheet": InputFormat.XLSX,
+    "csv": InputFormat.CSV,
+    "webpage": InputFormat.HTML,
+}
+
+
+# Wrap already-downloaded HTML so Docling converts it without fetching the URL again
+def html_document_stream(url: str, html: str) -> DocumentStream:
+    name = url.rstrip("/").rsplit("/", 1)[-1] or "index"
+    if not name.lower().endswith((".html", ".htm")):
+        name = f"{name}.html"
+    return DocumentStream(name=name, stream=BytesIO(html.encode("utf-8")))
+
+
+class ConverterPool:
+    """Shared, warmed-up DocumentConverter and HybridChunker instances.
+
+    Building a DocumentConverter is cheap, but its first conversion of a format loads the
+    layout/OCR models for that pipeline. The pool keeps `size` converters alive for the
+    whole process and hands each one to a single thread at a time, so model loading is
+    paid once per converter instead of once per file. Chunkers are cached by their settings.
+    """
+
+    def __init__(self, size: int = 1, warm_up_formats: Iterable[str] = ("pdf",)):
+        self.size = max(1, size)
+        self.warm_up_formats = tuple(warm_up_formats)
+        self._format_options: Dict[InputFormat, FormatOption] = {}
+        self._available: "queue.Queue[Optional[DocumentConverter]]" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._chunkers: Dict[Tuple, HybridChunker] = {}
+
+    #------------------Per-format Pipeline Options---------------------------------------------------
+
+    def configure_format(self, file_type: str, format_option: FormatOption):
+        """
+        Override the Docling pipeline for one file type, e.g.
+        `configure_format("pdf", PdfFormatOption(pipeline_options=PdfPipelineOptions(do_ocr=False)))`.
+        Converters built with the previous options are discarded.
+        """
+        with self._lock:
+            self._format_options[FILE_TYPE_FORMATS[file_type]] = format_option
+            self._available = queue.Queue()
+            self._created = 0
+
+    #------------------Converter Lifecycle-----------------------------------------------------------
+
+    def _new_converter(self) -> DocumentConverter:
+        converter = DocumentConverter(format_options=dict(self._format_options) or None)
+        for file_type in self.warm_up_formats:
+            converter.initialize_pipeline(FILE_TYPE_FORMATS[file_type])
+        return converter
+
+    @contextmanager
+    def acquire(self) -> Iterator[DocumentConverter]:
+        """Borrow a converter for exclusive use by the current thread."""
+        with self._lock:
+            available = self._available
+            create = available.empty() and self._created < self.size
+            if create:
+                self._created += 1
+
+        # None in the queue is a slot whose converter failed to build; whoever takes it builds it again
+        converter = None if create else available.get()
+        if converter is None:
+            converter = self._build_for_slot(available)
+
+        try:
+            yield converter
+        finally:
+            available.put(converter)
+
+    # Build a converter for a slot already counted in `_created`
+    def _build_for_slot(self, available) -> DocumentConverter:
+        try:
+            return self._new_converter()
+        except Exception:
+            # Hand the empty slot back so threads waiting in `available.get()` are woken
+            available.put(None)
+            raise
+
+    # Create every converter up front (e.g. before a batch ingestion starts)
+    def warm_up(self):
+        # One slot at a time; a slot whose build fails goes back as None and is rebuilt by its next user
+        while True:
+            with self._lock:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+                available = self._available
+            available.put(self._build_for_slot(available))
+
+    def convert(self, source, **kwargs):
+        with self.acquire() as converter:
+            return converter.convert(source, **kwargs)
+
+    #------------------Chunkers----------------------------------------------------------------------
+
+    def get_chunker(self, tokenizer, max_tokens: int = 8191, merge_peers: bool = True) -> HybridChunker:
+        key = (id(tokenizer), max_tokens, merge_peers)
+        with self._lock:
+            chunker = self._chunkers.get(key)
+            if chunker is None:
+                chunker = HybridChunker(tokenizer=tokenizer, max_tokens=max_tokens, merge_peers=merge_peers)
+                self._chunkers[key] = chunker
+        return chunker
+
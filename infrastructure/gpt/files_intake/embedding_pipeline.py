@@ -0,0 +1,114 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence
+
+import openai
+
+
+class EmbeddingPipeline:
+    """Explicit embedding stage between chunking and `store_chunks_in_lancedb`.
+
+    Texts are packed into batches bounded by token count and number of inputs, the
+    batches are sent concurrently, and 429/5xx responses are retried with exponential
+    backoff (honouring `Retry-After` when the server sends it). Point `OPENAI_BASE_URL`
+    at `test_data/mock_openai_server.py` to run it without the real API.
+    """
+
+    # Hard limits of the OpenAI embeddings endpoint
+    MAX_INPUTS_PER_REQUEST = 2048
+    MAX_TOKENS_PER_INPUT = 8191
+
+    def __init__(self,
+                 client,
+                 tokenizer,
+                 model: str = "text-embedding-3-large",
+                 max_batch_tokens: int = 100_000,
+                 max_batch_inputs: int = 256,
+                 max_workers: int = 4,
+                 max_retries: int = 6,
+                 base_delay: float = 1.0,
+                 max_delay: float = 60.0):
+        # Retries are handled here, so the client must not retry on its own
+        self.client = client.with_options(max_retries=0)
+        self.tokenizer = tokenizer
+        self.model = model
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_inputs = min(max_batch_inputs, self.MAX_INPUTS_PER_REQUEST)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    #------------------Batch Packing-----------------------------------------------------------------
+
+    # The endpoint rejects inputs over MAX_TOKENS_PER_INPUT, so longer texts are embedded by their first tokens
+    def truncate_inputs(self, texts: Sequence[str]) -> List[str]:
+        inputs = list(texts)
+        for i, count in enumerate(self.tokenizer.count_tokens_batch(inputs)):
+            if count > self.MAX_TOKENS_PER_INPUT:
+                print(f"✂️ Embedding input {i} has {count} tokens, truncated to {self.MAX_TOKENS_PER_INPUT}")
+                inputs[i] = self.tokenizer.truncate(inputs[i], self.MAX_TOKENS_PER_INPUT)
+        return inputs
+
+    # Group text indexes into batches that respect the token and input limits (texts already truncated)
+    def pack_batches(self, texts: Sequence[str]) -> List[List[int]]:
+        batches = []
+        current, current_tokens = [], 0
+
+        for i, tokens in enumerate(self.tokenizer.count_tokens_batch(list(texts))):
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_inputs):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    #------------------Requests with Backoff---------------------------------------------------------
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                response = self.client.embeddings.create(model=self.model, input=batch)
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt, e)
+                print(f"⏳ Embedding request failed ({e.__class__.__name__}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                attempt += 1
+
+    #------------------Public Entry Point------------------------------------------------------------
+
+    # Embed all texts, preserving their order
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        texts = self.truncate_inputs(texts)
+        batches = self.pack_batches(texts)
+        vectors: List[List[float]] = [None] * len(texts)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(lambda batch: self._embed_batch([texts[i] for i in batch]), batches)
+            for batch, batch_vectors in zip(batches, results):
+                for i, vector in zip(batch, batch_vectors):
+                    vectors[i] = vector
+
+        return vectors
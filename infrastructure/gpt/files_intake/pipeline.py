@@ -0,0 +1,199 @@
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, Iterable, List, Optional
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class Stage:
+    """One step of a `Pipeline`, run by its own pool of `workers` threads.
+
+    `func(item)` returns an iterable of output items (empty to drop the item, several to fan
+    out) or None. With `batch_size > 1` the stage is batched: `func` receives a list of items,
+    collected until their total `weight` (1 per item by default) reaches `batch_size` or
+    `batch_timeout` seconds passed since the first one arrived.
+    """
+
+    def __init__(self,
+                 name: str,
+                 func: Callable,
+                 workers: int = 1,
+                 queue_size: int = 16,
+                 batch_size: int = 1,
+                 batch_timeout: float = 2.0,
+                 weight: Optional[Callable] = None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.weight = weight or (lambda item: 1)
+
+
+class StageStats:
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy_seconds = 0.0      # time spent inside the stage function
+        self.blocked_seconds = 0.0   # time spent waiting for room in the next queue (backpressure)
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, items_in: int = 0, items_out: int = 0, busy: float = 0.0, blocked: float = 0.0, error: bool = False):
+        with self._lock:
+            self.items_in += items_in
+            self.items_out += items_out
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+            self.errors += 1 if error else 0
+
+    def as_dict(self) -> dict:
+        wall = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        capacity = wall * self.workers
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "errors": self.errors,
+            "items_per_second": self.items_in / wall if wall > 0 else 0.0,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            # Share of the pool's time spent working: the stage closest to 100% is the bottleneck
+            "utilization": self.busy_seconds / capacity if capacity > 0 else 0.0,
+        }
+
+
+class Pipeline:
+    """Multi-stage producer/consumer pipeline with bounded queues between the stages.
+
+    The `source` is called once, in its own thread, with an `emit(item)` function; every stage
+    reads from a bounded queue and writes into the next one, so a slow stage makes the stages
+    before it block (backpressure) instead of piling items up in memory. Failing items are
+    logged and counted, the rest of the pipeline keeps running.
+    """
+
+    def __init__(self, stages: List[Stage], source_name: str = "source"):
+        self.stages = stages
+        self.source_name = source_name
+        self.stats = [StageStats(source_name, 1)] + [StageStats(stage.name, stage.workers) for stage in stages]
+
+    def run(self, source: Callable[[Callable], None]) -> List[dict]:
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages] + [None]
+        remaining_workers = [stage.workers for stage in self.stages]
+        counters_lock = threading.Lock()
+        source_error = []
+
+        def put(q, item, stats):
+            if q is None:
+                return
+            start = time.perf_counter()
+            q.put(item)
+            stats.record(blocked=time.perf_counter() - start)
+
+        def finish_stage(index):
+            # The last worker of a stage closes the next stage's input
+            with counters_lock:
+                remaining_workers[index] -= 1
+                last = remaining_workers[index] == 0
+            self.stats[index + 1].finished = time.perf_counter()
+            if last and queues[index + 1] is not None:
+                for _ in range(self.stages[index + 1].workers):
+                    queues[index + 1].put(_DONE)
+
+        def call(index, payload, count):
+            stage, stats = self.stages[index], self.stats[index + 1]
+            start = time.perf_counter()
+            try:
+                outputs = list(stage.func(payload) or ())
+                error = False
+            except Exception as e:
+                print(f"❌ Pipeline stage `{stage.name}` failed: {e}")
+                traceback.print_exc()
+                outputs, error = [], True
+            stats.record(items_in=count, items_out=len(outputs), busy=time.perf_counter() - start, error=error)
+            for output in outputs:
+                put(queues[index + 1], output, stats)
+
+        def worker(index):
+            stage, in_queue = self.stages[index], queues[index]
+            batch, batch_weight, batch_started = [], 0, None
+
+            while True:
+                timeout = None
+                if batch:
+                    timeout = max(0.0, stage.batch_timeout - (time.perf_counter() - batch_started))
+                try:
+                    item = in_queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is not None and item is not _DONE:
+                    if stage.batch_size <= 1:
+                        call(index, item, 1)
+                        continue
+                    if not batch:
+                        batch_started = time.perf_counter()
+                    batch.append(item)
+                    batch_weight += stage.weight(item)
+
+                # Flush a batch when it is full, timed out, or the input is finished
+                if batch and (item is None or item is _DONE or batch_weight >= stage.batch_size):
+                    call(index, batch, len(batch))
+                    batch, batch_weight = [], 0
+
+                if item is _DONE:
+                    finish_stage(index)
+                    return
+
+        def run_source():
+            stats = self.stats[0]
+            emit = lambda item: (stats.record(items_in=1, items_out=1), put(queues[0], item, stats))
+            try:
+                source(emit)
+            except Exception as e:
+                source_error.append(e)
+            finally:
+                stats.finished = time.perf_counter()
+                # The source works whenever it is not blocked on the first queue
+                stats.busy_seconds = max(0.0, stats.finished - stats.started - stats.blocked_seconds)
+                for _ in range(self.stages[0].workers):
+                    queues[0].put(_DONE)
+
+        started = time.perf_counter()
+        for stats in self.stats:
+            stats.started = started
+
+        threads = [threading.Thread(target=run_source, name=f"pipeline-{self.source_name}", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads += [
+                threading.Thread(target=worker, args=(index,), name=f"pipeline-{stage.name}-{i}", daemon=True)
+                for i in range(stage.workers)
+            ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if source_error:
+            raise source_error[0]
+        return self.report()
+
+    def report(self) -> List[dict]:
+        return [stats.as_dict() for stats in self.stats]
+
+
+def print_pipeline_report(report: Iterable[dict]):
+    print("\n📊 Pipeline throughput:")
+    for row in report:
+        print(f"   {row['stage']:<10} {row['items_in']:>6} in  {row['items_out']:>6} out  "
+              f"{row['items_per_second']:>8.2f}/s  busy {row['utilization']:>6.1%}  "
+              f"blocked {row['blocked_seconds']:>7.2f}s  errors {row['errors']}")
@@ -0,0 +1,257 @@
+import hashlib
+import os
+import re
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from infrastructure.gpt.files_intake.utils.dedup import build_dedup_key, sql_literal
+from infrastructure.gpt.files_intake.utils.lazy import lazy_singleton
+from infrastructure.gpt.files_intake.utils.ttl_cache import TTLCache
+from infrastructure.gpt.files_intake.vector_index import (
+    VECTOR_SEARCH_NPROBES, VECTOR_SEARCH_REFINE_FACTOR, tune_query
+)
+from infrastructure.gpt.utils.tracing import span
+
+# "hybrid" (keyword and vector rankings fused), "vector" or "keyword"
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# Chunks added to a vector-enriched prompt; hybrid ranking puts exact matches first, so fewer are needed
+RETRIEVAL_NUM_RESULTS = int(os.getenv("RETRIEVAL_NUM_RESULTS", "6"))
+# Candidates taken from each ranking before fusion, as a multiple of the requested results
+HYBRID_CANDIDATE_FACTOR = int(os.getenv("HYBRID_CANDIDATE_FACTOR", "3"))
+# Reciprocal rank fusion: smoothing constant, and weight of the keyword ranking (the vector ranking weighs 1)
+RRF_K = int(os.getenv("RRF_K", "60"))
+HYBRID_KEYWORD_WEIGHT = float(os.getenv("HYBRID_KEYWORD_WEIGHT", "1.0"))
+
+#------------------Retrieval Caches---------------------------------------------------------------
+
+# Level 1: query embeddings, keyed by (model, normalized prompt)
+query_embedding_cache = TTLCache(
+    max_entries=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600")),
+)
+# Level 2: top-k results, keyed by (table, table version, query embedding, filters, search settings)
+search_result_cache = TTLCache(
+    max_entries=int(os.getenv("SEARCH_RESULT_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("SEARCH_RESULT_CACHE_TTL", "600")),
+)
+
+
+# Collapse whitespace so trivially different prompts share a cache entry
+def normalize_query(prompt: str) -> str:
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+# Embed a query once per (model, normalized prompt)
+def embed_query(prompt: str, embedding_func) -> List[float]:
+    normalized = normalize_query(prompt)
+    with span("query_embedding", cached=True) as attributes:
+        def compute():
+            attributes["cached"] = False
+            return list(embedding_func.compute_query_embeddings(normalized)[0])
+
+        return query_embedding_cache.get_or_compute((embedding_func.name, normalized), compute)
+
+
+def _vector_digest(vector: List[float]) -> str:
+    return hashlib.sha1(array("f", vector).tobytes()).hexdigest()
+
+
+# Drop cached results of a table after it was written to
+def invalidate_search_results(table_name: str):
+    search_result_cache.discard_where(lambda key: key[0] == table_name)
+
+
+def cache_stats() -> dict:
+    return {
+        "query_embeddings": query_embedding_cache.stats(),
+        "search_results": search_result_cache.stats(),
+    }
+
+
+# Build a LanceDB `where` clause restricting a search to one project (and optionally a file type / file)
+def build_metadata_filter(project_id: Optional[str] = None,
+                          file_type: Optional[str] = None,
+                          filename: Optional[str] = None) -> Optional[str]:
+    """
+    A filename is always matched through `dedup_key`, which holds the normalized filename/URL the
+    document was ingested under, so case and surrounding whitespace never matter. With a project
+    every condition hits a scalar index (see vector_db.ensure_scalar_indexes); a filename alone
+    is matched on the key's suffix in any project.
+    """
+    conditions = []
+    if project_id and filename:
+        conditions.append(f"dedup_key = {sql_literal(build_dedup_key(filename, project_id))}")
+    elif project_id:
+        conditions.append(f"metadata.project_id = {sql_literal(project_id)}")
+    elif filename:
+        conditions.append(f"ends_with(dedup_key, {sql_literal(build_dedup_key(filename, None))})")
+    if file_type:
+        conditions.append(f"metadata.file_type = {sql_literal(file_type)}")
+    return " AND ".join(conditions) or None
+
+
+# Vector search with the metadata filter applied before the nearest-neighbour step
+def search_chunks(table,
+                  prompt,
+                  num_results: int = 10,
+                  project_id: Optional[str] = None,
+                  file_type: Optional[str] = None,
+                  filename: Optional[str] = None,
+                  nprobes: int = VECTOR_SEARCH_NPROBES,
+                  refine_factor: int = VECTOR_SEARCH_REFINE_FACTOR,
+                  with_row_id: bool = False):
+    """
+    `prompt` can be the query text or a precomputed query vector. With a pre-filter the top-k
+    is taken among the project's rows only, so no extra results are needed to make up for
+    chunks from unrelated projects.
+    """
+    query = table.search(prompt).limit(num_results)
+
+    where = build_metadata_filter(project_id, file_type, filename)
+    if where:
+        query = query.where(where, prefilter=True)
+
+    # nprobes/refine_factor only matter once the table has an ANN index (see vector_index.py)
+    return tune_query(query, nprobes, refine_factor).with_row_id(with_row_id).to_pandas()
+
+
+#------------------Keyword and Hybrid Search------------------------------------------------------
+
+# Thread pool running the keyword and vector queries of a hybrid search side by side
+@lazy_singleton
+def get_search_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-search")
+
+
+# Full-text query string: quotes would turn parts of a prompt into phrase queries, so they are dropped
+def build_keyword_query(prompt: str) -> str:
+    return normalize_query(re.sub(r"[\"'`]", " ", prompt))
+
+
+# BM25 search over the full-text index on `text`, with the same pre-filter as search_chunks
+def keyword_search_chunks(table,
+                          prompt: str,
+                          num_results: int = 10,
+                          project_id: Optional[str] = None,
+                          file_type: Optional[str] = None,
+                          filename: Optional[str] = None):
+    """
+    Finds exact identifiers (defect IDs like "D-003", component names, error strings) that
+    embeddings tend to blur. Returns None if the table has no full-text index yet (it is
+    built with the scalar indexes, see vector_db.ensure_scalar_indexes) or the query fails.
+    """
+    query_text = build_keyword_query(prompt)
+    if not query_text:
+        return None
+
+    query = table.search(query_text, query_type="fts").limit(num_results)
+    where = build_metadata_filter(project_id, file_type, filename)
+    if where:
+        query = query.where(where, prefilter=True)
+
+    try:
+        return query.with_row_id(True).to_pandas()
+    except (ValueError, RuntimeError) as e:
+        print(f"⚠️ Keyword search unavailable on `{table.name}`, using vector search only: {e}")
+        return None
+
+
+def reciprocal_rank_fusion(rankings: List, num_results: int, weights: Optional[List[float]] = None, k: int = RRF_K):
+    """
+    Fuses ranked DataFrames (each with a `_rowid` column) into one: every row scores
+    sum(weight / (k + rank)) over the rankings it appears in, so chunks found by both the
+    keyword and the vector search come first. Scores are stored in `_relevance_score`.
+    """
+    import pandas as pd
+
+    weights = weights or [1.0] * len(rankings)
+    scores, rows = {}, {}
+    for ranking, weight in zip(rankings, weights):
+        if ranking is None or ranking.empty:
+            continue
+        for rank, (_, row) in enumerate(ranking.iterrows(), start=1):
+            row_id = row["_rowid"]
+            scores[row_id] = scores.get(row_id, 0.0) + weight / (k + rank)
+            rows.setdefault(row_id, row)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:num_results]
+    if not ranked:
+        return next((ranking.iloc[0:0] for ranking in rankings if ranking is not None), pd.DataFrame())
+
+    fused = pd.DataFrame([rows[row_id] for row_id in ranked]).reset_index(drop=True)
+    fused["_relevance_score"] = [scores[row_id] for row_id in ranked]
+    return fused
+
+
+# Keyword and vector search run in parallel, fused with reciprocal rank fusion
+def hybrid_search_chunks(table,
+                         prompt: str,
+                         vector: List[float],
+                         num_results: int = 10,
+                         project_id: Optional[str] = None,
+                         file_type: Optional[str] = None,
+                         filename: Optional[str] = None,
+                         nprobes: int = VECTOR_SEARCH_NPROBES,
+                         refine_factor: int = VECTOR_SEARCH_REFINE_FACTOR,
+                         keyword_weight: float = HYBRID_KEYWORD_WEIGHT):
+    candidates = num_results * HYBRID_CANDIDATE_FACTOR
+    executor = get_search_executor()
+
+    keyword = executor.submit(keyword_search_chunks, table, prompt, candidates, project_id, file_type, filename)
+    semantic = executor.submit(
+        search_chunks, table, vector, candidates, project_id, file_type, filename, nprobes, refine_factor, True
+    )
+
+    keyword_results, vector_results = keyword.result(), semantic.result()
+    if keyword_results is None:
+        return vector_results.head(num_results)
+    return reciprocal_rank_fusion([keyword_results, vector_results], num_results, weights=[keyword_weight, 1.0])
+
+
+# search_chunks / keyword_search_chunks / hybrid_search_chunks behind both cache levels
+def cached_search_chunks(table,
+                         prompt: str,
+                         embedding_func,
+                         num_results: int = 10,
+                         project_id: Optional[str] = None,
+                         file_type: Optional[str] = None,
+                         filename: Optional[str] = None,
+                         nprobes: int = VECTOR_SEARCH_NPROBES,
+                         refine_factor: int = VECTOR_SEARCH_REFINE_FACTOR,
+                         mode: str = RETRIEVAL_MODE):
+    """
+    Results are keyed by the table version, so anything ingested after they were cached
+    (which bumps the version) makes them unreachable; writers also call
+    invalidate_search_results to free them right away. The returned DataFrame is shared
+    between callers and must not be modified.
+    """
+    if mode == "keyword":
+        key = (table.name, table.version, mode, normalize_query(prompt), num_results, project_id, file_type, filename)
+        return search_result_cache.get_or_compute(
+            key,
+            lambda: _or_empty(keyword_search_chunks(table, prompt, num_results, project_id, file_type, filename))
+        )
+
+    vector = embed_query(prompt, embedding_func)
+    key = (
+        table.name, table.version, mode, _vector_digest(vector), num_results,
+        project_id, file_type, filename, nprobes, refine_factor
+    )
+    if mode == "hybrid":
+        # The prompt text is part of the key as well: the keyword ranking depends on it
+        key += (normalize_query(prompt),)
+        return search_result_cache.get_or_compute(
+            key,
+            lambda: hybrid_search_chunks(table, prompt, vector, num_results, project_id, file_type, filename,
+                                         nprobes, refine_factor)
+        )
+    return search_result_cache.get_or_compute(
+        key,
+        lambda: search_chunks(table, vector, num_results, project_id, file_type, filename, nprobes, refine_factor)
+    )
+
+
+def _or_empty(results):
+    import pandas as pd
+    return pd.DataFrame() if results is None else results
@@ -0,0 +1,236 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, List, Optional
+
+# Flush the write buffer once it holds this many records, or this many seconds after the first one arrived
+WRITE_BUFFER_MAX_RECORDS = int(os.getenv("WRITE_BUFFER_MAX_RECORDS", "2000"))
+WRITE_BUFFER_MAX_SECONDS = float(os.getenv("WRITE_BUFFER_MAX_SECONDS", "10"))
+# Compact the table in the background after this many rows were appended or deleted through the writer
+COMPACT_AFTER_ROWS = int(os.getenv("COMPACT_AFTER_ROWS", "20000"))
+# ...or as soon as the table has this many small fragments
+COMPACT_MAX_SMALL_FRAGMENTS = int(os.getenv("COMPACT_MAX_SMALL_FRAGMENTS", "64"))
+# Fragments are counted (open + stats) only every this many appends/deletes, not after each one
+FRAGMENT_CHECK_EVERY_WRITES = int(os.getenv("FRAGMENT_CHECK_EVERY_WRITES", "16"))
+# Versions older than this are removed by compaction (the latest version is always kept)
+VERSION_RETENTION_HOURS = float(os.getenv("VERSION_RETENTION_HOURS", "1"))
+
+
+def table_layout(table) -> dict:
+    """Fragment and version counts of a table, the numbers compaction brings down."""
+    fragment_stats = table.stats()["fragment_stats"]
+    return {
+        "rows": table.count_rows(),
+        "fragments": fragment_stats["num_fragments"],
+        "small_fragments": fragment_stats["num_small_fragments"],
+        "versions": len(table.list_versions()),
+    }
+
+
+def compact_table(table, retention: timedelta = timedelta(hours=VERSION_RETENTION_HOURS)) -> dict:
+    """
+    Merges small fragments, removes versions older than `retention` and folds unindexed rows
+    into the existing indexes (LanceDB's `optimize`). Returns the layout before and after.
+    """
+    before = table_layout(table)
+    start = time.perf_counter()
+    table.optimize(cleanup_older_than=retention)
+    after = table_layout(table)
+    print(f"🧹 Compacted `{table.name}`: {before['fragments']} → {after['fragments']} fragments, "
+          f"{before['versions']} → {after['versions']} versions in {time.perf_counter() - start:.1f}s")
+    return {"before": before, "after": after, "seconds": time.perf_counter() - start}
+
+
+class TableWriter:
+    """Write buffer for one LanceDB chunk table.
+
+    Records from many documents are gathered and appended in one `table.add` once the buffer
+    holds `max_records` records or `max_seconds` passed since the first buffered record, so
+    a crawl produces a few large fragments instead of thousands of tiny ones (each `add` is a
+    new fragment and a new table version). Outside of a `batch()` block, `add(records)` writes
+    immediately, which keeps single-file uploads visible to search as soon as they return.
+
+    After `compact_after_rows` written rows, or when the table has too many small fragments
+    (checked every `fragment_check_every` writes), `compact_table` runs in a background thread.
+    Writes wait for a running compaction.
+    """
+
+    def __init__(self,
+                 open_table: Callable,
+                 after_write: Optional[Callable] = None,
+                 max_records: int = WRITE_BUFFER_MAX_RECORDS,
+                 max_seconds: float = WRITE_BUFFER_MAX_SECONDS,
+                 compact_after_rows: int = COMPACT_AFTER_ROWS,
+                 compact_max_small_fragments: int = COMPACT_MAX_SMALL_FRAGMENTS,
+                 fragment_check_every: int = FRAGMENT_CHECK_EVERY_WRITES):
+        self.open_table = open_table
+        self.after_write = after_write
+        self.max_records = max_records
+        self.max_seconds = max_seconds
+        self.compact_after_rows = compact_after_rows
+        self.compact_max_small_fragments = compact_max_small_fragments
+        self.fragment_check_every = max(1, fragment_check_every)
+
+        self._buffer: List[dict] = []
+        self._callbacks: List[Callable] = []
+        self._pending_keys = set()
+        self._pending_hashes = set()
+        self._batch_depth = 0
+        self._timer = None
+        self._rows_since_compaction = 0
+        self._writes_since_fragment_check = 0
+        self._compaction = None
+
+        self._lock = threading.Lock()         # guards the buffer
+        self._write_lock = threading.Lock()   # serializes appends, deletes and compaction
+
+    #------------------Buffering---------------------------------------------------------------------
+
+    def add(self, records: List[dict], on_written: Optional[Callable] = None):
+        """
+        Buffers embedded records; they are written right away unless inside `batch()`.
+        `on_written()` is called once the records are in the table (e.g. to record sync state).
+        """
+        with self._lock:
+            self._buffer.extend(records)
+            if on_written:
+                self._callbacks.append(on_written)
+            for record in records:
+                self._pending_keys.add(record.get("dedup_key"))
+                project_id = (record.get("metadata") or {}).get("project_id")
+                self._pending_hashes.add((project_id or "", record.get("content_hash")))
+            full = len(self._buffer) >= self.max_records
+            immediate = self._batch_depth == 0
+            if not (full or immediate):
+                self._schedule_flush()
+
+        if full or immediate:
+            self.flush()
+
+    # Arm the timer that flushes the buffer `max_seconds` from now (call with `_lock` held)
+    def _schedule_flush(self):
+        if self._buffer and self._timer is None:
+            self._timer = threading.Timer(self.max_seconds, self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    # A failed timed flush has nobody to raise to: log it and try again later
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️ Buffered write failed, retrying in {self.max_seconds:.0f}s: {e}")
+            with self._lock:
+                self._schedule_flush()
+
+    # Whether a not-yet-written document (by dedup key, or by content within a project) is buffered
+    def is_pending(self, dedup_key: str = None, content_hash: str = None, project_id: str = None) -> bool:
+        with self._lock:
+            return (dedup_key in self._pending_keys
+                    or (content_hash is not None and (project_id or "", content_hash) in self._pending_hashes))
+
+    @contextmanager
+    def batch(self):
+        """Defers writes until the outermost `batch()` block exits (or the buffer fills up)."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                last = self._batch_depth == 0
+            if last:
+                self.flush()
+
+    #------------------Writing-----------------------------------------------------------------------
+
+    def flush(self) -> int:
+        with self._write_lock:
+            with self._lock:
+                records, self._buffer = self._buffer, []
+                callbacks, self._callbacks = self._callbacks, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            if records:
+                try:
+                    table = self.open_table()
+                    table.add(records)
+                except BaseException:
+                    # Nothing was written: put the records back in front of anything buffered meanwhile
+                    with self._lock:
+                        self._buffer[:0] = records
+                        self._callbacks[:0] = callbacks
+                    raise
+                if self.after_write:
+                    self.after_write(table)
+                print(f"💾 Appended {len(records)} chunks to `{table.name}`.")
+            for callback in callbacks:
+                callback()
+
+            # Keys stay "pending" until the rows are visible in the table
+            with self._lock:
+                if not self._buffer:
+                    self._pending_keys.clear()
+                    self._pending_hashes.clear()
+
+        if records:
+            self._note_writes(len(records))
+        return len(records)
+
+    def delete(self, condition: str) -> int:
+        """Deletes rows (e.g. the previous version of a re-crawled page) and counts them towards compaction."""
+        with self._write_lock:
+            table = self.open_table()
+            removed = table.count_rows(condition)
+            if removed:
+                table.delete(condition)
+                if self.after_write:
+                    self.after_write(table)
+        if removed:
+            self._note_writes(removed)
+        return removed
+
+    #------------------Compaction--------------------------------------------------------------------
+
+    def _note_writes(self, rows: int):
+        with self._lock:
+            self._rows_since_compaction += rows
+            self._writes_since_fragment_check += 1
+            due = self._rows_since_compaction >= self.compact_after_rows
+            check_fragments = (not due and self.compact_max_small_fragments
+                               and self._writes_since_fragment_check >= self.fragment_check_every)
+            if check_fragments:
+                self._writes_since_fragment_check = 0
+        if check_fragments:
+            due = self.open_table().stats()["fragment_stats"]["num_small_fragments"] >= self.compact_max_small_fragments
+        if due:
+            self.compact_in_background()
+
+    def compact_in_background(self):
+        with self._lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return
+            self._rows_since_compaction = 0
+            self._writes_since_fragment_check = 0
+            self._compaction = threading.Thread(target=self.compact, name="table-compaction", daemon=True)
+            self._compaction.start()
+
+    def compact(self) -> dict:
+        with self._write_lock:
+            try:
+                return compact_table(self.open_table())
+            except Exception as e:
+                print(f"⚠️ Compaction failed: {e}")
+                return {}
+
+    def close(self):
+        """Flushes the buffer and waits for a running compaction."""
+        self.flush()
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
@@ -0,0 +1,342 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from bs4 import BeautifulSoup
+
+DEFAULT_USER_AGENT = "SmartTestAI-Crawler/1.0"
+
+# Statuses that mean the page is gone, not that fetching it failed
+GONE_STATUSES = {404, 410}
+# robots.txt answered with these: the site is closed to crawlers (other 4xx mean there are no rules)
+ROBOTS_DENY_STATUSES = {401, 403}
+
+# Query parameters that never change page content
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "_ga"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+class CrawledPage(NamedTuple):
+    url: str
+    html: str
+    depth: int
+    headers: Dict[str, str]
+
+
+class FetchedPage(NamedTuple):
+    url: str
+    status: int  # 0 when the request failed or robots.txt disallows the URL
+    html: str
+    headers: Dict[str, str]
+
+
+# Canonical form of a URL, so fragment/query/case variants of the same page are crawled once
+def canonicalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Resolves `url` against `base`, drops the fragment, lower-cases scheme and host, removes
+    default ports and tracking parameters and sorts the remaining query parameters.
+    Returns None for non-HTTP(S) links (mailto:, javascript:, ...).
+    """
+    url, _ = urldefrag(urljoin(base, url.strip()) if base else url.strip())
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    netloc = parts.hostname.lower()
+    if parts.port and parts.port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{parts.port}"
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    ))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+class AsyncCrawler:
+    """Concurrent same-site crawler used by crawl_and_process_site.
+
+    A bounded pool of workers takes URLs from a deque frontier (with a set of every URL ever
+    queued, so membership checks are O(1)). Requests to one host are limited to
+    `per_host_concurrency` at a time and spaced by `per_host_delay` seconds, or by the
+    robots.txt Crawl-delay if that is larger. Pages are returned with their HTML, so they
+    can be converted without downloading them again.
+
+    After `crawl`, `failed` lists the URLs that could not be fetched (errors, unexpected
+    statuses), `disallowed` the ones robots.txt kept out, and `complete` tells whether the
+    whole site was seen, i.e. whether pages missing from the result are really gone.
+    """
+
+    def __init__(self,
+                 max_links: int = 20,
+                 max_depth: int = 3,
+                 max_workers: int = 8,
+                 per_host_concurrency: int = 2,
+                 per_host_delay: float = 0.0,
+                 timeout: float = 10.0,
+                 respect_robots: bool = True,
+                 user_agent: str = DEFAULT_USER_AGENT):
+        self.max_links = max_links
+        self.max_depth = max_depth
+        self.max_workers = max_workers
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_delay = per_host_delay
+        self.timeout = timeout
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+
+    #------------------Politeness (per-host limits and robots.txt)-------------------------------------
+
+    async def _robots(self, client: httpx.AsyncClient, host_url: str) -> Optional[RobotFileParser]:
+        if not self.respect_robots:
+            return None
+        # One fetch per host, also when many workers reach a new host at the same time
+        async with self._robots_locks.setdefault(host_url, asyncio.Lock()):
+            if host_url not in self._robots_cache:
+                self._robots_cache[host_url] = await self._fetch_robots(client, host_url)
+        return self._robots_cache[host_url]
+
+    # Rules of a host (None: no rules); an unreachable robots.txt closes the host, as in RFC 9309
+    async def _fetch_robots(self, client: httpx.AsyncClient, host_url: str) -> Optional[RobotFileParser]:
+        try:
+            response = await client.get(f"{host_url}/robots.txt")
+            status = response.status_code
+        except httpx.HTTPError as e:
+            print(f"⚠️ Could not fetch {host_url}/robots.txt, not crawling the host: {e}")
+            status = None
+
+        if status == 200:
+            parser = RobotFileParser()
+            parser.parse(response.text.splitlines())
+            return parser
+        if status is not None and 400 <= status < 500 and status not in ROBOTS_DENY_STATUSES:
+            return None
+        parser = RobotFileParser()
+        parser.disallow_all = True
+        return parser
+
+    async def _polite_get(self, client: httpx.AsyncClient, url: str, headers: dict = None) -> Optional[httpx.Response]:
+        parts = urlsplit(url)
+        host_url = f"{parts.scheme}://{parts.netloc}"
+
+        robots = await self._robots(client, host_url)
+        if robots and not robots.can_fetch(self.user_agent, url):
+            print(f"🚫 Disallowed by robots.txt: {url}")
+            return None
+        delay = max(self.per_host_delay, (robots.crawl_delay(self.user_agent) or 0) if robots else 0)
+
+        semaphore = self._host_slots.setdefault(host_url, asyncio.Semaphore(self.per_host_concurrency))
+        async with semaphore:
+            if delay:
+                wait = self._host_next_request.get(host_url, 0) - time.monotonic()
+                self._host_next_request[host_url] = max(time.monotonic(), self._host_next_request.get(host_url, 0)) + delay
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            return await client.get(url, headers=headers)
+
+    #------------------Frontier-----------------------------------------------------------------------
+
+    async def _enqueue(self, url: str, depth: int):
+        if url in self._seen:
+            return
+        if depth > self.max_depth:
+            self.depth_limited = True
+            return
+        self._seen.add(url)
+        async with self._changed:
+            self._frontier.append((url, depth))
+            self._changed.notify()
+
+    async def _next(self):
+        async with self._changed:
+            while not self._frontier and self._active and not self._done:
+                await self._changed.wait()
+            if self._done or not self._frontier:
+                return None
+            self._active += 1
+            return self._frontier.popleft()
+
+    async def _finish_one(self):
+        async with self._changed:
+            self._active -= 1
+            self._changed.notify_all()
+
+    #------------------Workers------------------------------------------------------------------------
+
+    async def _visit(self, client: httpx.AsyncClient, url: str, depth: int):
+        try:
+            response = await self._polite_get(client, url)
+        except httpx.HTTPError as e:
+            print(f"⚠️ Skipped {url} due to error: {e}")
+            self.failed.append(url)
+            return
+        if response is None:
+            self.disallowed.append(url)
+            return
+        if response.status_code != 200:
+            if response.status_code not in GONE_STATUSES:
+                print(f"⚠️ Skipped {url}: HTTP {response.status_code}")
+                self.failed.append(url)
+            return
+        if "text/html" not in response.headers.get("Content-Type", ""):
+            return
+
+        # Redirects may land on another canonical URL; never keep the same page twice
+        final_url = canonicalize_url(str(response.url)) or url
+        if not self._on_site(final_url):
+            print(f"↪️ Skipped {url}: redirected off the site to {final_url}")
+            return
+        if final_url != url:
+            if final_url in self._seen:
+                return
+            self._seen.add(final_url)
+
+        page = CrawledPage(final_url, response.text, depth, dict(response.headers))
+        async with self._changed:
+            if self._done:
+                return
+            # With a callback the HTML is handed over instead of kept for the whole crawl
+            self.pages.append(page._replace(html="") if self._on_page else page)
+            if len(self.pages) >= self.max_links:
+                self._done = True
+                self._changed.notify_all()
+        if self._on_page:
+            await asyncio.to_thread(self._on_page, page)
+
+        # Links of the deepest pages are still checked, to tell whether max_depth cut the crawl short
+        links = await asyncio.to_thread(self._extract_links, response.text, final_url)
+        for link in links:
+            await self._enqueue(link, depth + 1)
+
+    def _extract_links(self, html: str, page_url: str) -> List[str]:
+        soup = BeautifulSoup(html, "html.parser")
+        links = []
+        for link_tag in soup.find_all("a", href=True):
+            link = canonicalize_url(link_tag["href"], page_url)
+            if link and self._on_site(link):
+                links.append(link)
+        return links
+
+    # Whether a canonical URL belongs to the site being crawled
+    def _on_site(self, url: str) -> bool:
+        return urlsplit(url).netloc == self._site
+
+    async def _worker(self, client: httpx.AsyncClient):
+        while True:
+            item = await self._next()
+            if item is None:
+                return
+            try:
+                await self._visit(client, *item)
+            finally:
+                await self._finish_one()
+
+    #------------------Public Entry Point-------------------------------------------------------------
+
+    def _reset(self, site: str = "", on_page: Optional[Callable] = None):
+        self.pages: List[CrawledPage] = []
+        self._on_page = on_page
+        self._site = site
+        self._frontier = deque()
+        self._seen = set()
+        self._active = 0
+        self._done = False
+        self._changed = asyncio.Condition()
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._host_next_request: Dict[str, float] = {}
+        self._robots_cache: Dict[str, Optional[RobotFileParser]] = {}
+        self._robots_locks: Dict[str, asyncio.Lock] = {}
+        self.failed: List[str] = []
+        self.disallowed: List[str] = []
+        self.depth_limited = False
+
+    # True when the last crawl saw every page it could reach: no fetch failures, nothing cut off by max_depth or max_links
+    @property
+    def complete(self) -> bool:
+        return not self.failed and not self.depth_limited and not self._done
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={"User-Agent": self.user_agent},
+            limits=httpx.Limits(max_connections=self.max_workers),
+        )
+
+    async def crawl(self, start_url: str, on_page: Optional[Callable[[CrawledPage], None]] = None) -> List[CrawledPage]:
+        """
+        Returns the crawled pages. If `on_page` is given it is called (in a worker thread) with
+        each page as soon as it is fetched, and the returned pages carry no HTML; a blocking
+        `on_page` slows the crawl down instead of buffering pages.
+        """
+        start = canonicalize_url(start_url)
+        if not start:
+            raise ValueError(f"Invalid start URL: {start_url}")
+
+        self._reset(urlsplit(start).netloc, on_page)
+        await self._enqueue(start, 0)
+        async with self._client() as client:
+            await asyncio.gather(*(self._worker(client) for _ in range(self.max_workers)))
+
+        return self.pages[:self.max_links]
+
+    async def _fetch_one(self, client: httpx.AsyncClient, url: str, headers: Optional[dict]) -> FetchedPage:
+        try:
+            response = await self._polite_get(client, url, headers=headers)
+        except httpx.HTTPError as e:
+            print(f"⚠️ Could not fetch {url}: {e}")
+            return FetchedPage(url, 0, "", {})
+        if response is None:
+            return FetchedPage(url, 0, "", {})
+        html = response.text if response.status_code == 200 else ""
+        return FetchedPage(url, response.status_code, html, dict(response.headers))
+
+    async def fetch(self,
+                    urls: Iterable[str],
+                    validators: Optional[Dict[str, dict]] = None,
+                    on_page: Optional[Callable[[FetchedPage], None]] = None) -> List[FetchedPage]:
+        """
+        Fetches a known list of URLs (e.g. from a sitemap) with the same politeness rules.
+        `validators` maps a URL to conditional request headers (`If-None-Match`,
+        `If-Modified-Since`); pages that did not change come back with status 304 and no body.
+
+        `urls` may be a lazy iterator (it is advanced in a worker thread, so it can do blocking
+        I/O) and is consumed only as fast as the workers fetch. Pages are returned in completion
+        order, or passed to `on_page` as they arrive, in which case nothing is returned.
+        """
+        self._reset(on_page=on_page)
+        validators = validators if validators is not None else {}
+        url_iterator = iter(urls)
+        iterator_lock = asyncio.Lock()
+        results = []
+
+        async def next_url():
+            async with iterator_lock:
+                return await asyncio.to_thread(next, url_iterator, None)
+
+        async def worker(client):
+            while (url := await next_url()) is not None:
+                page = await self._fetch_one(client, url, validators.get(url))
+                if on_page:
+                    await asyncio.to_thread(on_page, page)
+                else:
+                    results.append(page)
+
+        async with self._client() as client:
+            await asyncio.gather(*(worker(client) for _ in range(self.max_workers)))
+        return results
+
+
+# Sync entry points for the ingestion functions
+def crawl_site(start_url: str, on_page: Optional[Callable] = None, **kwargs) -> List[CrawledPage]:
+    return asyncio.run(AsyncCrawler(**kwargs).crawl(start_url, on_page))
+
+
+def fetch_pages(urls: Iterable[str], validators: Optional[Dict[str, dict]] = None,
+                on_page: Optional[Callable] = None, **kwargs) -> List[FetchedPage]:
+    return asyncio.run(AsyncCrawler(**kwargs).fetch(urls, validators, on_page))
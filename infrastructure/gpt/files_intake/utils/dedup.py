@@ -0,0 +1,50 @@
+import hashlib
+from typing import Iterable, Optional
+
+
+# Whitespace stripped around filenames; kept to what DEDUP_KEY_SQL can trim as well
+TRIM_CHARS = " \t\n\r"
+
+
+# Normalize a filename (or URL) so that case and surrounding whitespace do not create "new" documents
+def normalize_filename(filename: Optional[str]) -> str:
+    return (filename or "").strip(TRIM_CHARS).lower()
+
+
+def build_dedup_key(filename: Optional[str], project_id: Optional[str]) -> str:
+    """Builds the key stored in the `dedup_key` column: `<project_id>::<normalized filename>`.
+
+    The same expression is reproduced in SQL by `DEDUP_KEY_SQL` so that tables created
+    before the column existed can be backfilled without reading them into memory.
+    """
+    return f"{project_id or ''}::{normalize_filename(filename)}"
+
+
+# SQL expression equivalent to build_dedup_key, evaluated by LanceDB over the nested metadata struct
+DEDUP_KEY_SQL = (
+    "concat(coalesce(metadata.project_id, ''), '::', "
+    "lower(btrim(coalesce(metadata.filename, ''), concat(' ', chr(9), chr(10), chr(13)))))"
+)
+
+
+# SHA-256 of a file on disk, read in blocks so large PDFs are never fully loaded
+def file_content_hash(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# SHA-256 of a sequence of texts (e.g. the chunks of a web page)
+def text_content_hash(texts: Iterable[str]) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+# Quote a value for use inside a LanceDB `where` filter
+def sql_literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
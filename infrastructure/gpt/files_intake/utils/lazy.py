@@ -0,0 +1,26 @@
+import functools
+import threading
+
+_UNSET = object()
+
+
+def lazy_singleton(factory):
+    """Turns a zero-argument factory into a thread-safe accessor that builds its value on first call.
+
+    Used for heavy subsystems (Docling, transformers, LanceDB, OpenAI clients) so that importing
+    a module does not import or initialize them until they are actually needed.
+    """
+    value = _UNSET
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def get():
+        nonlocal value
+        if value is _UNSET:
+            with lock:
+                if value is _UNSET:
+                    value = factory()
+        return value
+
+    get.is_loaded = lambda: value is not _UNSET
+    return get
@@ -1,9 +1,21 @@
 import xml.etree.ElementTree as ET
-from typing import List
+import zlib
+from typing import Iterator, List, NamedTuple, Optional
 from urllib.parse import urljoin
 
 import requests
 
+GZIP_MAGIC = b"\x1f\x8b"
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+ENTRY_TAGS = ("url", "sitemap")
+ENTRY_FIELDS = ("loc", "lastmod", "priority")
+
+
+class SitemapEntry(NamedTuple):
+    loc: str
+    lastmod: Optional[str] = None
+    priority: Optional[float] = None
+
 
 def get_sitemap_urls(base_url: str, sitemap_filename: str = "sitemap.xml") -> List[str]:
     """Fetches and parses a sitemap XML file to extract URLs.
@@ -19,40 +31,124 @@ def get_sitemap_urls(base_url: str, sitemap_filename: str = "sitemap.xml") -> Li
     Raises:
         ValueError: If there's an error fetching (except 404) or parsing the sitemap
     """
-    try:
-        sitemap_url = urljoin(base_url, sitemap_filename)
+    return [entry.loc for entry in get_sitemap_entries(base_url, sitemap_filename)]
+
+
+def get_sitemap_entries(base_url: str, sitemap_filename: str = "sitemap.xml") -> List[SitemapEntry]:
+    """Same as get_sitemap_urls, but returns SitemapEntry(loc, lastmod, priority) tuples.
+
+    Prefer iter_sitemap_entries for large sites, this function holds every entry in memory.
+    """
+    entries = list(iter_sitemap_entries(urljoin(base_url, sitemap_filename)))
+    return entries or [SitemapEntry(base_url.rstrip("/"))]
+
+
+def iter_sitemap_entries(sitemap_url: str, max_depth: int = 3, timeout: float = 10) -> Iterator[SitemapEntry]:
+    """Streams the entries of a sitemap, following sitemap indexes and gzip-compressed files.
+
+    The XML is parsed incrementally while it is downloaded and each `<url>` element is
+    discarded once yielded, so memory stays constant regardless of the sitemap size and
+    callers can start processing pages before the sitemap has been fully read.
 
-        # Fetch sitemap URL
-        response = requests.get(sitemap_url, timeout=10)
+    Args:
+        sitemap_url: URL of a sitemap or sitemap index (`.xml` or `.xml.gz`)
+        max_depth: How many levels of nested sitemap indexes to follow
+        timeout: Timeout in seconds of each HTTP request
+
+    Yields:
+        SitemapEntry for every `<url>` found. A sitemap that returns 404 yields nothing.
+
+    Raises:
+        ValueError: If there's an error fetching (except 404) or parsing a sitemap
+    """
+    visited = set()
+
+    def walk(url: str, depth: int) -> Iterator[SitemapEntry]:
+        if url in visited:
+            return
+        visited.add(url)
 
-        # # Return just the base URL if sitemap not found
-        if response.status_code == 404:
-            return [base_url.rstrip("/")]
+        child_sitemaps = []
+        for kind, value in _parse_sitemap(url, timeout):
+            if kind == "url":
+                yield value
+            elif depth < max_depth:
+                child_sitemaps.append(value)
+            else:
+                print(f"⚠️ Nested sitemap skipped (max depth reached): {value}")
 
-        response.raise_for_status()
+        # Child sitemaps are read after the index itself, so only one download is open at a time
+        for child in child_sitemaps:
+            yield from walk(child, depth + 1)
 
-        # Parse XML content
-        root = ET.fromstring(response.content)
+    yield from walk(sitemap_url, 0)
 
-        # Handle different XML namespaces that sitemaps might use
-        namespaces = (
-            {"ns": root.tag.split("}")[0].strip("{")} if "}" in root.tag else ""
-        )
 
-        # Extract URLs using namespace if present
-        if namespaces:
-            urls = [elem.text for elem in root.findall(".//ns:loc", namespaces)]
-        else:
-            urls = [elem.text for elem in root.findall(".//loc")]
+# Local name of a sitemap protocol tag; None for extension tags (image:loc, video:loc, xhtml:link, ...)
+def _sitemap_name(tag: str) -> Optional[str]:
+    namespace, _, name = tag[1:].rpartition("}") if tag.startswith("{") else ("", "", tag)
+    return name if namespace in ("", SITEMAP_NAMESPACE) else None
 
-        return urls
+
+def _parse_sitemap(url: str, timeout: float, chunk_size: int = 64 * 1024):
+    """Yields ("url", SitemapEntry) for page entries and ("sitemap", loc) for sitemap index entries."""
+    try:
+        with requests.get(url, timeout=timeout, stream=True) as response:
+            if response.status_code == 404:
+                return
+            response.raise_for_status()
+
+            parser = ET.XMLPullParser(events=("start", "end"))
+            decompressor = None
+            root = None
+            depth = 0         # 1 inside the root, 2 inside a <url>/<sitemap> entry
+            in_entry = False  # the open entry is a <url>/<sitemap> of the sitemap namespace
+            fields = {}
+
+            # iter_content undoes Content-Encoding: gzip; .xml.gz files are gzip payloads themselves
+            for i, data in enumerate(response.iter_content(chunk_size)):
+                if i == 0 and data[:2] == GZIP_MAGIC:
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                parser.feed(decompressor.decompress(data) if decompressor else data)
+
+                for event, elem in parser.read_events():
+                    if event == "start":
+                        if root is None:
+                            root = elem
+                        depth += 1
+                        if depth == 2:
+                            in_entry = _sitemap_name(elem.tag) in ENTRY_TAGS
+                        continue
+
+                    depth -= 1
+                    name = _sitemap_name(elem.tag)
+                    # Only direct children of an entry, so a nested <image:image><image:loc> never replaces the page loc
+                    if depth == 2 and in_entry and name in ENTRY_FIELDS:
+                        fields[name] = (elem.text or "").strip()
+                    elif depth == 1:
+                        loc = fields.get("loc")
+                        if loc and in_entry and name == "url":
+                            yield "url", SitemapEntry(loc, fields.get("lastmod") or None, _to_float(fields.get("priority")))
+                        elif loc and in_entry:
+                            yield "sitemap", loc
+                        fields = {}
+                        # Drop the parsed elements so the tree never grows
+                        root.clear()
+            parser.close()
 
     except requests.RequestException as e:
         raise ValueError(f"Failed to fetch sitemap: {str(e)}")
     except ET.ParseError as e:
         raise ValueError(f"Failed to parse sitemap XML: {str(e)}")
-    except Exception as e:
-        raise ValueError(f"Unexpected error processing sitemap: {str(e)}")
+    except zlib.error as e:
+        raise ValueError(f"Failed to decompress sitemap: {str(e)}")
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
 
 
 if __name__ == "__main__":
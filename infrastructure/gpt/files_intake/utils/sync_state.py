@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class WebsiteSyncState:
+    """Per-URL state of the last website sync, kept in a SQLite file.
+
+    For every (project, table, url) it stores the HTTP validators (`ETag`, `Last-Modified`),
+    the sitemap `<lastmod>` and the hash of the page's chunk texts, plus the time the URL was
+    last seen by a sync. The next sync uses them to skip unchanged pages (conditional requests,
+    unchanged lastmod or unchanged content) and to find pages that disappeared from the site.
+    """
+
+    COLUMNS = ("etag", "last_modified", "lastmod", "content_hash", "last_seen")
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                project_id TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                lastmod TEXT,
+                content_hash TEXT,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (project_id, table_name, url)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, project_id: str, table_name: str, url: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM pages WHERE project_id = ? AND table_name = ? AND url = ?",
+                (project_id or "", table_name, url),
+            ).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+    def upsert(self, project_id: str, table_name: str, url: str, seen_at: float, **values):
+        """Creates or updates the state of a URL; columns not given keep their previous value."""
+        current = self.get(project_id, table_name, url) or {}
+        row = {column: values.get(column, current.get(column)) for column in self.COLUMNS}
+        row["last_seen"] = seen_at
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO pages (project_id, table_name, url, {', '.join(self.COLUMNS)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(self.COLUMNS))})",
+                (project_id or "", table_name, url, *(row[column] for column in self.COLUMNS)),
+            )
+            self._conn.commit()
+
+    # Mark a URL as still present without changing anything else
+    def touch(self, project_id: str, table_name: str, url: str, seen_at: float):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET last_seen = ? WHERE project_id = ? AND table_name = ? AND url = ?",
+                (seen_at, project_id or "", table_name, url),
+            )
+            self._conn.commit()
+
+    # URLs synced before but not seen by the sync that started at `since`
+    def stale_urls(self, project_id: str, table_name: str, since: float) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM pages WHERE project_id = ? AND table_name = ? AND last_seen < ?",
+                (project_id or "", table_name, since),
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def delete(self, project_id: str, table_name: str, url: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM pages WHERE project_id = ? AND table_name = ? AND url = ?",
+                (project_id or "", table_name, url),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,18 +1,137 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
 from typing import Dict, List, Tuple
 from tiktoken import get_encoding
 from transformers.tokenization_utils_base import PreTrainedTokenizerBase
 
+# Token counts memoized per text span (HybridChunker re-counts the same spans while merging peers)
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "8192"))
+# Threads used by tiktoken for batch encoding
+TOKENIZER_BATCH_THREADS = int(os.getenv("TOKENIZER_BATCH_THREADS", "4"))
+
+
+class TokenSequence(Sequence):
+    """The tokens of a text, as returned by `OpenAITokenizerWrapper.tokenize`.
+
+    The length comes from the wrapper's memoized token count and the text is only encoded when
+    individual tokens are accessed, so callers that just count tokens (HybridChunker does
+    `len(tokenize(text))` over and over while merging peers) never build a list of `str` ids.
+    """
+
+    __slots__ = ("_text", "_wrapper", "_ids")
+
+    def __init__(self, text: str, wrapper: "OpenAITokenizerWrapper"):
+        self._text = text
+        self._wrapper = wrapper
+        self._ids = None
+
+    @property
+    def ids(self) -> List[int]:
+        if self._ids is None:
+            self._ids = self._wrapper.encode_ids(self._text)
+        return self._ids
+
+    def __len__(self) -> int:
+        if self._ids is not None:
+            return len(self._ids)
+        return self._wrapper.count_tokens(self._text)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [str(t) for t in self.ids[index]]
+        return str(self.ids[index])
+
+    def __iter__(self):
+        return (str(t) for t in self.ids)
+
+    def __eq__(self, other):
+        return list(self) == list(other) if isinstance(other, Sequence) else NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TokenSequence({list(self)!r})"
+
 
 class OpenAITokenizerWrapper(PreTrainedTokenizerBase):
     def __init__(self, model_name: str = "cl100k_base", max_length: int = 8191, **kwargs):
         super().__init__(model_max_length=max_length, **kwargs)
         self.tokenizer = get_encoding(model_name)
         self._vocab_size = self.tokenizer.n_vocab
+        self._vocab = None
+        self._counts = OrderedDict()   # text digest → token count, least recently used first
+        self._counts_lock = threading.Lock()
+        self.count_hits = 0
+        self.count_misses = 0
+
+    #------------------Fast Path---------------------------------------------------------------------
+
+    # Special-token markers in documents (e.g. "<|endoftext|>") are plain text, not control tokens
+    def encode_ids(self, text: str) -> List[int]:
+        return self.tokenizer.encode_ordinary(text)
+
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        return self.tokenizer.encode_ordinary_batch(texts, num_threads=TOKENIZER_BATCH_THREADS)
+
+    # The cache is keyed by a digest, so it never keeps whole documents alive
+    @staticmethod
+    def _count_key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def count_tokens(self, text: str) -> int:
+        """Token count of `text`, memoized (LRU, TOKEN_COUNT_CACHE_SIZE spans)."""
+        key = self._count_key(text)
+        with self._counts_lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+                self.count_hits += 1
+                return count
+        count = len(self.tokenizer.encode_ordinary(text))
+        self._remember(((key, count),))
+        return count
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """Counts many texts at once; only uncached ones are encoded, in one multi-threaded tiktoken call."""
+        keys = [self._count_key(text) for text in texts]
+        with self._counts_lock:
+            counts = [self._counts.get(key) for key in keys]
+        missing = {key: text for key, text, count in zip(keys, texts, counts) if count is None}
+        if missing:
+            computed = dict(zip(missing, (len(ids) for ids in self.encode_batch(list(missing.values())))))
+            self._remember(computed.items())
+            counts = [computed[key] if count is None else count for key, count in zip(keys, counts)]
+        with self._counts_lock:
+            self.count_hits += sum(key not in missing for key in keys)
+        return counts
+
+    def _remember(self, items):
+        with self._counts_lock:
+            for key, count in items:
+                self._counts[key] = count
+                self._counts.move_to_end(key)
+                self.count_misses += 1
+            while len(self._counts) > TOKEN_COUNT_CACHE_SIZE:
+                self._counts.popitem(last=False)
+
+    # Cut `text` to its first `max_tokens` tokens (decoded back to text)
+    def truncate(self, text: str, max_tokens: int) -> str:
+        ids = self.encode_ids(text)
+        if len(ids) <= max_tokens:
+            return text
+        return self.tokenizer.decode(ids[:max_tokens])
+
+    def count_cache_stats(self) -> dict:
+        with self._counts_lock:
+            return {"entries": len(self._counts), "hits": self.count_hits, "misses": self.count_misses}
+
+    #------------------Hugging Face Interface--------------------------------------------------------
 
-    def tokenize(self, text: str, **kwargs) -> List[str]:
-        return [str(t) for t in self.tokenizer.encode(text)]
+    def tokenize(self, text: str, **kwargs) -> TokenSequence:
+        return TokenSequence(text, self)
 
-    def _tokenize(self, text: str) -> List[str]:
+    def _tokenize(self, text: str) -> TokenSequence:
         return self.tokenize(text)
 
     def _convert_token_to_id(self, token: str) -> int:
@@ -22,7 +141,10 @@ class OpenAITokenizerWrapper(PreTrainedTokenizerBase):
         return str(index)
 
     def get_vocab(self) -> Dict[str, int]:
-        return {str(i): i for i in range(self._vocab_size)}
+        # Built once; callers must not modify it
+        if self._vocab is None:
+            self._vocab = {str(i): i for i in range(self._vocab_size)}
+        return self._vocab
 
     @property
     def vocab_size(self) -> int:
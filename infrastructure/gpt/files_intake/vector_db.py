@@ -1,37 +1,51 @@
+import asyncio
 import os
 import time
-import requests
-from bs4 import BeautifulSoup
-
+import multiprocessing
+import threading
 import traceback
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import chain, islice
 from pathlib import Path
 from typing import List
 from urllib.parse import urljoin, urlparse
 
-import lancedb
-
-from openai import OpenAI
-from docling.chunking import HybridChunker
-from docling.document_converter import DocumentConverter
-
-from lancedb.embeddings import get_registry
-from lancedb.pydantic import LanceModel, Vector
-
-from infrastructure.gpt.files_intake.utils.tokenizer import OpenAITokenizerWrapper
 from infrastructure.gpt.configs.assistant_env_config import API_KEY, API_URL
-from infrastructure.gpt.files_intake.utils.sitemap import get_sitemap_urls
+from infrastructure.gpt.configs.chunking_profiles import ChunkingProfile, get_chunking_profile
+from infrastructure.gpt.files_intake.context_packer import split_sentences
+from infrastructure.gpt.files_intake.utils.sitemap import iter_sitemap_entries
+from infrastructure.gpt.files_intake.utils.dedup import (
+    DEDUP_KEY_SQL, build_dedup_key, file_content_hash, sql_literal, text_content_hash
+)
+from infrastructure.gpt.files_intake.utils.lazy import lazy_singleton
+from infrastructure.gpt.files_intake.vector_index import ensure_vector_index
+from infrastructure.gpt.files_intake.retrieval import invalidate_search_results
+
+# Heavy dependencies (Docling, transformers, LanceDB, OpenAI) are imported inside the accessors
+# below, so importing this module (e.g. from the GUI) stays fast and only the features that are
+# actually used pay for their start-up cost.
 
 #------------------Initialization & Setup---------------------------------------------------
 
 # Initialize tokenizer for controlling token limits during chunking
-tokenizer = OpenAITokenizerWrapper()
+@lazy_singleton
+def get_tokenizer():
+    from infrastructure.gpt.files_intake.utils.tokenizer import OpenAITokenizerWrapper
+    return OpenAITokenizerWrapper()
+
 # Initialize OpenAI client
-client = OpenAI()
-# Retrieve the OpenAI embedding function class from LanceDB registry
-embedding_func_cls = get_registry().get("openai")
-# Initialize document converter (handles PDF, DOCX, spreadsheets, webpages, etc.)
-converter = DocumentConverter()
+@lazy_singleton
+def get_openai_client():
+    from openai import OpenAI
+    return OpenAI()
+
+# Shared document converters and chunkers (handle PDF, DOCX, spreadsheets, webpages, etc.);
+# Docling models are loaded once per pooled converter instead of once per file
+@lazy_singleton
+def get_converter_pool():
+    from infrastructure.gpt.files_intake.converter_pool import ConverterPool
+    return ConverterPool(size=int(os.getenv("CONVERTER_POOL_SIZE", "1")))
 
 
 # Select and initialize the embedding model
@@ -39,7 +53,12 @@ converter = DocumentConverter()
 #   - "text-embedding-3-small" → fast, lightweight, 1536 dimensions
 #   - "text-embedding-3-large" → better semantic performance, 3072 dimensions
 
-embedding_func = embedding_func_cls.create(name="text-embedding-3-large")
+@lazy_singleton
+def get_embedding_func():
+    from lancedb.embeddings import get_registry
+    # Retrieve the OpenAI embedding function class from LanceDB registry
+    embedding_func_cls = get_registry().get("openai")
+    return embedding_func_cls.create(name="text-embedding-3-large")
 
 
 #------------------Project Base Path and LanceDB Connection-----------------------------------
@@ -47,27 +66,109 @@ embedding_func = embedding_func_cls.create(name="text-embedding-3-large")
 # Set project root directory (go 2 levels up from this file)
 BASE_DIR = Path(__file__).resolve().parents[2]
 
-# Define the path for the LanceDB vector database
-DB_PATH = BASE_DIR / "lancedb"
+# Define the path for the LanceDB vector database (LANCEDB_PATH points it elsewhere, e.g. for benchmarks)
+DB_PATH = Path(os.getenv("LANCEDB_PATH", BASE_DIR / "lancedb"))
+
+# Embedding cache and website sync state
+CACHE_DIR = Path(os.getenv("VECTOR_CACHE_DIR", BASE_DIR / "cache"))
 
 # Connect or create LanceDB, this located the db in our project
-db = lancedb.connect(str(DB_PATH))
+@lazy_singleton
+def get_db():
+    import lancedb
+    return lancedb.connect(str(DB_PATH))
+
+#------------------Embedding Cache--------------------------------------------------------------------
+
+# On-disk cache of chunk embeddings, so re-crawled pages and re-uploaded files only pay for changed chunks
+EMBEDDING_CACHE_PATH = CACHE_DIR / "embeddings.sqlite"
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+@lazy_singleton
+def get_embedding_cache():
+    from infrastructure.gpt.files_intake.utils.embedding_cache import EmbeddingCache
+    return EmbeddingCache(EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+
+# Per-URL validators and content hashes of the last website sync (see process_sitemap_html)
+WEBSITE_SYNC_STATE_PATH = CACHE_DIR / "website_sync.sqlite"
+
+@lazy_singleton
+def get_website_sync_state():
+    from infrastructure.gpt.files_intake.utils.sync_state import WebsiteSyncState
+    return WebsiteSyncState(WEBSITE_SYNC_STATE_PATH)
+
+# Token-bounded, concurrent, rate-limit-aware embedding requests for cache misses
+@lazy_singleton
+def get_embedding_pipeline():
+    from infrastructure.gpt.files_intake.embedding_pipeline import EmbeddingPipeline
+    return EmbeddingPipeline(
+        client=get_openai_client(),
+        tokenizer=get_tokenizer(),
+        model=get_embedding_func().name,
+        max_workers=int(os.getenv("EMBEDDING_MAX_WORKERS", "4")),
+    )
 
-#------------------LanceDB Schema Definitions---------------------------------------------------------
+# Embed chunk texts, serving unchanged texts from the cache and sending only the misses to OpenAI
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    model_name = get_embedding_func().name
+    embedding_cache = get_embedding_cache()
+    vectors = embedding_cache.get_many(model_name, texts)
 
-# Define metadata structure for each document chunk
-class ChunkMetadata(LanceModel):
-    filename: str | None
-    project_id: str | None
-    file_type: str | None
-    description: str | None
-    upload_date: str | None
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        computed = get_embedding_pipeline().embed(missing_texts)
+        embedding_cache.put_many(model_name, missing_texts, computed)
+        for i, vector in zip(missing, computed):
+            vectors[i] = list(vector)
 
-# Define LanceDB vector record structure
-class ChunkRecord(LanceModel):
-    text: str = embedding_func.SourceField()
-    vector: Vector(embedding_func.ndims()) = embedding_func.VectorField()
-    metadata: ChunkMetadata
+    print(f"🧠 Embeddings: {len(texts) - len(missing)} from cache, {len(missing)} computed.")
+    return vectors
+
+#------------------LanceDB Schema Definitions---------------------------------------------------------
+
+# Build the LanceDB schema on first use (the vector size comes from the embedding function)
+@lazy_singleton
+def get_chunk_schema():
+    from lancedb.pydantic import LanceModel, Vector
+
+    embedding_func = get_embedding_func()
+
+    # Define metadata structure for each document chunk
+    class ChunkMetadata(LanceModel):
+        filename: str | None
+        project_id: str | None
+        file_type: str | None
+        description: str | None
+        upload_date: str | None
+
+    # Define LanceDB vector record structure
+    class ChunkRecord(LanceModel):
+        text: str = embedding_func.SourceField()
+        vector: Vector(embedding_func.ndims()) = embedding_func.VectorField()
+        metadata: ChunkMetadata
+        # Flat, indexed columns used for duplicate detection (see is_duplicate)
+        dedup_key: str | None = None
+        content_hash: str | None = None
+
+    return ChunkRecord
+
+# Module attributes kept for callers that used the former eagerly-built globals
+_LAZY_ATTRIBUTES = {
+    "tokenizer": get_tokenizer,
+    "client": get_openai_client,
+    "converter_pool": get_converter_pool,
+    "embedding_func": get_embedding_func,
+    "db": get_db,
+    "embedding_cache": get_embedding_cache,
+    "embedding_pipeline": get_embedding_pipeline,
+    "ChunkRecord": get_chunk_schema,
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 #------------------Metadata Construction---------------------------------------------------------
 
@@ -83,29 +184,72 @@ def build_file_metadata(file_name: str, project_id: str, file_type: str, descrip
 
 #------------------Store Chunks in LanceDB-------------------------------------------------------------------------
 
-# Save chunked content with vector embeddings to LanceDB
-def store_chunks_in_lancedb(chunks: List, meta_info: dict, table_name: str = "files"):
-    print("\n💾 Saving chunks to LanceDB...")
-
-    # Reuse existing table or create a new one
-    if table_name in db.table_names():
-        table = db.open_table(table_name)
-    else:
-        table = db.create_table(table_name, schema=ChunkRecord)
-
+# Table handles reused by the writers, so each append does not list and reopen the database
+_open_tables = {}
+_tables_lock = threading.Lock()
+
+# Reuse existing table or create a new one
+def open_or_create_table(table_name: str = "files"):
+    with _tables_lock:
+        table = _open_tables.get(table_name)
+        if table is None:
+            if table_name in get_db().table_names():
+                table = get_db().open_table(table_name)
+            else:
+                table = get_db().create_table(table_name, schema=get_chunk_schema())
+            _open_tables[table_name] = table
+        return table
+
+# Cached handle of an existing table with its scalar indexes in place; None while the table does not exist
+def open_existing_table(table_name: str = "files"):
+    with _tables_lock:
+        table = _open_tables.get(table_name)
+    if table is None:
+        if table_name not in get_db().table_names():
+            return None
+        table = open_or_create_table(table_name)
+    ensure_scalar_indexes(table)
+    return table
+
+# One write buffer per table (see TableWriter): batches appends across documents and compacts after large ingests
+_table_writers = {}
+
+def get_table_writer(table_name: str = "files"):
+    from infrastructure.gpt.files_intake.table_writer import TableWriter
+
+    with _tables_lock:
+        writer = _table_writers.get(table_name)
+        if writer is None:
+            writer = TableWriter(open_table=lambda: open_or_create_table(table_name), after_write=after_table_write)
+            _table_writers[table_name] = writer
+        return writer
+
+# Keep a table's indexes and the search cache up to date after rows were added or deleted
+def after_table_write(table):
+    ensure_scalar_indexes(table)
+    ensure_vector_index(table)
+    invalidate_search_results(table.name)
+
+# Convert chunks (Docling chunks or {"text": ...} dicts) into LanceDB records without vectors
+def build_chunk_records(chunks: List, meta_info: dict) -> List[dict]:
+    """
+    Every record stores the document name of `meta_info` (file name or URL) as `metadata.filename`,
+    so `dedup_key` is always what DEDUP_KEY_SQL computes from the record itself.
+    """
     records = []
+    document_name = meta_info.get("filename")
 
     # Convert each chunk into a LanceDB record
     for i, chunk in enumerate(chunks):
         try:
             if isinstance(chunk, dict) and "text" in chunk:
-                # Fallback para CSV/Excel
+                # Fallback para CSV/Excel (and chunks serialized by the parallel folder ingestion)
                 text = chunk["text"]
-                filename = meta_info.get("filename", "unknown")
+                filename = document_name or chunk.get("filename") or "unknown"
             elif hasattr(chunk, "text") and hasattr(chunk, "meta"):
                 # DOCX, PDF, etc.
                 text = chunk.text
-                filename = chunk.meta.origin.filename
+                filename = document_name or chunk.meta.origin.filename
             else:
                 print(f"⚠️ Chunk {i+1} is invalid or unsupported type. Skipping.")
                 continue
@@ -119,43 +263,145 @@ def store_chunks_in_lancedb(chunks: List, meta_info: dict, table_name: str = "fi
                     "description": meta_info.get("description"),
                     "upload_date": meta_info.get("upload_date")
                 },
+                "dedup_key": build_dedup_key(filename, meta_info.get("project_id")),
+                "content_hash": meta_info.get("content_hash"),
             }
             records.append(record)
 
         except Exception as e:
             print(f"⚠️ Error processing chunk {i+1}: {e}")
 
+    return records
+
+# Embed records and append them to a table in one call
+def write_records(records: List[dict], table_name: str = "files"):
+    # Vectors are precomputed, so LanceDB does not embed them again
+    vectors = embed_texts([record["text"] for record in records])
+    for record, vector in zip(records, vectors):
+        record["vector"] = vector
+    append_records(records, table_name)
+
+# Append already-embedded records through the table's write buffer
+def append_records(records: List[dict], table_name: str = "files", on_written=None):
+    """
+    Written immediately, unless called inside `get_table_writer(table_name).batch()`, in which
+    case records of many documents are coalesced into a few large appends.
+    """
+    get_table_writer(table_name).add(records, on_written)
+
+# Save chunked content with vector embeddings to LanceDB
+def store_chunks_in_lancedb(chunks: List, meta_info: dict, table_name: str = "files"):
+    print("\n💾 Saving chunks to LanceDB...")
+
+    records = build_chunk_records(chunks, meta_info)
+
     # Store all valid records
     if records:
-        table.add(records)
+        write_records(records, table_name)
         print(f"✅ {len(records)} chunks saved with embeddings.")
     else:
         print("⚠️ No valid records to save.")
 
 #------------------Duplicate Check-----------------------------------------------------------------------------------
 
-# Check if a file with the same filename and project ID already exists in the database
-def is_duplicate(meta_info: dict, table_name: str = "files") -> bool:
-    if table_name not in db.table_names():
+# Scalar indexes kept on every chunk table: dedup columns and the metadata used by filtered retrieval
+SCALAR_INDEXES = {
+    "dedup_key": "BTREE",
+    "content_hash": "BTREE",
+    "metadata.project_id": "BTREE",
+    "metadata.filename": "BTREE",
+    "metadata.file_type": "BITMAP",
+}
+# Column behind the full-text (BM25) index used by keyword and hybrid retrieval
+TEXT_INDEX_COLUMN = "text"
+# Also skip uploads whose content is already stored in the project under another file name ("1" to enable)
+DEDUP_MATCH_CONTENT = os.getenv("DEDUP_MATCH_CONTENT", "0") == "1"
+
+# Tables for which the dedup columns and scalar indexes are known to exist in this process
+_indexed_tables = set()
+
+# Make sure a table has the flat dedup columns and the scalar indexes in SCALAR_INDEXES
+def ensure_scalar_indexes(table):
+    """
+    Backfill `dedup_key`/`content_hash` on tables created before those columns existed and
+    build the scalar indexes, so duplicate checks and project-filtered searches never scan the table.
+    Also builds the full-text index used by hybrid retrieval.
+    """
+    if table.name in _indexed_tables:
+        return
+
+    columns = table.schema.names
+    if "dedup_key" not in columns:
+        table.add_columns({"dedup_key": DEDUP_KEY_SQL})
+    if "content_hash" not in columns:
+        table.add_columns({"content_hash": "CAST(NULL AS STRING)"})
+
+    if table.count_rows() == 0:
+        # Scalar indexes cannot be trained on an empty table; retry after the first append
+        return
+
+    indexed_columns = {column for index in table.list_indices() for column in index.columns}
+    for column, index_type in SCALAR_INDEXES.items():
+        if column not in indexed_columns:
+            table.create_scalar_index(column, index_type=index_type)
+    if TEXT_INDEX_COLUMN not in indexed_columns:
+        create_text_index(table)
+
+    _indexed_tables.add(table.name)
+
+
+# Full-text index on the chunk text; rows appended later are searched unindexed until `optimize` folds them in
+def create_text_index(table, column: str = TEXT_INDEX_COLUMN):
+    import warnings
+
+    print(f"🔤 Building full-text index on `{table.name}.{column}`...")
+    with warnings.catch_warnings():
+        # create_fts_index is deprecated in favour of create_index(config=FTS()), which only indexes vector columns in this version
+        warnings.simplefilter("ignore")
+        table.create_fts_index(column, replace=True)
+
+# Check if a file with the same filename and project ID (or, optionally, the same content) already exists
+def is_duplicate(meta_info: dict, table_name: str = "files", match_content: bool = DEDUP_MATCH_CONTENT) -> bool:
+    """
+    Filtered count on the indexed `dedup_key` column; vectors are never read.
+    With `match_content`, identical content (`meta_info["content_hash"]`) uploaded under
+    another name within the same project is reported as a duplicate as well.
+    """
+    project_id = meta_info.get("project_id")
+    key = build_dedup_key(meta_info.get("filename"), project_id)
+    content_hash = meta_info.get("content_hash") if match_content else None
+
+    # Documents still in the write buffer are not visible in the table yet
+    if table_name in _table_writers and _table_writers[table_name].is_pending(key, content_hash, project_id):
+        return True
+
+    table = open_existing_table(table_name)
+    if table is None:
         return False
 
-    table = db.open_table(table_name)
-    filename = meta_info.get("filename", "").lower().strip()
-    project_id = meta_info.get("project_id", "")
+    condition = f"dedup_key = {sql_literal(key)}"
+    if content_hash:
+        condition += (
+            f" OR (content_hash = {sql_literal(content_hash)}"
+            f" AND coalesce(metadata.project_id, '') = {sql_literal(project_id or '')})"
+        )
 
-    results = table.to_pandas()
-    for _, row in results.iterrows():
-        md = row.get("metadata", {})
-        if not md:
-            continue
+    return table.count_rows(condition) > 0
 
-        if (
-                md.get("filename", "").lower().strip() == filename and
-                md.get("project_id", "") == project_id
-        ):
-            return True
+# Check if the same content is already stored in the project under another filename or URL
+def is_duplicate_content(meta_info: dict, table_name: str = "files") -> bool:
+    content_hash = meta_info.get("content_hash")
+    table = open_existing_table(table_name) if content_hash else None
+    if table is None:
+        return False
 
-    return False
+    project_id = meta_info.get("project_id")
+    key = build_dedup_key(meta_info.get("filename"), project_id)
+    return table.count_rows(
+        f"content_hash = {sql_literal(content_hash)}"
+        f" AND coalesce(metadata.project_id, '') = {sql_literal(project_id or '')}"
+        f" AND dedup_key != {sql_literal(key)}"
+    ) > 0
 
 #------------------File Processing Functions (PDF, DOCX)----------------------------------------------------------
 
@@ -168,10 +414,7 @@ def process_single_pdf(pdf_path: str, project_id: str, file_type: str, descripti
         print(f"❌ File not found: {pdf_path}")
         return
 
-    converter = DocumentConverter()
-    chunker = HybridChunker(tokenizer=tokenizer, max_tokens=8191, merge_peers=True)
-
-    result = converter.convert(pdf_path)
+    result = get_converter_pool().convert(pdf_path)
     if not result or not result.document:
         print("❌ Failed to convert PDF document.")
         return
@@ -182,11 +425,12 @@ def process_single_pdf(pdf_path: str, project_id: str, file_type: str, descripti
         file_type=file_type,
         description=description
     )
+    meta_info["content_hash"] = file_content_hash(pdf_path)
 
     if is_duplicate(meta_info, table_name):
         print("⚠️ File already indexed. Skipping.")
     else:
-        chunks = list(chunker.chunk(dl_doc=result.document))
+        chunks = chunk_document(result.document, get_chunking_profile(file_type, table_name))
         print(f"✅ {len(chunks)} chunks created.")
         store_chunks_in_lancedb(chunks, meta_info, table_name)
 
@@ -199,16 +443,13 @@ def process_single_docx(docx_path: str, project_id: str, file_type: str, descrip
         print(f"❌ File not found: {docx_path}")
         return
 
-    converter = DocumentConverter()
-    chunker = HybridChunker(tokenizer=tokenizer, max_tokens=8191, merge_peers=True)
-
-    result = converter.convert(docx_path)
+    result = get_converter_pool().convert(docx_path)
     if not result or not result.document:
         print("❌ Failed to convert DOCX document.")
         return
 
     document = result.document
-    chunks = list(chunker.chunk(dl_doc=document))
+    chunks = chunk_document(document, get_chunking_profile(file_type, table_name))
 
     meta_info = build_file_metadata(
         file_name=os.path.basename(docx_path),
@@ -216,6 +457,7 @@ def process_single_docx(docx_path: str, project_id: str, file_type: str, descrip
         file_type=file_type,
         description=description
     )
+    meta_info["content_hash"] = file_content_hash(docx_path)
 
     if is_duplicate(meta_info, table_name):
         print("⚠️ File already indexed. Skipping.")
@@ -225,10 +467,14 @@ def process_single_docx(docx_path: str, project_id: str, file_type: str, descrip
 
 #------------Spreadsheet Processing (CSV, XLSX)-------------------------------------------------------------------
 
-# Create text chunks from each row of a markdown table (used for spreadsheets)
-def chunk_table_by_rows(document, max_chunks: int = 100) -> List[dict]:
+# Matched case-insensitively, in sequential and parallel ingestion alike
+SPREADSHEET_EXTENSIONS = {".csv", ".xlsx"}
+
+# Create text chunks from the rows of a markdown table (used for spreadsheets)
+def chunk_table_by_rows(document, max_chunks: int = 100, rows_per_chunk: int = 1) -> List[dict]:
     """
-    Fallback chunking for table-like documents: return one chunk per row as plain text.
+    Fallback chunking for table-like documents: return one chunk per `rows_per_chunk` rows as
+    plain text, each with the header row.
     """
     table_md = document.export_to_markdown()
     lines = table_md.strip().splitlines()
@@ -237,13 +483,52 @@ def chunk_table_by_rows(document, max_chunks: int = 100) -> List[dict]:
     content_lines = [line for line in lines if line.strip().startswith("|") and "---" not in line]
     header = content_lines[0] if content_lines else ""
 
+    rows = content_lines[1:max_chunks]
     chunks = []
-    for i, line in enumerate(content_lines[1:max_chunks]):
-        chunk_text = f"{header}\n{line}"
+    for i in range(0, len(rows), max(1, rows_per_chunk)):
+        chunk_text = "\n".join([header] + rows[i:i + rows_per_chunk])
         chunks.append({"text": chunk_text})
 
     return chunks
 
+#------------Chunking Profiles------------------------------------------------------------------------------------
+
+# Chunk a converted document as set by its chunking profile (configs/chunking_profiles.py)
+def chunk_document(document, profile: ChunkingProfile) -> List[dict]:
+    """
+    Returns picklable {"text", "filename"} chunks. With `overlap_tokens`, every chunk starts with
+    the last sentences of the previous one, so a finding split across two chunks is still found
+    together with its context.
+    """
+    if profile.strategy == "table_rows":
+        return chunk_table_by_rows(document, rows_per_chunk=profile.rows_per_chunk)
+
+    chunker = get_converter_pool().get_chunker(get_tokenizer(), max_tokens=profile.max_tokens,
+                                               merge_peers=profile.merge_peers)
+    chunks = [
+        {"text": chunk.text, "filename": chunk.meta.origin.filename}
+        for chunk in chunker.chunk(dl_doc=document)
+    ]
+    if profile.overlap_tokens:
+        texts = add_chunk_overlap([chunk["text"] for chunk in chunks], profile.overlap_tokens,
+                                  get_tokenizer().count_tokens)
+        for chunk, text in zip(chunks, texts):
+            chunk["text"] = text
+    return chunks
+
+# Prefix every text with the trailing sentences (up to `overlap_tokens`) of the text before it
+def add_chunk_overlap(texts: List[str], overlap_tokens: int, count_tokens) -> List[str]:
+    overlapped = texts[:1]
+    for previous, text in zip(texts, texts[1:]):
+        tail, used = [], 0
+        for sentence in reversed(split_sentences(previous)):
+            used += count_tokens(sentence)
+            if used > overlap_tokens:
+                break
+            tail.insert(0, sentence)
+        overlapped.append(f"{' '.join(tail)}\n{text}" if tail else text)
+    return overlapped
+
 # Convert and store a spreadsheet file (CSV or XLSX) into chunks
 def process_single_spreadsheet(file_path: str, project_id: str, file_type: str, description: str, table_name: str = "files"):
     """
@@ -253,14 +538,11 @@ def process_single_spreadsheet(file_path: str, project_id: str, file_type: str,
         print(f"❌ File not found: {file_path}")
         return
 
-    if not (file_path.endswith(".csv") or file_path.endswith(".xlsx")):
+    if Path(file_path).suffix.lower() not in SPREADSHEET_EXTENSIONS:
         print("⚠️ Only .csv and .xlsx files are supported for spreadsheet processing.")
         return
 
-    converter = DocumentConverter()
-    chunker = HybridChunker(tokenizer=tokenizer, max_tokens=8191, merge_peers=True)
-
-    result = converter.convert(file_path)
+    result = get_converter_pool().convert(file_path)
     if not result or not result.document:
         print("❌ Failed to convert spreadsheet.")
         return
@@ -273,7 +555,7 @@ def process_single_spreadsheet(file_path: str, project_id: str, file_type: str,
         return
 
     try:
-        chunks = chunk_table_by_rows(document)
+        chunks = chunk_document(document, get_chunking_profile(file_type, table_name))
     except Exception as e:
         print(f"❌ Error during chunking: {e}")
         print("🔎 Content preview:")
@@ -286,6 +568,7 @@ def process_single_spreadsheet(file_path: str, project_id: str, file_type: str,
         file_type=file_type,
         description=description
     )
+    meta_info["content_hash"] = file_content_hash(file_path)
 
     if is_duplicate(meta_info, table_name):
         print("⚠️ File already indexed. Skipping.")
@@ -295,28 +578,61 @@ def process_single_spreadsheet(file_path: str, project_id: str, file_type: str,
 
 #----------------------------------Folder Batch Processing--------------------------------------------------------
 
+# File extensions accepted by folder ingestion and the file type stored in metadata
+SUPPORTED_FILE_EXTENSIONS = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".xlsx": "excel",
+    ".csv": "csv"
+}
+
 # Process all supported files in a given folder (PDF, DOCX, XLSX, CSV)
 def process_all_supported_files_in_folder(
         folder_path: str,
         project_id: str,
         description: str,
-        table_name: str = "files"
+        table_name: str = "files",
+        parallel: bool = False,
+        max_workers: int = None,
+        batch_size: int = 512
 ):
+    """
+    Process every supported file in a folder. With `parallel=True`, conversion and chunking run
+    in a process pool (`max_workers`, default: CPU count) while this process embeds the results
+    in file order, `batch_size` records at a time. In both modes the chunks of many files are
+    coalesced into a few large LanceDB appends (see TableWriter). Returns a per-file report in
+    parallel mode.
+    """
 
     print("\n📁 Starting general processing of supported files in folder...\n")
 
-    supported_extensions = {
-        ".pdf": "pdf",
-        ".docx": "docx",
-        ".xlsx": "excel",
-        ".csv": "csv"
-    }
+    if parallel:
+        files = []
+        for filename in os.listdir(folder_path):
+            file_type = SUPPORTED_FILE_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+            if not file_type:
+                print(f"⚠️ Unsupported file type: {filename}")
+                continue
+            files.append((filename, os.path.join(folder_path, filename), file_type))
 
+        report = process_files_in_parallel(files, project_id, description, table_name, max_workers, batch_size)
+        print("\n✅ Folder processing complete.\n")
+        return report
+
+    # Load the Docling models once for the whole folder
+    get_converter_pool().warm_up()
+
+    # Coalesce the chunks of all files into a few large appends
+    with get_table_writer(table_name).batch():
+        process_folder_files(folder_path, project_id, description, table_name)
+    print("\n✅ Folder processing complete.\n")
+
+def process_folder_files(folder_path: str, project_id: str, description: str, table_name: str = "files"):
     for filename in os.listdir(folder_path):
         file_path = os.path.join(folder_path, filename)
         ext = os.path.splitext(filename)[1].lower()
 
-        file_type = supported_extensions.get(ext)
+        file_type = SUPPORTED_FILE_EXTENSIONS.get(ext)
         if not file_type:
             print(f"⚠️ Unsupported file type: {filename}")
             continue
@@ -347,7 +663,101 @@ def process_all_supported_files_in_folder(
                 description=description,
                 table_name=table_name
             )
-    print("\n✅ Folder processing complete.\n")
+
+#----------------------------------Parallel Folder Processing-----------------------------------------------------
+
+# Load the Docling models once when a worker process starts
+def _init_ingestion_worker():
+    get_converter_pool().warm_up()
+
+# Worker: convert and chunk one file, returning picklable chunks
+def convert_and_chunk_file(file_path: str, file_type: str, table_name: str = "files") -> dict:
+    """
+    Applies the same conversion and chunking rules as process_single_pdf/docx/spreadsheet,
+    but returns plain {"text", "filename"} dicts so the result can cross the process boundary.
+    """
+    try:
+        result = get_converter_pool().convert(file_path)
+        if not result or not result.document:
+            return {"error": "Failed to convert document."}
+
+        document = result.document
+        if file_type in {"excel", "csv"}:
+            if Path(file_path).suffix.lower() not in SPREADSHEET_EXTENSIONS:
+                return {"error": "Only .csv and .xlsx files are supported for spreadsheet processing."}
+            exported = document.export_to_markdown()
+            if not isinstance(exported, str) or not exported.strip():
+                return {"error": "Converted content is empty or invalid for tokenization."}
+        chunks = chunk_document(document, get_chunking_profile(file_type, table_name))
+
+        return {"chunks": chunks, "content_hash": file_content_hash(file_path)}
+    except Exception as e:
+        return {"error": str(e)}
+
+# Convert files in a process pool and write them from this process in batched appends
+def process_files_in_parallel(files: List[tuple], project_id: str, description: str, table_name: str = "files",
+                              max_workers: int = None, batch_size: int = 512) -> List[dict]:
+    """
+    `files` holds (filename, path, file_type) tuples. Results are consumed in submission order
+    and duplicates are checked against both the table and the not-yet-flushed batch, so the
+    stored records are the same as with sequential processing.
+    """
+    report = []
+    pending_records = []
+    pending_keys = set()
+    total = len(files)
+
+    # Embed a batch; the table writer coalesces the batches into large appends
+    def flush():
+        if pending_records:
+            write_records(pending_records, table_name)
+            pending_records.clear()
+            pending_keys.clear()
+
+    context = multiprocessing.get_context("spawn")
+    with get_table_writer(table_name).batch(), \
+            ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=_init_ingestion_worker) as pool:
+        futures = [pool.submit(convert_and_chunk_file, path, file_type, table_name) for _, path, file_type in files]
+
+        for done, ((filename, path, file_type), future) in enumerate(zip(files, futures), start=1):
+            progress = f"[{done}/{total}]"
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = {"error": f"Worker failed: {e}"}
+
+            if "error" in outcome:
+                print(f"❌ {progress} {filename}: {outcome['error']}")
+                report.append({"filename": filename, "status": "failed", "chunks": 0, "error": outcome["error"]})
+                continue
+
+            meta_info = build_file_metadata(
+                file_name=filename,
+                project_id=project_id,
+                file_type=file_type,
+                description=description
+            )
+            meta_info["content_hash"] = outcome["content_hash"]
+
+            keys = {build_dedup_key(filename, project_id)}
+            if DEDUP_MATCH_CONTENT:
+                keys.add((project_id or "", outcome["content_hash"]))
+            if keys & pending_keys or is_duplicate(meta_info, table_name):
+                print(f"⚠️ {progress} {filename}: already indexed. Skipping.")
+                report.append({"filename": filename, "status": "duplicate", "chunks": 0, "error": None})
+                continue
+
+            records = build_chunk_records(outcome["chunks"], meta_info)
+            pending_records.extend(records)
+            pending_keys.update(keys)
+            print(f"✅ {progress} {filename}: {len(records)} chunks.")
+            report.append({"filename": filename, "status": "stored", "chunks": len(records), "error": None})
+
+            if len(pending_records) >= batch_size:
+                flush()
+
+        flush()
+    return report
 
 #----------------------Website Processing (Web Pages & Sitemaps)--------------------------------------------------
 
@@ -358,21 +768,19 @@ def process_single_webpage(url: str, project_id: str, description: str, table_na
     """
     try:
         print(f"\n🌐 Processing single webpage: {url}")
-        converter = DocumentConverter()
-        chunker = HybridChunker(tokenizer=tokenizer, max_tokens=8191, merge_peers=True)
-
-        result = converter.convert(url)
+        result = get_converter_pool().convert(url)
         if not result or not result.document:
             print("❌ Could not convert the web page content.")
             return
 
-        chunks = list(chunker.chunk(dl_doc=result.document))
+        chunks = chunk_document(result.document, get_chunking_profile("webpage", table_name))
         meta_info = build_file_metadata(
             file_name=url,
             project_id=project_id,
             file_type="webpage",
             description=description
         )
+        meta_info["content_hash"] = text_content_hash(chunk["text"] for chunk in chunks)
 
         if is_duplicate(meta_info, table_name):
             print("⚠️ Page already indexed. Skipping.")
@@ -383,96 +791,170 @@ def process_single_webpage(url: str, project_id: str, description: str, table_na
     except Exception as e:
         print(f"❌ Error processing single web page: {e}")
 
-# Extract and process multiple pages from a sitemap
+# Extract and process multiple pages from a sitemap, re-embedding only the pages that changed
 def process_sitemap_html(base_url: str, project_id: str, description: str, table_name: str = "files"):
+    """
+    The sitemap is streamed (sitemap indexes and .xml.gz included) straight into the fetch →
+    convert → chunk → embed → write pipeline (see WebsiteIngestion), so conversion starts
+    before the sitemap is fully read. Pages whose sitemap `<lastmod>` did not change are not
+    requested at all, the others are fetched with conditional requests (ETag / Last-Modified),
+    and pages that are no longer listed in the sitemap have their chunks deleted.
+    """
+    from infrastructure.gpt.files_intake.utils.crawler import fetch_pages
+    from infrastructure.gpt.files_intake.website_pipeline import WebsiteIngestion
+
     print(f"\n🗺️ Processing sitemap: {base_url}")
     try:
-        sitemap_urls = get_sitemap_urls(base_url)
-        if not sitemap_urls or len(sitemap_urls) == 1:
+        sitemap_entries = iter_sitemap_entries(urljoin(base_url, "sitemap.xml"))
+        first_entries = list(islice(sitemap_entries, 2))
+        if len(first_entries) < 2:
             raise ValueError("Sitemap appears empty or insufficient.")
 
-        converter = DocumentConverter()
-        chunker = HybridChunker(tokenizer=tokenizer, max_tokens=8191, merge_peers=True)
-
-        conv_results_iter = converter.convert_all(sitemap_urls)
-        total_chunks = 0
-
-        for i, result in enumerate(conv_results_iter):
-            if not result or not result.document:
-                print(f"❌ Conversion failed for: {sitemap_urls[i]}")
-                continue
-
-            document = result.document
-            chunks = list(chunker.chunk(dl_doc=document))
-
-            meta_info = build_file_metadata(
-                file_name="file",
-                project_id=project_id,
-                file_type="webpage",
-                description=description
-            )
-
-            print(f"✅ {len(chunks)} chunks from: {sitemap_urls[i]}")
-            store_chunks_in_lancedb(chunks, meta_info, table_name)
-            total_chunks += len(chunks)
-
-        if total_chunks == 0:
-            raise ValueError("No chunks created from sitemap pages.")
-
-        print(f"\n🌐 Sitemap processed successfully. Total chunks: {total_chunks}")
+        ingestion = WebsiteIngestion(project_id, description, table_name)
+        state_store = ingestion.state_store
+        validators, lastmods = {}, {}
+        total_entries = 0
+
+        # Yields the URLs worth requesting; pages with an unchanged <lastmod> are skipped here
+        def urls_to_fetch():
+            nonlocal total_entries
+            for entry in chain(first_entries, sitemap_entries):
+                total_entries += 1
+                state = state_store.get(project_id, table_name, entry.loc)
+                if state and entry.lastmod and state["lastmod"] == entry.lastmod:
+                    state_store.touch(project_id, table_name, entry.loc, ingestion.seen_at)
+                    ingestion.count("unchanged")
+                    continue
+                validators[entry.loc] = conditional_request_headers(state)
+                lastmods[entry.loc] = entry.lastmod
+                yield entry.loc
+
+        def fetch_source(emit):
+            def on_page(page):
+                if page.status == 304:
+                    state_store.upsert(project_id, table_name, page.url, ingestion.seen_at, lastmod=lastmods[page.url])
+                    ingestion.count("unchanged")
+                elif page.status == 200:
+                    emit({"url": page.url, "html": page.html, "headers": page.headers, "lastmod": lastmods[page.url]})
+                else:
+                    print(f"❌ Could not fetch {page.url} (status {page.status or 'error'})")
+                    ingestion.count("failed")
+                    # Transient failures must not make the page look removed
+                    if page.status == 0 or page.status >= 500:
+                        state_store.touch(project_id, table_name, page.url, ingestion.seen_at)
+
+            fetch_pages(urls_to_fetch(), validators, on_page=on_page)
+
+        ingestion.run(fetch_source)
+        report = ingestion.report
+
+        # Reached only once the whole sitemap was read, so a partial read never deletes pages
+        report["removed"] = remove_vanished_pages(project_id, table_name, since=ingestion.seen_at)
+        if report["removed"] and ingestion.duplicates:
+            resync_duplicates(ingestion.duplicates, report, project_id, description, table_name, ingestion.seen_at)
+
+        if report["failed"] == total_entries:
+            raise ValueError("No sitemap page could be processed.")
+
+        print(f"\n🌐 Sitemap processed successfully ({total_entries} pages). {format_sync_report(report)}")
 
     except Exception as e:
         raise RuntimeError(f"Failed to process sitemap: {e}")
 
 # Crawl a website to collect internal links up to a limit
 def extract_internal_links(base_url, max_links=20):
-    visited = set()
-    to_visit = [base_url]
-    all_links = []
+    from infrastructure.gpt.files_intake.utils.crawler import crawl_site
+    return [page.url for page in crawl_site(base_url, max_links=max_links)]
 
-    while to_visit and len(all_links) < max_links:
-        url = to_visit.pop(0)
-        if url in visited:
-            continue
-        visited.add(url)
+# Process all internal pages from a website via crawling, re-embedding only the pages that changed
+def crawl_and_process_site(start_url: str, project_id: str, description: str, table_name: str = "files", max_links: int = 20):
+    from infrastructure.gpt.files_intake.utils.crawler import AsyncCrawler
+    from infrastructure.gpt.files_intake.website_pipeline import WebsiteIngestion
 
-        try:
-            response = requests.get(url, timeout=10)
-            if "text/html" not in response.headers.get("Content-Type", ""):
-                continue
-            soup = BeautifulSoup(response.text, "html.parser")
-            all_links.append(url)
-
-            for link_tag in soup.find_all("a", href=True):
-                href = link_tag["href"]
-                full_url = urljoin(url, href)
-                if urlparse(full_url).netloc == urlparse(base_url).netloc:
-                    if full_url not in visited and full_url not in to_visit:
-                        to_visit.append(full_url)
-        except Exception as e:
-            print(f"⚠️ Skipped {url} due to error: {e}")
+    print(f"\n🌐 Crawling and processing site: {start_url}")
+    ingestion = WebsiteIngestion(project_id, description, table_name)
+    crawler = AsyncCrawler(max_links=max_links)
+    crawled = []
+
+    # Pages enter the pipeline as soon as the crawler fetches them, with the HTML it already holds
+    def crawl_source(emit):
+        crawled.extend(asyncio.run(crawler.crawl(
+            start_url,
+            on_page=lambda page: emit({"url": page.url, "html": page.html, "headers": page.headers}),
+        )))
+
+    ingestion.run(crawl_source)
+    report = ingestion.report
+    print(f"🔗 Crawled {len(crawled)} internal pages.")
+
+    # Pages that could not be fetched still exist as far as we know
+    state_store = get_website_sync_state()
+    for url in crawler.failed + crawler.disallowed:
+        state_store.touch(project_id, table_name, url, ingestion.seen_at)
+
+    # Only a clean crawl has seen the whole site; otherwise missing pages may just be unreachable this time
+    if not crawler.complete:
+        print("⚠️ Crawl incomplete (fetch failures or max_links/max_depth reached); no pages removed.")
+    else:
+        report["removed"] = remove_vanished_pages(project_id, table_name, since=ingestion.seen_at)
+        if report["removed"] and ingestion.duplicates:
+            resync_duplicates(ingestion.duplicates, report, project_id, description, table_name, ingestion.seen_at)
 
-    return all_links
+    print(f"\n🎯 Done! {format_sync_report(report)}")
 
-# Process all internal pages from a website via crawling
-def crawl_and_process_site(start_url: str, project_id: str, description: str, table_name: str = "files", max_links: int = 20):
-    print(f"\n🌐 Crawling and processing site: {start_url}")
-    links = extract_internal_links(start_url, max_links=max_links)
-    print(f"🔗 Found {len(links)} internal pages to process.")
+#----------------------Incremental Website Sync---------------------------------------------------------------------
+
+SYNC_STATUSES = ("added", "updated", "unchanged", "duplicate", "failed", "removed")
+
+# Conditional request headers built from the validators stored by the previous sync
+def conditional_request_headers(state: dict | None) -> dict:
+    headers = {}
+    if state and state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state and state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+    return headers
+
+# Remove every chunk stored for one document (file name or URL) of a project
+def delete_document_chunks(filename: str, project_id: str, table_name: str = "files") -> int:
+    if table_name not in get_db().table_names():
+        return 0
 
-    converter = DocumentConverter()
-    chunker = HybridChunker(tokenizer=tokenizer, max_tokens=8191, merge_peers=True)
+    ensure_scalar_indexes(open_or_create_table(table_name))
+    return get_table_writer(table_name).delete(f"dedup_key = {sql_literal(build_dedup_key(filename, project_id))}")
 
-    results = converter.convert_all(links)
-    total_chunks = 0
+# Convert a fetched page and replace its stored chunks only if its content changed since the last sync
+def sync_webpage_html(url: str, html: str, headers: dict, project_id: str, description: str,
+                      table_name: str = "files", lastmod: str = None, seen_at: float = None) -> str:
+    """
+    Returns "added", "updated", "unchanged", "duplicate" (same content already stored under
+    another URL of the project) or "failed". Unchanged pages are converted and chunked but
+    never re-embedded or re-written.
+    """
+    from infrastructure.gpt.files_intake.converter_pool import html_document_stream
+
+    state_store = get_website_sync_state()
+    seen_at = seen_at or time.time()
+    validators = {
+        "etag": headers.get("etag"),
+        "last_modified": headers.get("last-modified"),
+        "lastmod": lastmod,
+    }
 
-    for result, url in zip(results, links):
+    try:
+        result = get_converter_pool().convert(html_document_stream(url, html), raises_on_error=False)
         if not result or not result.document:
             print(f"❌ Failed to process {url}")
-            continue
+            state_store.touch(project_id, table_name, url, seen_at)
+            return "failed"
+
+        chunks = chunk_document(result.document, get_chunking_profile("webpage", table_name))
+        content_hash = text_content_hash(chunk["text"] for chunk in chunks)
 
-        chunks = list(chunker.chunk(dl_doc=result.document))
-        print(f"✅ {len(chunks)} chunks from: {url}")
+        previous = state_store.get(project_id, table_name, url)
+        if previous and previous["content_hash"] == content_hash:
+            state_store.upsert(project_id, table_name, url, seen_at, **validators)
+            return "unchanged"
 
         meta = build_file_metadata(
             file_name=url,
@@ -480,22 +962,56 @@ def crawl_and_process_site(start_url: str, project_id: str, description: str, ta
             file_type="webpage",
             description=description
         )
+        meta["content_hash"] = content_hash
 
-        if is_duplicate(meta, table_name):
-            print(f"⚠️ Skipped duplicate: {url}")
-            continue
+        # Replace, never append: drop the chunks of the previous version of this URL first
+        replaced = delete_document_chunks(url, project_id, table_name)
+        if is_duplicate(meta, table_name, match_content=True):
+            # No content hash is recorded, so the page is stored once the other copy disappears
+            state_store.upsert(project_id, table_name, url, seen_at, content_hash=None, **validators)
+            return "duplicate"
 
         store_chunks_in_lancedb(chunks, meta, table_name)
-        total_chunks += len(chunks)
+        state_store.upsert(project_id, table_name, url, seen_at, content_hash=content_hash, **validators)
+        return "updated" if replaced else "added"
 
-    print(f"\n🎯 Done! Total chunks stored: {total_chunks}")
+    except Exception as e:
+        print(f"❌ Error processing {url}: {e}")
+        # The page still exists, so a failure must not make it look removed
+        state_store.touch(project_id, table_name, url, seen_at)
+        return "failed"
+
+# Delete the chunks of pages that a complete sync (started at `since`) no longer found
+def remove_vanished_pages(project_id: str, table_name: str, since: float) -> int:
+    state_store = get_website_sync_state()
+    urls = state_store.stale_urls(project_id, table_name, since)
+    for url in urls:
+        delete_document_chunks(url, project_id, table_name)
+        state_store.delete(project_id, table_name, url)
+        print(f"🗑️ Removed page no longer on the site: {url}")
+    return len(urls)
+
+# After removals, pages skipped as duplicates may now hold the only copy of their content
+def resync_duplicates(duplicates: List[dict], report: dict, project_id: str, description: str,
+                      table_name: str, seen_at: float):
+    for page in duplicates:
+        status = sync_webpage_html(project_id=project_id, description=description, table_name=table_name,
+                                   seen_at=seen_at, **page)
+        report["duplicate"] -= 1
+        report[status] += 1
+
+def format_sync_report(report: dict) -> str:
+    return ", ".join(f"{count} {status}" for status, count in report.items())
 
 # Automatically choose the best method (sitemap or crawler) to process an entire website
 def process_entire_website(url: str, project_id: str, description: str, table_name: str = "files", max_links: int = 20):
     print(f"\n🔍 Analyzing best method for: {url}")
 
     try:
-        sitemap_urls = get_sitemap_urls(url)
+        # Only the first entries are read here; process_sitemap_html streams the whole sitemap
+        sitemap_entries = iter_sitemap_entries(urljoin(url, "sitemap.xml"))
+        sitemap_urls = [entry.loc for entry in islice(sitemap_entries, 20)]
+        sitemap_entries.close()
         if sitemap_urls and all(urlparse(link).scheme in ["http", "https"] for link in sitemap_urls):
             print("📡 Sitemap found. Using sitemap-based extraction...")
             process_sitemap_html(
@@ -0,0 +1,102 @@
+import math
+import os
+from typing import Optional
+
+# Build an ANN index once a table has at least this many rows; below it a flat scan is fast enough
+VECTOR_INDEX_MIN_ROWS = int(os.getenv("VECTOR_INDEX_MIN_ROWS", "5000"))
+# Fold new rows into the index once this many are unindexed (they are still found by a flat scan meanwhile)
+VECTOR_INDEX_MIN_UNINDEXED_ROWS = int(os.getenv("VECTOR_INDEX_MIN_UNINDEXED_ROWS", "1000"))
+# Retrain the partitions instead of appending to them when this share of the table is unindexed
+VECTOR_INDEX_RETRAIN_FRACTION = float(os.getenv("VECTOR_INDEX_RETRAIN_FRACTION", "0.5"))
+# "IVF_PQ" (smaller, faster to build) or "IVF_HNSW_SQ" (better recall at low nprobes)
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "IVF_PQ")
+# Must match the distance used by the queries (LanceDB defaults to l2)
+VECTOR_INDEX_METRIC = os.getenv("VECTOR_INDEX_METRIC", "l2")
+
+# Default query-time tuning (0 leaves LanceDB's own default / disables refinement)
+VECTOR_SEARCH_NPROBES = int(os.getenv("VECTOR_SEARCH_NPROBES", "20"))
+VECTOR_SEARCH_REFINE_FACTOR = int(os.getenv("VECTOR_SEARCH_REFINE_FACTOR", "0"))
+
+
+# Return the index defined on the vector column, if any
+def get_vector_index(table, vector_column: str = "vector"):
+    for index in table.list_indices():
+        if vector_column in index.columns:
+            return index
+    return None
+
+
+# Partitioning heuristics: ~sqrt(rows) IVF partitions, 16 dimensions per PQ sub-vector
+def index_parameters(num_rows: int, dimensions: int) -> dict:
+    num_sub_vectors = dimensions // 16 if dimensions % 16 == 0 else 1
+    return {
+        "num_partitions": max(1, int(math.sqrt(num_rows))),
+        "num_sub_vectors": max(1, num_sub_vectors),
+    }
+
+
+def create_vector_index(table,
+                        index_type: str = VECTOR_INDEX_TYPE,
+                        metric: str = VECTOR_INDEX_METRIC,
+                        vector_column: str = "vector"):
+    num_rows = table.count_rows()
+    dimensions = table.schema.field(vector_column).type.list_size
+    params = index_parameters(num_rows, dimensions)
+
+    print(f"🧭 Building {index_type} index on `{table.name}` ({num_rows} rows, {params['num_partitions']} partitions)...")
+    table.create_index(
+        metric=metric,
+        vector_column_name=vector_column,
+        index_type=index_type,
+        replace=True,
+        **params
+    )
+
+
+# Create the ANN index once the table is big enough, and keep it up to date after appends
+def ensure_vector_index(table,
+                        min_rows: int = VECTOR_INDEX_MIN_ROWS,
+                        min_unindexed_rows: int = VECTOR_INDEX_MIN_UNINDEXED_ROWS,
+                        retrain_fraction: float = VECTOR_INDEX_RETRAIN_FRACTION,
+                        vector_column: str = "vector") -> str:
+    """
+    Returns what was done: "below_threshold", "created", "up_to_date", "updated" or "retrained".
+    New rows are merged into the existing partitions with `optimize()`; the index is rebuilt
+    (partitions retrained) only once the unindexed share grows past `retrain_fraction`.
+    """
+    num_rows = table.count_rows()
+    if num_rows < min_rows:
+        return "below_threshold"
+
+    index = get_vector_index(table, vector_column)
+    if index is None:
+        create_vector_index(table, vector_column=vector_column)
+        return "created"
+
+    unindexed = table.index_stats(index.name).num_unindexed_rows
+    if unindexed < min_unindexed_rows:
+        return "up_to_date"
+
+    # optimize() only appends new rows to the existing partitions; retraining means rebuilding the index
+    if unindexed >= retrain_fraction * num_rows:
+        print(f"🧭 Retraining vector index on `{table.name}` ({unindexed} new rows)...")
+        create_vector_index(table, vector_column=vector_column)
+        return "retrained"
+
+    print(f"🧭 Updating vector index on `{table.name}` ({unindexed} new rows)...")
+    table.optimize()
+    return "updated"
+
+
+# Apply per-query ANN tuning to a LanceDB vector query
+def tune_query(query, nprobes: Optional[int] = None, refine_factor: Optional[int] = None):
+    """
+    `nprobes`: number of IVF partitions searched (higher → better recall, slower).
+    `refine_factor`: re-rank `limit * refine_factor` candidates with exact distances,
+    which recovers most of the precision lost to PQ compression.
+    """
+    if nprobes:
+        query = query.nprobes(nprobes)
+    if refine_factor:
+        query = query.refine_factor(refine_factor)
+    return query
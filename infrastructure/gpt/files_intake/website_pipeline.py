@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from typing import Callable, List
+
+from infrastructure.gpt.configs.chunking_profiles import get_chunking_profile
+from infrastructure.gpt.files_intake.pipeline import Pipeline, Stage, print_pipeline_report
+from infrastructure.gpt.files_intake.utils.dedup import build_dedup_key, sql_literal, text_content_hash
+from infrastructure.gpt.files_intake.vector_db import (
+    SYNC_STATUSES,
+    append_records,
+    build_chunk_records,
+    build_file_metadata,
+    chunk_document,
+    delete_document_chunks,
+    embed_texts,
+    ensure_scalar_indexes,
+    get_converter_pool,
+    get_db,
+    get_table_writer,
+    get_website_sync_state,
+    is_duplicate_content,
+    open_or_create_table,
+)
+
+# Worker threads of the CPU-bound chunking stage (conversion uses one thread per pooled converter)
+CHUNK_WORKERS = int(os.getenv("WEBSITE_CHUNK_WORKERS", "2"))
+# Chunk records embedded per embedding call, and concurrent embedding calls
+EMBED_BATCH_RECORDS = int(os.getenv("WEBSITE_EMBED_BATCH_RECORDS", "256"))
+EMBED_WORKERS = int(os.getenv("WEBSITE_EMBED_WORKERS", "2"))
+
+
+class WebsiteIngestion:
+    """Pipelined, incremental ingestion of web pages into a chunk table.
+
+    Pages emitted by a source (the crawler or the sitemap fetcher) flow through bounded
+    queues: convert (one thread per pooled Docling converter) → chunk and compare with the
+    last sync → embed (batched across pages) → write (coalesced into a few large LanceDB appends).
+    Network I/O, conversion, embedding calls and writes overlap, and a slow stage holds the
+    others back instead of letting pages pile up in memory.
+
+    Pages are dicts with `url`, `html`, `headers` and optionally `lastmod`.
+    """
+
+    def __init__(self, project_id: str, description: str, table_name: str = "files", seen_at: float = None):
+        self.project_id = project_id
+        self.description = description
+        self.table_name = table_name
+        self.seen_at = seen_at or time.time()
+        self.state_store = get_website_sync_state()
+        self.writer = get_table_writer(table_name)
+        self.profile = get_chunking_profile("webpage", table_name)
+
+        self.report = dict.fromkeys(SYNC_STATUSES, 0)
+        # Pages skipped as duplicates, kept so they can be stored if the other copy is removed
+        self.duplicates: List[dict] = []
+        self._claimed_hashes = set()
+        self._lock = threading.Lock()
+
+    def count(self, status: str, url: str = None):
+        with self._lock:
+            self.report[status] += 1
+        if url:
+            print(f"{'❌' if status == 'failed' else '✅'} {status}: {url}")
+
+    # A page that failed is still on the site: keep its stored chunks and don't let it look removed
+    def fail(self, page: dict):
+        self.state_store.touch(self.project_id, self.table_name, page["url"], self.seen_at)
+        self.count("failed", page["url"])
+
+    def _guard(self, stage_func):
+        def guarded(payload):
+            try:
+                return stage_func(payload)
+            except Exception:
+                for page in (payload if isinstance(payload, list) else [payload]):
+                    self.fail(page)
+                raise
+        return guarded
+
+    #------------------Stages------------------------------------------------------------------------
+
+    def convert(self, page: dict):
+        from infrastructure.gpt.files_intake.converter_pool import html_document_stream
+
+        result = get_converter_pool().convert(html_document_stream(page["url"], page["html"]), raises_on_error=False)
+        if not result or not result.document:
+            self.fail(page)
+            return []
+        return [{**page, "document": result.document}]
+
+    def chunk(self, page: dict):
+        url = page["url"]
+        chunks = chunk_document(page.pop("document"), self.profile)
+        content_hash = text_content_hash(chunk["text"] for chunk in chunks)
+        validators = {
+            "etag": page["headers"].get("etag"),
+            "last_modified": page["headers"].get("last-modified"),
+            "lastmod": page.get("lastmod"),
+        }
+
+        previous = self.state_store.get(self.project_id, self.table_name, url)
+        if previous and previous["content_hash"] == content_hash:
+            self.state_store.upsert(self.project_id, self.table_name, url, self.seen_at, **validators)
+            self.count("unchanged")
+            return []
+
+        meta = build_file_metadata(
+            file_name=url,
+            project_id=self.project_id,
+            file_type="webpage",
+            description=self.description
+        )
+        meta["content_hash"] = content_hash
+
+        # Same content under another URL: already stored, or claimed by a page still in the pipeline
+        with self._lock:
+            claimed = content_hash in self._claimed_hashes
+            self._claimed_hashes.add(content_hash)
+        if claimed or is_duplicate_content(meta, self.table_name):
+            # The page changed into a copy of another one: its old version must not stay searchable
+            if self.writer.is_pending(build_dedup_key(url, self.project_id)):
+                self.writer.flush()
+                previous = True
+            if previous:
+                delete_document_chunks(url, self.project_id, self.table_name)
+            self.state_store.upsert(self.project_id, self.table_name, url, self.seen_at, content_hash=None, **validators)
+            with self._lock:
+                self.duplicates.append({key: page[key] for key in ("url", "html", "headers", "lastmod") if key in page})
+            self.count("duplicate", url)
+            return []
+
+        return [{
+            "url": url,
+            "records": build_chunk_records(chunks, meta),
+            "content_hash": content_hash,
+            "validators": validators,
+        }]
+
+    def embed(self, pages: List[dict]):
+        records = [record for page in pages for record in page["records"]]
+        vectors = embed_texts([record["text"] for record in records])
+        for record, vector in zip(records, vectors):
+            record["vector"] = vector
+        return pages
+
+    def write(self, pages: List[dict]):
+        keys = [build_dedup_key(page["url"], self.project_id) for page in pages]
+
+        # An earlier version still in the write buffer is flushed first, so the delete below replaces it too
+        if any(self.writer.is_pending(key) for key in keys):
+            self.writer.flush()
+
+        # Replace, never append: drop the chunks of the previous versions of these URLs first
+        replaced = set()
+        if self.table_name in get_db().table_names():
+            table = open_or_create_table(self.table_name)
+            ensure_scalar_indexes(table)
+            replaced = {key for key in keys if table.count_rows(f"dedup_key = {sql_literal(key)}")}
+            if replaced:
+                self.writer.delete(f"dedup_key IN ({', '.join(sql_literal(key) for key in replaced)})")
+
+        # The sync state is only recorded once the buffered records are actually in the table
+        def on_written():
+            for page, key in zip(pages, keys):
+                self.state_store.upsert(self.project_id, self.table_name, page["url"], self.seen_at,
+                                        content_hash=page["content_hash"], **page["validators"])
+                self.count("updated" if key in replaced else "added", page["url"])
+
+        # Buffered: the table writer coalesces the batches of the whole run into a few appends
+        records = [record for page in pages for record in page["records"]]
+        append_records(records, self.table_name, on_written)
+        return []
+
+    #------------------Run---------------------------------------------------------------------------
+
+    def run(self, source: Callable[[Callable], None]) -> List[dict]:
+        """Runs the pipeline; `source(emit)` must call `emit(page)` for every fetched page."""
+        pipeline = Pipeline([
+            Stage("convert", self._guard(self.convert), workers=get_converter_pool().size, queue_size=8),
+            Stage("chunk", self._guard(self.chunk), workers=CHUNK_WORKERS, queue_size=8),
+            Stage("embed", self._guard(self.embed), workers=EMBED_WORKERS, queue_size=8,
+                  batch_size=EMBED_BATCH_RECORDS, weight=lambda page: len(page["records"])),
+            # Batched to replace many pages with one delete; appends are coalesced by the table writer
+            Stage("write", self._guard(self.write), workers=1, queue_size=EMBED_WORKERS * 2,
+                  batch_size=EMBED_BATCH_RECORDS, batch_timeout=1.0,
+                  weight=lambda page: len(page["records"])),
+        ], source_name="fetch")
+
+        with self.writer.batch():
+            stage_report = pipeline.run(source)
+        print_pipeline_report(stage_report)
+        return stage_report
@@ -1,10 +1,10 @@
 # Standard libraries
-import requests
+import asyncio
 import json
-import base64
+import time
+from typing import NamedTuple, Optional
 
 # App configurations and constants
-from infrastructure.gpt.configs.assistant_env_config import API_KEY, API_URL
 from infrastructure.gpt.configs.assistant_registry import ASSISTANTS
 from infrastructure.gpt.models.assistant_name import AssistantName
 
@@ -16,8 +16,22 @@ from infrastructure.gpt.test_data.test_data import (
     introduction_object, focus_test
 )
 
-# LanceDB instance for retrieving vector context
-from infrastructure.gpt.files_intake.vector_db import db
+# Pooled async HTTP client for the Responses API
+from infrastructure.gpt.repositories.responses_client import ResponsesClient, get_responses_client, iterate_sync, run_sync
+from infrastructure.gpt.repositories.stream_parser import StreamingJsonAssembler
+from infrastructure.gpt.repositories.image_preparation import build_image_items
+from infrastructure.gpt.repositories.prompt_cache import (
+    needs_static_context, prompt_cache_stats, remember_response, static_fingerprint
+)
+
+# LanceDB connection for retrieving vector context (opened lazily on the first vector-enriched prompt)
+from infrastructure.gpt.files_intake.vector_db import ensure_scalar_indexes, get_db, get_embedding_func
+from infrastructure.gpt.files_intake.retrieval import RETRIEVAL_MODE, RETRIEVAL_NUM_RESULTS, cached_search_chunks
+from infrastructure.gpt.files_intake.vector_index import VECTOR_SEARCH_NPROBES, VECTOR_SEARCH_REFINE_FACTOR
+from infrastructure.gpt.files_intake.context_packer import CONTEXT_TOKEN_BUDGET, pack_context, tokenizer_counter
+
+# Per-request spans, token usage and sampled payload logging
+from infrastructure.gpt.utils.tracing import current_trace, maybe_log_payload, span, start_trace
 
 #--------------------------Developer Context Builders--------------------------------------------------------
 
@@ -122,63 +136,115 @@ def manage_response_test_results(response_json):
     formatted_output += f"Additional Notes: {additional_notes}"
     return formatted_output
 
-#--------------------------Main Function to Send Request--------------------------------------------------------
-# Main function to send a prompt and receive a formatted response
-def send_request(prompt: str,
-                 assistant_name: AssistantName,
-                 previous_response_id: str = None,
-                 image_paths: list[str] = None):
+#--------------------------Payload Builder--------------------------------------------------------
+# Build the Responses API payload for a prompt, plus the fingerprint of its static context
+def build_turn(prompt: str,
+               assistant_name: AssistantName,
+               previous_response_id: str = None,
+               image_paths: list[str] = None,
+               project_id: str = None,
+               developer_text: str = None) -> tuple[dict, str]:
+    """
+    Messages are ordered from most to least stable so the prefix the provider caches stays
+    byte-identical across requests: system prompt, developer context, then the user's text,
+    the retrieved vector context and images. On a chained turn (`previous_response_id`) the
+    system and developer messages are already part of the conversation and are only sent
+    again if they changed. `developer_text` replaces the assistant's default developer context
+    (e.g. the session report to summarize in a batch run).
+    """
 
     # Retrieve assistant configuration
     cfg = ASSISTANTS.get(assistant_name)
     if not cfg:
         raise ValueError(f"Unknown assistant: {assistant_name}")
 
-    # Vector context (only for specific assistants)
-    if assistant_name in [AssistantName.EXPLORATORY_TESTING, AssistantName.INTERVIEW_PREPARATION]:
-        vector_context = get_vector_context(prompt)
-        combined_input = f"{vector_context}\n\n{prompt}"
-    else:
-        combined_input = prompt
+    # Static context: the same for every turn of an assistant
+    if developer_text is None:
+        with span("developer_context"):
+            developer_text = developer_context(assistant_name)
+    static_messages = [
+        {"role": "system", "content": cfg.system},
+        {"role": "developer", "content": developer_text},
+    ]
+    fingerprint = static_fingerprint(static_messages)
+
+    # Vector context (only for assistants that require it), packed into the assistant's token budget
+    vector_context = None
+    if cfg.requires_vector_context:
+        vector_context = get_vector_context(
+            prompt, project_id=project_id, token_budget=cfg.context_token_budget or CONTEXT_TOKEN_BUDGET
+        )
+    user_msg = build_input_items(prompt, image_paths, context=vector_context)
 
     # Prepare message list
-    system_msg = {"role": "system", "content": cfg.system}
-    developer_msg = {
-        "role": "developer",
-        "content": developer_context(assistant_name)
-    }
-    user_msg = build_input_items(combined_input, image_paths)
-
-    # Build final payload
-    payload_input = [system_msg, developer_msg, user_msg]
+    if needs_static_context(previous_response_id, fingerprint):
+        payload_input = static_messages + [user_msg]
+    else:
+        payload_input = [user_msg]
 
     payload = {
         "model": "gpt-4o",
         "input": payload_input,
-        "text": cfg.output_format
+        "text": cfg.output_format,
+        # Routes requests sharing the static prefix to the same prompt cache
+        "prompt_cache_key": f"{assistant_name.name.lower()}-{fingerprint[:16]}"
     }
 
     # Add previous response ID if provided
     if previous_response_id:
         payload["previous_response_id"] = previous_response_id
 
-
-    # Debug: print payload
-    print("\n[logic.py] Payload before sending:")
-    print(json.dumps(payload, indent=2))
-
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
-    }
-
-    # Send POST request to assistant API
-    resp = requests.post(API_URL, headers=headers, json=payload)
-    print(f"Status Code: {resp.status_code}")
-    print(f"Response JSON: {resp.text}")
-
-    if resp.status_code == 200:
-        result = resp.json()
+    return payload, fingerprint
+
+# Build the Responses API payload for a prompt
+def build_payload(prompt: str,
+                  assistant_name: AssistantName,
+                  previous_response_id: str = None,
+                  image_paths: list[str] = None,
+                  project_id: str = None,
+                  developer_text: str = None) -> dict:
+    return build_turn(prompt, assistant_name, previous_response_id, image_paths, project_id, developer_text)[0]
+
+# Record the usage of a completed response and which static context its conversation now holds
+def record_turn(response: dict, fingerprint: str) -> dict:
+    remember_response(response.get("id"), fingerprint)
+    usage = prompt_cache_stats.record(response.get("usage"))
+    trace = current_trace()
+    if trace is not None:
+        trace.set(response_id=response.get("id"), **usage)
+    return usage
+
+#--------------------------Response Handler--------------------------------------------------------
+# Format a parsed structured response for the selected assistant
+def format_response(assistant_name: AssistantName, response_json: dict) -> str:
+    if assistant_name == AssistantName.EXPLORATORY_TESTING:
+        return manage_response_exploratory_testing(response_json)
+    elif assistant_name == AssistantName.INTERVIEW_PREPARATION:
+        return manage_response_interview_preparation(response_json)
+    elif assistant_name == AssistantName.SUMMARIZING:
+        return manage_response_summarizing(response_json)
+    elif assistant_name == AssistantName.TEST_RESULTS:
+        return manage_response_test_results(response_json)
+    return "Unknown assistant."
+
+# Outcome of one assistant request
+class AssistantResult(NamedTuple):
+    output: str                     # formatted answer, or the error message
+    response_id: Optional[str]      # None if the request failed
+    data: Optional[dict] = None     # the structured (json_schema) answer of the model
+    status: int = 0
+    usage: Optional[dict] = None
+
+# Parse the API answer and format it for the selected assistant
+def parse_response(status_code: int, body_text: str, assistant_name: AssistantName, result: dict = None) -> AssistantResult:
+    if status_code == 200:
+        # `result` is the already parsed body, if the caller has it
+        if result is None:
+            try:
+                result = json.loads(body_text)
+            except json.JSONDecodeError:
+                print("Error decoding the API response.")
+                return AssistantResult("Error decoding the API response.", None, status=status_code)
         try:
             output_content = result["output"][0]["content"][0]["text"]
             response_id = result["id"]
@@ -186,62 +252,233 @@ def send_request(prompt: str,
 
             try:
                 response_json = json.loads(output_content)
-                if assistant_name == AssistantName.EXPLORATORY_TESTING:
-                    formatted_output = manage_response_exploratory_testing(response_json)
-                elif assistant_name == AssistantName.INTERVIEW_PREPARATION:
-                    formatted_output = manage_response_interview_preparation(response_json)
-                elif assistant_name == AssistantName.SUMMARIZING:
-                    formatted_output = manage_response_summarizing(response_json)
-                elif assistant_name == AssistantName.TEST_RESULTS:
-                    formatted_output = manage_response_test_results(response_json)
-                else:
-                    formatted_output = "Unknown assistant."
-
-                return formatted_output, response_id
+                formatted_output = format_response(assistant_name, response_json)
+                return AssistantResult(formatted_output, response_id, response_json, status_code, result.get("usage"))
 
             except json.JSONDecodeError:
                 print("Error parsing the JSON response.")
-                return "Error parsing the JSON response.", None
+                return AssistantResult("Error parsing the JSON response.", None, status=status_code)
 
         except (KeyError, IndexError) as e:
             print(f"Error extracting the assistant response: {e}")
-            return "Error extracting the assistant response.", None
+            return AssistantResult("Error extracting the assistant response.", None, status=status_code)
     else:
-        error_message = f"Error: {resp.status_code} - {resp.text}"
+        error_message = f"Error: {status_code} - {body_text}"
         print(error_message)
-        return error_message, None
+        return AssistantResult(error_message, None, status=status_code)
+
+# (formatted_output, response_id) of an API answer
+def handle_response(status_code: int, body_text: str, assistant_name: AssistantName, result: dict = None):
+    return tuple(parse_response(status_code, body_text, assistant_name, result)[:2])
+
+#--------------------------Main Function to Send Request--------------------------------------------------------
+# Send a prompt and return the full AssistantResult (structured answer, status and usage included)
+async def request_assistant_async(prompt: str,
+                                  assistant_name: AssistantName,
+                                  previous_response_id: str = None,
+                                  image_paths: list[str] = None,
+                                  project_id: str = None,
+                                  developer_text: str = None,
+                                  client: ResponsesClient = None) -> AssistantResult:
+
+    with start_trace("assistant_request", assistant=assistant_name.name, chained=bool(previous_response_id),
+                     images=len(image_paths or [])):
+        # Vector search and image encoding block, so build the payload off the event loop
+        with span("build_payload"):
+            payload, fingerprint = await asyncio.to_thread(
+                build_turn, prompt, assistant_name, previous_response_id, image_paths, project_id, developer_text
+            )
+        maybe_log_payload(payload)
+
+        # Send POST request to assistant API
+        with span("http"):
+            resp = await (client or get_responses_client()).post(payload)
+
+        with span("json_parsing"):
+            result = parse_response(resp.status_code, resp.text, assistant_name)
+            if result.response_id:
+                record_turn({"id": result.response_id, "usage": result.usage}, fingerprint)
+            return result
+
+# Async variant of send_request: pooled keep-alive connections, retries with jitter and a concurrency limit
+async def send_request_async(prompt: str,
+                             assistant_name: AssistantName,
+                             previous_response_id: str = None,
+                             image_paths: list[str] = None,
+                             project_id: str = None,
+                             developer_text: str = None,
+                             client: ResponsesClient = None):
+    result = await request_assistant_async(prompt, assistant_name, previous_response_id, image_paths, project_id,
+                                           developer_text, client)
+    return result.output, result.response_id
+
+# Main function to send a prompt and receive a formatted response
+def send_request(prompt: str,
+                 assistant_name: AssistantName,
+                 previous_response_id: str = None,
+                 image_paths: list[str] = None,
+                 project_id: str = None,
+                 developer_text: str = None):
+    return run_sync(send_request_async(prompt, assistant_name, previous_response_id, image_paths, project_id,
+                                       developer_text))
+
+# Run many assistant requests in parallel; each job holds the keyword arguments of send_request
+async def send_requests_async(jobs: list[dict], client: ResponsesClient = None) -> list:
+    """
+    Returns one (formatted_output, response_id) tuple per job, in job order. A job that raised
+    is returned as its exception so the other results are not lost.
+    """
+    return await asyncio.gather(
+        *(send_request_async(**job, client=client) for job in jobs),
+        return_exceptions=True
+    )
+
+# Sync wrapper of send_requests_async
+def send_requests(jobs: list[dict]) -> list:
+    return run_sync(send_requests_async(jobs))
+
+#--------------------------Streaming Requests--------------------------------------------------------
+# Stream a response, yielding partial output while the model is still generating
+async def stream_request_async(prompt: str,
+                               assistant_name: AssistantName,
+                               previous_response_id: str = None,
+                               image_paths: list[str] = None,
+                               project_id: str = None,
+                               developer_text: str = None,
+                               client: ResponsesClient = None):
+    """
+    Yields, in order:
+      ("text", "friendly_message", delta)  partial friendly message text
+      ("item", array_key, item)            a completed goal/question/recommendation/table row
+      ("done", formatted_output, response_id, timings) once the response is complete
+    or ("error", message) if the request fails. `timings` holds time_to_first_token_s and total_s.
+    """
+    with start_trace("assistant_stream", assistant=assistant_name.name, chained=bool(previous_response_id),
+                     images=len(image_paths or [])) as trace:
+        with span("build_payload"):
+            payload, fingerprint = await asyncio.to_thread(
+                build_turn, prompt, assistant_name, previous_response_id, image_paths, project_id, developer_text
+            )
+        maybe_log_payload(payload)
+
+        assembler = StreamingJsonAssembler()
+        started = time.perf_counter()
+        first_token_at = None
+        response_id = None
+
+        # The http span covers the whole stream, from sending the request to the last event
+        with span("http"):
+            async for event in (client or get_responses_client()).stream(payload):
+                event_type = event.get("type")
+
+                if event_type == "response.output_text.delta":
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        trace.set(time_to_first_token_s=first_token_at - started)
+                        print(f"⏱️ Time to first token: {(first_token_at - started) * 1000:.0f} ms")
+                    for update in assembler.feed(event.get("delta", "")):
+                        yield update
+
+                elif event_type == "response.completed":
+                    response_id = event["response"]["id"]
+                    trace.set(status=200)
+                    record_turn(event["response"], fingerprint)
+
+                elif event_type in ("response.failed", "error"):
+                    message = event.get("message") or json.dumps(event.get("response", {}).get("error"))
+                    error_message = f"Error: {event.get('status', '')} - {message}"
+                    trace.set(status=event.get("status") or "failed")
+                    print(error_message)
+                    yield ("error", error_message)
+                    return
+
+        try:
+            with span("json_parsing"):
+                formatted_output = format_response(assistant_name, assembler.result())
+        except json.JSONDecodeError:
+            print("Error parsing the JSON response.")
+            yield ("error", "Error parsing the JSON response.")
+            return
+        except (KeyError, IndexError) as e:
+            # A truncated or incomplete answer is reported like in parse_response
+            print(f"Error extracting the assistant response: {e}")
+            yield ("error", "Error extracting the assistant response.")
+            return
+
+        finished = time.perf_counter()
+        timings = {
+            "time_to_first_token_s": (first_token_at - started) if first_token_at else None,
+            "total_s": finished - started,
+        }
+        yield ("done", formatted_output, response_id, timings)
+
+# Sync generator version of stream_request_async (used by the GUI)
+def stream_request(prompt: str,
+                   assistant_name: AssistantName,
+                   previous_response_id: str = None,
+                   image_paths: list[str] = None,
+                   project_id: str = None,
+                   developer_text: str = None):
+    yield from iterate_sync(stream_request_async(prompt, assistant_name, previous_response_id, image_paths, project_id,
+                                                 developer_text))
 
 #--------------------------Vector Context Retrieval--------------------------------------------------------
 # Search LanceDB for semantically relevant content to the prompt
-def get_vector_context(prompt: str, num_results: int = 10) -> str:
-    table = db.open_table("files")
-    results = table.search(prompt).limit(num_results).to_pandas()
+def get_vector_context(prompt: str,
+                       num_results: int = RETRIEVAL_NUM_RESULTS,
+                       project_id: str = None,
+                       file_type: str = None,
+                       filename: str = None,
+                       nprobes: int = VECTOR_SEARCH_NPROBES,
+                       refine_factor: int = VECTOR_SEARCH_REFINE_FACTOR,
+                       mode: str = RETRIEVAL_MODE,
+                       token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    with span("vector_retrieval", mode=mode) as attributes:
+        table = get_db().open_table("files")
+        # Builds the full-text index on tables created before hybrid retrieval (once per process)
+        ensure_scalar_indexes(table)
+        # project_id/file_type/filename are applied as a pre-filter, so only that project's chunks are searched;
+        # keyword (BM25) and vector rankings are fused, and the query embedding and results are cached until the table changes
+        results = cached_search_chunks(
+            table, prompt, get_embedding_func(), num_results,
+            project_id=project_id, file_type=file_type, filename=filename,
+            nprobes=nprobes, refine_factor=refine_factor, mode=mode
+        )
+        attributes["results"] = len(results)
     if results.empty:
         return ""
 
     chunks = []
     for _, row in results.iterrows():
         meta = row.get("metadata", {})
-        filename = meta.get("filename", "unknown")
+        source_name = meta.get("filename", "unknown")
         page = f"p. {', '.join(map(str, meta.get('page_numbers', [])))}" if meta.get("page_numbers") else ""
         title = meta.get("title", "Untitled")
-        chunks.append(f"{row['text']}\n(Source: {filename} - {page} - {title})")
+        chunks.append((row["text"], f"(Source: {source_name} - {page} - {title})"))
 
-    return "\n\n".join(chunks)
+    # Overlapping chunks are included once and long ones trimmed to their most relevant sentences
+    with span("context_packing") as attributes:
+        packed = pack_context(chunks, prompt, tokenizer_counter(), budget=token_budget)
+        attributes["tokens"] = packed.tokens
+    print(f"📦 Vector context: {packed.summary()}")
+    return packed.text
 
 #--------------------------Build Input Payload with Optional Images--------------------------------------------------------
 
-# Create the input payload for OpenAI API, including text and optional images
-def build_input_items(prompt: str, image_paths: list[str] = None):
+# Create the user message for OpenAI API: the prompt, then retrieved context and optional images
+def build_input_items(prompt: str, image_paths: list[str] = None, context: str = None):
     content = [{"type": "input_text", "text": prompt}]
+    if context:
+        # After the prompt, so the varying context never sits in front of otherwise identical text
+        content.append({"type": "input_text", "text": f"Relevant project documents:\n\n{context}"})
     if image_paths:
-        for img_path in image_paths:
-            with open(img_path, "rb") as img_file:
-                b64_img = base64.b64encode(img_file.read()).decode("utf-8")
-            content.append({
-                "type": "input_image",
-                "image_url": f"data:image/jpeg;base64,{b64_img}"
-            })
+        # Real content type, downscaled and recompressed, cached by content hash and uploaded once
+        with span("image_encoding") as attributes:
+            image_items, image_report = build_image_items(image_paths)
+            attributes.update(images=image_report.images, uploaded=image_report.uploaded,
+                              payload_bytes=image_report.payload_bytes)
+        content.extend(image_items)
+        print(f"🖼️ Images: {image_report.summary()}")
 
     return {
         "role": "user",
@@ -0,0 +1,236 @@
+# Headless batch mode: runs prompts from a JSONL file through the assistant request pipeline.
+#
+#   python -m infrastructure.gpt.repositories.batch_runner jobs.jsonl --output results.jsonl --concurrency 8
+#
+# One job per line:
+#   {"id": "report-017", "assistant": "SUMMARIZING", "prompt": "Summarize the test session",
+#    "developer_context_file": "reports/017.txt", "images": ["screens/017.png"], "project_id": "webshop"}
+#
+# `assistant` is the AssistantName member or its value ("Summarizing"). `developer_context` (text) or
+# `developer_context_file` replaces the assistant's default developer context. Relative paths are
+# resolved against the folder of the jobs file. Every finished job is appended to the output file at
+# once, so an interrupted run is resumed by starting it again: jobs already answered are skipped and
+# failed ones are retried.
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Set
+
+from infrastructure.gpt.models.assistant_name import AssistantName
+from infrastructure.gpt.repositories.assistant_gpt_repository import request_assistant_async
+from infrastructure.gpt.repositories.responses_client import ResponsesClient, run_sync
+
+
+class BatchJob(NamedTuple):
+    id: str
+    assistant_name: AssistantName
+    prompt: str
+    developer_text: Optional[str] = None
+    image_paths: Optional[List[str]] = None
+    project_id: Optional[str] = None
+    previous_response_id: Optional[str] = None
+
+
+def parse_assistant(value: str) -> AssistantName:
+    for assistant in AssistantName:
+        if value in (assistant.name, assistant.value):
+            return assistant
+    raise ValueError(f"Unknown assistant: {value}")
+
+
+# Read and validate every job up front, so a typo on line 250 does not surface halfway through the night
+def load_jobs(path: str) -> List[BatchJob]:
+    base_dir = Path(path).resolve().parent
+    jobs, seen = [], set()
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                spec = json.loads(line)
+                developer_text = spec.get("developer_context")
+                if spec.get("developer_context_file"):
+                    developer_text = (base_dir / spec["developer_context_file"]).read_text(encoding="utf-8")
+                job = BatchJob(
+                    id=str(spec.get("id") or f"line-{line_number}"),
+                    assistant_name=parse_assistant(spec["assistant"]),
+                    prompt=spec["prompt"],
+                    developer_text=developer_text,
+                    image_paths=[str(base_dir / image) for image in spec.get("images") or []] or None,
+                    project_id=spec.get("project_id"),
+                    previous_response_id=spec.get("previous_response_id"),
+                )
+            except (KeyError, ValueError, OSError) as e:
+                raise ValueError(f"{path}, line {line_number}: {e.__class__.__name__}: {e}") from e
+            if job.id in seen:
+                raise ValueError(f"{path}, line {line_number}: duplicate job id {job.id!r}")
+            seen.add(job.id)
+            jobs.append(job)
+    return jobs
+
+
+# Ids of the jobs already answered in an earlier (interrupted) run
+def load_checkpoint(output_path: str) -> Set[str]:
+    latest = {}
+    if Path(output_path).exists():
+        with open(output_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # line cut off when the previous run was killed
+                latest[record["id"]] = record["status"]
+    return {job_id for job_id, status in latest.items() if status == "ok"}
+
+
+# Whether the last byte of a non-empty file is a newline
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, 2)
+        return f.read(1) == b"\n"
+
+
+class BatchReport:
+    def __init__(self, total: int, skipped: int):
+        self.total = total
+        self.skipped = skipped
+        self.succeeded = 0
+        self.failed = 0
+        self.latencies = []
+        self.tokens = {"input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+        self.seconds = 0.0
+
+    def record(self, record: dict):
+        if record["status"] == "ok":
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self.latencies.append(record["seconds"])
+        usage = record.get("usage") or {}
+        self.tokens["input_tokens"] += usage.get("input_tokens", 0)
+        self.tokens["cached_tokens"] += (usage.get("input_tokens_details") or {}).get("cached_tokens", 0)
+        self.tokens["output_tokens"] += usage.get("output_tokens", 0)
+
+    def as_dict(self) -> dict:
+        processed = self.succeeded + self.failed
+        latencies = sorted(self.latencies)
+        return {
+            "total": self.total,
+            "skipped": self.skipped,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "seconds": self.seconds,
+            "jobs_per_s": processed / self.seconds if self.seconds else 0.0,
+            "p50_s": statistics.median(latencies) if latencies else None,
+            "p99_s": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else None,
+            **self.tokens,
+        }
+
+    def summary(self) -> str:
+        stats = self.as_dict()
+        latency = f", p50 {stats['p50_s']:.1f}s, p99 {stats['p99_s']:.1f}s" if self.latencies else ""
+        return (f"{self.succeeded} succeeded, {self.failed} failed, {self.skipped} skipped of {self.total} jobs "
+                f"in {self.seconds:.1f}s ({stats['jobs_per_s']:.2f} jobs/s{latency}); "
+                f"{self.tokens['input_tokens']} input tokens ({self.tokens['cached_tokens']} cached), "
+                f"{self.tokens['output_tokens']} output tokens")
+
+
+async def run_job(job: BatchJob, client: ResponsesClient) -> dict:
+    start = time.perf_counter()
+    record = {"id": job.id, "assistant": job.assistant_name.name}
+    try:
+        result = await request_assistant_async(job.prompt, job.assistant_name, job.previous_response_id,
+                                               job.image_paths, job.project_id, job.developer_text, client)
+        ok = result.response_id is not None
+        record.update({
+            "status": "ok" if ok else "failed",
+            "http_status": result.status,
+            "response_id": result.response_id,
+            "output": result.output if ok else None,
+            "data": result.data,
+            "usage": result.usage,
+            "error": None if ok else result.output,
+        })
+    except Exception as e:
+        record.update({"status": "failed", "error": f"{e.__class__.__name__}: {e}"})
+    record["seconds"] = time.perf_counter() - start
+    record["finished_at"] = datetime.now(timezone.utc).isoformat()
+    return record
+
+
+async def run_batch_async(jobs: List[BatchJob], output_path: str, concurrency: int = 4, resume: bool = True,
+                          client: ResponsesClient = None) -> BatchReport:
+    """
+    Runs the jobs with at most `concurrency` in flight (payload building included) and appends one
+    result record per job to `output_path` as soon as it finishes, in completion order.
+    """
+    done_ids = load_checkpoint(output_path) if resume else set()
+    pending = [job for job in jobs if job.id not in done_ids]
+    report = BatchReport(total=len(jobs), skipped=len(jobs) - len(pending))
+    if report.skipped:
+        print(f"⏭️ Resuming: {report.skipped} jobs already answered in {output_path}")
+
+    owns_client = client is None
+    client = client or ResponsesClient(max_concurrency=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    try:
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as output:
+            # End a line cut off by a killed run, so the next record does not continue it
+            if resume and output.tell() and not _ends_with_newline(output_path):
+                output.write("\n")
+            async def run(job: BatchJob):
+                async with semaphore:
+                    record = await run_job(job, client)
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                report.record(record)
+                finished = report.succeeded + report.failed
+                marker = "✅" if record["status"] == "ok" else "❌"
+                print(f"{marker} [{finished}/{len(pending)}] {job.id} ({record['seconds']:.1f}s)"
+                      + (f": {record['error']}" if record["status"] != "ok" else ""))
+
+            await asyncio.gather(*(run(job) for job in pending))
+    finally:
+        # A caller's client stays open for the caller
+        if owns_client:
+            await client.aclose()
+
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+# Sync wrapper of run_batch_async
+def run_batch(jobs: List[BatchJob], output_path: str, concurrency: int = 4, resume: bool = True) -> BatchReport:
+    return run_sync(run_batch_async(jobs, output_path, concurrency, resume))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run assistant prompts from a JSONL file")
+    parser.add_argument("jobs", help="JSONL file with one job per line")
+    parser.add_argument("--output", help="Results JSONL (default: <jobs>.results.jsonl); also the checkpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jobs in flight at once")
+    parser.add_argument("--restart", action="store_true", help="Ignore and overwrite earlier results")
+    parser.add_argument("--summary", help="Write the final counts and throughput as JSON to this file")
+    args = parser.parse_args()
+
+    output_path = args.output or str(Path(args.jobs).with_suffix(".results.jsonl"))
+    jobs = load_jobs(args.jobs)
+    print(f"📋 {len(jobs)} jobs from {args.jobs}, results in {output_path}")
+
+    report = run_batch(jobs, output_path, args.concurrency, resume=not args.restart)
+    print(f"\n🏁 {report.summary()}")
+    if args.summary:
+        Path(args.summary).write_text(json.dumps(report.as_dict(), indent=2))
+    sys.exit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import base64
+import hashlib
+import os
+import threading
+import time
+from io import BytesIO
+from typing import List, NamedTuple, Optional, Tuple
+
+from infrastructure.gpt.files_intake.utils.ttl_cache import TTLCache
+
+# Longest side an attached image is downscaled to (the API works on at most 2048 px anyway)
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "2048"))
+# Quality of recompressed JPEG/WebP images
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "85"))
+# "inline": base64 data URL; "file": upload once through the Files API and reference it by file_id.
+# Uploaded files are never deleted by this module: they stay in the OpenAI account until removed there.
+IMAGE_TRANSPORT = os.getenv("IMAGE_TRANSPORT", "inline")
+# After a failed upload, images are sent inline for this many seconds before uploading is tried again
+IMAGE_UPLOAD_RETRY_SECONDS = float(os.getenv("IMAGE_UPLOAD_RETRY_SECONDS", "300"))
+# Prepared images and uploaded file ids are kept this long (uploaded files live on the provider side)
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "256"))
+IMAGE_CACHE_TTL = float(os.getenv("IMAGE_CACHE_TTL", str(24 * 3600)))
+
+# Magic bytes of the formats accepted by the Responses API
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+class PreparedImage(NamedTuple):
+    content_hash: str       # sha256 of the original file
+    mime_type: str
+    data: bytes             # bytes sent to the API (downscaled/recompressed when that made them smaller)
+    original_bytes: int
+    size: Optional[Tuple[int, int]]
+    data_url: str           # `data` as a base64 data URL, encoded once when the image is prepared
+
+
+def _prepared(content_hash: str, mime_type: str, data: bytes, original_bytes: int,
+              size: Optional[Tuple[int, int]]) -> PreparedImage:
+    data_url = f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+    return PreparedImage(content_hash, mime_type, data, original_bytes, size, data_url)
+
+
+class ImageReport:
+    """Per-request numbers: how much image data was sent and what preparing it cost."""
+
+    def __init__(self):
+        self.images = 0
+        self.cached = 0
+        self.uploaded = 0
+        self.original_bytes = 0
+        self.payload_bytes = 0      # image data inside the request body (data URLs, file ids)
+        self.uploaded_bytes = 0     # image data sent through the Files API for this request
+        self.encode_seconds = 0.0
+
+    def summary(self) -> str:
+        return (f"{self.images} images ({self.cached} cached, {self.uploaded} uploaded), "
+                f"{self.original_bytes / 1024:.1f} KB → {self.payload_bytes / 1024:.1f} KB in payload "
+                f"+ {self.uploaded_bytes / 1024:.1f} KB uploaded, "
+                f"encode {self.encode_seconds * 1000:.0f} ms")
+
+
+# Prepared images by content hash (and preparation settings), uploaded file ids by content hash
+prepared_image_cache = TTLCache(max_entries=IMAGE_CACHE_SIZE, ttl_seconds=IMAGE_CACHE_TTL)
+uploaded_file_cache = TTLCache(max_entries=IMAGE_CACHE_SIZE * 4, ttl_seconds=IMAGE_CACHE_TTL)
+# Content hash of a file by (path, size, mtime), so unchanged screenshots are not re-read every turn
+_file_hashes = TTLCache(max_entries=IMAGE_CACHE_SIZE * 4, ttl_seconds=IMAGE_CACHE_TTL)
+_upload_lock = threading.Lock()
+_upload_retry_at = 0.0  # time.monotonic() before which the "file" transport is not tried
+
+
+def detect_image_type(data: bytes) -> str:
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    raise ValueError("Unsupported image format (expected PNG, JPEG, GIF or WebP)")
+
+
+def _read_with_hash(path: str) -> Tuple[str, Optional[bytes]]:
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    content_hash = _file_hashes.get(key)
+    if content_hash is not None:
+        return content_hash, None
+    with open(path, "rb") as image_file:
+        data = image_file.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+    _file_hashes.set(key, content_hash)
+    return content_hash, data
+
+
+def prepare_image(path: str, max_dimension: int = IMAGE_MAX_DIMENSION, quality: int = IMAGE_QUALITY,
+                  report: ImageReport = None) -> PreparedImage:
+    """
+    Reads an image, detects its real format from the magic bytes and, if Pillow is installed,
+    downscales it to `max_dimension` and recompresses it (PNG stays lossless, so text in
+    screenshots stays sharp). The result is cached by content hash.
+    """
+    report = report or ImageReport()
+    start = time.perf_counter()
+    content_hash, data = _read_with_hash(path)
+    key = (content_hash, max_dimension, quality)
+
+    prepared = prepared_image_cache.get(key)
+    if prepared is None:
+        if data is None:
+            with open(path, "rb") as image_file:
+                data = image_file.read()
+        prepared = _shrink(content_hash, data, detect_image_type(data), max_dimension, quality)
+        prepared_image_cache.set(key, prepared)
+    else:
+        report.cached += 1
+
+    report.images += 1
+    report.original_bytes += prepared.original_bytes
+    report.encode_seconds += time.perf_counter() - start
+    return prepared
+
+
+def _shrink(content_hash: str, data: bytes, mime_type: str, max_dimension: int, quality: int) -> PreparedImage:
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        # Without Pillow the original bytes are sent, with their real content type
+        return _prepared(content_hash, mime_type, data, len(data), None)
+
+    with Image.open(BytesIO(data)) as image:
+        size = image.size
+        if getattr(image, "is_animated", False):
+            return _prepared(content_hash, mime_type, data, len(data), size)
+
+        # Recompressing drops the EXIF block, so rotated photos are turned upright first
+        image = ImageOps.exif_transpose(image)
+        resized = max(image.size) > max_dimension
+        if resized:
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        out = BytesIO()
+        if mime_type == "image/jpeg":
+            image.convert("RGB").save(out, format="JPEG", quality=quality, optimize=True)
+        elif mime_type == "image/webp":
+            image.save(out, format="WEBP", quality=quality)
+        else:
+            mime_type = "image/png"
+            image.save(out, format="PNG", optimize=True)
+
+        # Keep the original unless the image had to be resized or recompressing paid off
+        if not resized and out.tell() >= len(data):
+            return _prepared(content_hash, detect_image_type(data), data, len(data), image.size)
+        return _prepared(content_hash, mime_type, out.getvalue(), len(data), image.size)
+
+
+def upload_image(prepared: PreparedImage, report: ImageReport = None) -> str:
+    """Uploads a prepared image through the Files API (purpose "vision") once per content hash."""
+    # The same original prepared with other settings is a different upload
+    key = (prepared.content_hash, prepared.mime_type, len(prepared.data))
+    file_id = uploaded_file_cache.get(key)
+    if file_id:
+        return file_id
+
+    with _upload_lock:
+        file_id = uploaded_file_cache.get(key)
+        if file_id:
+            return file_id
+
+        from infrastructure.gpt.files_intake.vector_db import get_openai_client
+
+        extension = prepared.mime_type.split("/")[1]
+        uploaded = get_openai_client().files.create(
+            file=(f"{prepared.content_hash[:16]}.{extension}", prepared.data, prepared.mime_type),
+            purpose="vision"
+        )
+        uploaded_file_cache.set(key, uploaded.id)
+        if report:
+            report.uploaded += 1
+            report.uploaded_bytes += len(prepared.data)
+        return uploaded.id
+
+
+def build_image_items(image_paths: List[str], transport: str = IMAGE_TRANSPORT) -> Tuple[List[dict], ImageReport]:
+    """
+    Returns the `input_image` content items for a request and its ImageReport. With the "file"
+    transport an image reused across turns is uploaded once and referenced by its file id; if
+    the upload fails the image is sent inline instead, and so are all images for the next
+    IMAGE_UPLOAD_RETRY_SECONDS.
+    """
+    global _upload_retry_at
+
+    report = ImageReport()
+    items = []
+    for path in image_paths:
+        prepared = prepare_image(path, report=report)
+
+        if transport == "file" and time.monotonic() >= _upload_retry_at:
+            try:
+                file_id = upload_image(prepared, report)
+                report.payload_bytes += len(file_id)
+                items.append({"type": "input_image", "file_id": file_id})
+                continue
+            except Exception as e:
+                _upload_retry_at = time.monotonic() + IMAGE_UPLOAD_RETRY_SECONDS
+                print(f"⚠️ Image upload failed, sending images inline for {IMAGE_UPLOAD_RETRY_SECONDS:.0f}s: {e}")
+
+        report.payload_bytes += len(prepared.data_url)
+        items.append({"type": "input_image", "image_url": prepared.data_url})
+
+    return items, report
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import threading
+
+from infrastructure.gpt.files_intake.utils.ttl_cache import TTLCache
+
+# How long a response id is remembered together with the static context its conversation already holds
+CONVERSATION_STATE_TTL = float(os.getenv("CONVERSATION_STATE_TTL", str(24 * 3600)))
+CONVERSATION_STATE_SIZE = int(os.getenv("CONVERSATION_STATE_SIZE", "4096"))
+
+# response id → fingerprint of the system/developer messages already in that conversation
+conversation_static_context = TTLCache(max_entries=CONVERSATION_STATE_SIZE, ttl_seconds=CONVERSATION_STATE_TTL)
+
+
+# Stable hash of the static (per assistant/project) messages of a payload
+def static_fingerprint(messages: list) -> str:
+    serialized = json.dumps(messages, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def needs_static_context(previous_response_id: str, fingerprint: str) -> bool:
+    """
+    The Responses API replays every earlier input item of a `previous_response_id` chain, so the
+    system and developer messages only have to be sent when the conversation starts, when they
+    changed, or when the chain was started elsewhere (e.g. before a restart) and is unknown here.
+    """
+    return not previous_response_id or conversation_static_context.get(previous_response_id) != fingerprint
+
+
+def remember_response(response_id: str, fingerprint: str):
+    if response_id:
+        conversation_static_context.set(response_id, fingerprint)
+
+
+class PromptCacheStats:
+    """Running totals of the `usage` blocks, to see how much of the input hit the provider's prompt cache."""
+
+    def __init__(self):
+        self.requests = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, usage: dict) -> dict:
+        usage = usage or {}
+        input_tokens = usage.get("input_tokens", 0)
+        cached_tokens = (usage.get("input_tokens_details") or {}).get("cached_tokens", 0)
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += input_tokens
+            self.cached_tokens += cached_tokens
+            self.output_tokens += usage.get("output_tokens", 0)
+            hit_rate = self.hit_rate()
+        # Reported on the request's trace (see ConsoleExporter), not printed separately
+        return {"input_tokens": input_tokens, "cached_tokens": cached_tokens,
+                "output_tokens": usage.get("output_tokens", 0), "cache_hit_rate": hit_rate}
+
+    def hit_rate(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "input_tokens": self.input_tokens,
+                "cached_tokens": self.cached_tokens,
+                "output_tokens": self.output_tokens,
+                "cached_ratio": self.hit_rate(),
+            }
+
+
+prompt_cache_stats = PromptCacheStats()
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import queue
+import random
+import threading
+import weakref
+
+import httpx
+
+from infrastructure.gpt.configs.assistant_env_config import API_KEY, API_URL
+from infrastructure.gpt.files_intake.utils.lazy import lazy_singleton
+from infrastructure.gpt.utils.tracing import current_trace
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ResponsesClient:
+    """Async, connection-pooled client for the Responses API.
+
+    One `httpx.AsyncClient` (keep-alive, pooled connections) and one concurrency limiter
+    are kept per event loop. Requests failing with 429/5xx or a transport error are retried
+    with exponential backoff and full jitter, honouring `Retry-After` when present.
+    """
+
+    def __init__(self,
+                 api_url: str = API_URL,
+                 api_key: str = API_KEY,
+                 timeout: float = 120.0,
+                 connect_timeout: float = 10.0,
+                 max_connections: int = 20,
+                 max_keepalive_connections: int = 10,
+                 max_concurrency: int = 8,
+                 max_retries: int = 4,
+                 base_delay: float = 0.5,
+                 max_delay: float = 20.0):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # httpx clients and semaphores are bound to the loop they were created on
+        self._per_loop = weakref.WeakKeyDictionary()
+
+    def _loop_state(self):
+        loop = asyncio.get_running_loop()
+        state = self._per_loop.get(loop)
+        if state is None:
+            http_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.api_key}",
+                },
+            )
+            state = (http_client, asyncio.Semaphore(self.max_concurrency))
+            self._per_loop[loop] = state
+        return state
+
+    def _retry_delay(self, attempt: int, response: httpx.Response = None) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    # POST a payload, retrying transient failures; returns the final httpx.Response
+    async def post(self, payload: dict) -> httpx.Response:
+        http_client, semaphore = self._loop_state()
+        # Serialized once, so retries and the size reported to the trace don't encode it again
+        body = _encode(payload)
+
+        attempt = 0
+        while True:
+            response = None
+            try:
+                async with semaphore:
+                    response = await http_client.post(self.api_url, content=body)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    _trace_http(len(body), attempt, response)
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    _trace_http(len(body), attempt)
+                    raise
+                reason = e.__class__.__name__
+
+            delay = self._retry_delay(attempt, response)
+            print(f"⏳ Responses API request failed ({reason}), retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    # POST a payload with "stream": true and yield the server-sent events as dicts
+    async def stream(self, payload: dict):
+        """
+        Retries apply only until the response headers arrive; once events are flowing a failure
+        is reported to the caller. A non-200 answer is yielded as {"type": "error", ...}.
+        """
+        http_client, semaphore = self._loop_state()
+        body = _encode({**payload, "stream": True})
+
+        attempt = 0
+        while True:
+            async with semaphore:
+                try:
+                    async with http_client.stream("POST", self.api_url, content=body) as response:
+                        if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                            await response.aread()
+                            delay = self._retry_delay(attempt, response)
+                            reason = f"HTTP {response.status_code}"
+                        elif response.status_code != 200:
+                            _trace_http(len(body), attempt, response)
+                            message = (await response.aread()).decode("utf-8", "replace")
+                            yield {"type": "error", "status": response.status_code, "message": message}
+                            return
+                        else:
+                            _trace_http(len(body), attempt, response)
+                            async for event in _iter_sse_events(response):
+                                yield event
+                            return
+                except httpx.TransportError as e:
+                    if attempt >= self.max_retries:
+                        _trace_http(len(body), attempt)
+                        raise
+                    delay = self._retry_delay(attempt)
+                    reason = e.__class__.__name__
+
+            print(f"⏳ Responses API stream failed ({reason}), retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    # Close the pooled connections of the current event loop
+    async def aclose(self):
+        state = self._per_loop.pop(asyncio.get_running_loop(), None)
+        if state:
+            await state[0].aclose()
+
+
+# Same encoding httpx uses for json=
+def _encode(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+# Request size, retries and status of the final attempt, on the trace of the current request
+def _trace_http(request_bytes: int, retries: int, response: httpx.Response = None):
+    trace = current_trace()
+    if trace is not None:
+        trace.set(request_bytes=request_bytes, retries=retries)
+        if response is not None:
+            trace.set(status=response.status_code)
+
+
+# Parse a text/event-stream body; each event's `data:` lines hold one JSON document
+async def _iter_sse_events(response: httpx.Response):
+    data_lines = []
+    async for line in response.aiter_lines():
+        if line.startswith("data:"):
+            data_lines.append(line[5:].strip())
+        elif not line and data_lines:
+            data = "\n".join(data_lines)
+            data_lines = []
+            if data != "[DONE]":
+                yield json.loads(data)
+    if data_lines and data_lines != ["[DONE]"]:
+        yield json.loads("\n".join(data_lines))
+
+
+#--------------------------Background Event Loop for Sync Callers--------------------------------------------------------
+
+# Sync callers (Tk GUI, scripts) share one long-lived loop, so pooled connections survive between calls
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="responses-client-loop", daemon=True).start()
+        return _loop
+
+
+# Run a coroutine on the background loop and block until it finishes
+def run_sync(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+# Iterate an async generator from sync code, items are produced on the background loop
+def iterate_sync(async_gen):
+    items = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in async_gen:
+                items.put(item)
+        except Exception as e:
+            items.put(e)
+        finally:
+            items.put(done)
+
+    asyncio.run_coroutine_threadsafe(pump(), _background_loop())
+    while True:
+        item = items.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+@lazy_singleton
+def get_responses_client() -> ResponsesClient:
+    return ResponsesClient()
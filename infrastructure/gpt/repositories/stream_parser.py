@@ -0,0 +1,146 @@
+import json
+from typing import Iterable, List, Tuple
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class StreamingJsonAssembler:
+    """Incrementally reassembles the strict `json_schema` output streamed by the Responses API.
+
+    Text deltas are fed as they arrive. `feed` returns the updates that became available:
+
+    - `("text", field, delta)` for string fields listed in `stream_fields` (top-level keys such
+      as `friendly_message`), so they can be shown while still being generated;
+    - `("item", array_key, item)` whenever an object or array element of any array (goals,
+      questions, recommendations, table rows, ...) is complete. Primitive elements (strings,
+      numbers, ...) are not reported; they are only available through `result()`.
+
+    `result()` returns the fully parsed object once the stream is finished.
+    """
+
+    def __init__(self, stream_fields: Iterable[str] = ("friendly_message",)):
+        self.stream_fields = set(stream_fields)
+        self.buffer = []
+        self.length = 0
+
+        # Stack frames: [container type, key of the container in its parent, start offset,
+        #                current key (objects), expecting a key (objects)]
+        self.stack: List[list] = []
+        self.in_string = False
+        self.string_is_key = False
+        self.string_chars: List[str] = []
+        self.escape = None  # None, "" after a backslash, or the collected \u hex digits
+        self.high_surrogate = None  # first half of a \uD83D\uDE00 pair, until the second arrives
+        self.streaming_field = None
+
+    #------------------Helpers-----------------------------------------------------------------
+
+    # Raw text from `start` to the end of the buffer, without re-joining what came before it
+    def _text(self, start: int = 0) -> str:
+        return "".join(self.buffer[start:])
+
+    # Key under which the value currently being parsed lives
+    def _value_key(self):
+        if not self.stack:
+            return None
+        frame = self.stack[-1]
+        return frame[3] if frame[0] == "object" else frame[1]
+
+    def _decode_char(self, char: str):
+        """Returns the decoded text for a string char, or None while inside an escape."""
+        if self.escape is None:
+            if char == "\\":
+                self.escape = ""
+                return None
+            return self._after_surrogate(char)
+
+        if self.escape == "":
+            if char == "u":
+                self.escape = "u"
+                return None
+            self.escape = None
+            return self._after_surrogate(_ESCAPES.get(char, char))
+
+        # Collecting the 4 hex digits of a \uXXXX escape
+        self.escape += char
+        if len(self.escape) < 5:
+            return None
+        code = int(self.escape[1:], 16)
+        self.escape = None
+        if 0xD800 <= code <= 0xDBFF:
+            # High surrogate: wait for the low one (emoji and other characters outside the BMP)
+            pending, self.high_surrogate = self.high_surrogate, chr(code)
+            return pending
+        if 0xDC00 <= code <= 0xDFFF and self.high_surrogate:
+            high, self.high_surrogate = self.high_surrogate, None
+            return chr(0x10000 + ((ord(high) - 0xD800) << 10) + (code - 0xDC00))
+        return self._after_surrogate(chr(code))
+
+    # Prefix a decoded char with a high surrogate that was not followed by its low half (kept as is, like json.loads)
+    def _after_surrogate(self, text: str) -> str:
+        if self.high_surrogate:
+            text, self.high_surrogate = self.high_surrogate + text, None
+        return text
+
+    #------------------Public API---------------------------------------------------------------
+
+    def feed(self, delta: str) -> List[Tuple]:
+        updates = []
+        streamed = []
+
+        for char in delta:
+            offset = self.length
+            self.buffer.append(char)
+            self.length += 1
+
+            if self.in_string:
+                if self.escape is None and char == '"':
+                    self.in_string = False
+                    if self.high_surrogate:
+                        self.string_chars.append(self._after_surrogate(""))
+                        if self.streaming_field:
+                            streamed.append(self.string_chars[-1])
+                    value = "".join(self.string_chars)
+                    if self.string_is_key:
+                        self.stack[-1][3] = value
+                    if streamed:
+                        updates.append(("text", self.streaming_field, "".join(streamed)))
+                        streamed = []
+                    self.string_chars = []
+                    self.streaming_field = None
+                    continue
+                decoded = self._decode_char(char)
+                if decoded is not None:
+                    self.string_chars.append(decoded)
+                    if self.streaming_field:
+                        streamed.append(decoded)
+                continue
+
+            if char == '"':
+                self.in_string = True
+                frame = self.stack[-1] if self.stack else None
+                self.string_is_key = bool(frame and frame[0] == "object" and frame[4])
+                if (not self.string_is_key and len(self.stack) == 1
+                        and self._value_key() in self.stream_fields):
+                    self.streaming_field = self._value_key()
+            elif char in "{[":
+                container = "object" if char == "{" else "array"
+                self.stack.append([container, self._value_key(), offset, None, container == "object"])
+            elif char in "}]":
+                frame = self.stack.pop()
+                parent = self.stack[-1] if self.stack else None
+                if parent and parent[0] == "array":
+                    item = json.loads(self._text(frame[2]))
+                    updates.append(("item", parent[1], item))
+            elif char == ":":
+                self.stack[-1][4] = False
+            elif char == ",":
+                if self.stack and self.stack[-1][0] == "object":
+                    self.stack[-1][4] = True
+
+        if streamed:
+            updates.append(("text", self.streaming_field, "".join(streamed)))
+        return updates
+
+    def result(self):
+        return json.loads(self._text())
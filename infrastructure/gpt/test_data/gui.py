@@ -9,11 +9,16 @@ from urllib.parse import urlparse
 import os
 import shutil
 
+# Background streaming of assistant responses
+import json
+import queue
+import threading
+
 # Assistant types (enum)
 from infrastructure.gpt.models.assistant_name import AssistantName
 
-# GPT request handler
-from infrastructure.gpt.repositories.assistant_gpt_repository import send_request
+# GPT request handler (streaming variant, so the response box updates while the model generates)
+from infrastructure.gpt.repositories.assistant_gpt_repository import stream_request
 
 # File processing functions (PDF, DOCX, spreadsheet, websites)
 from infrastructure.gpt.files_intake.vector_db import process_single_pdf, process_all_supported_files_in_folder, \
@@ -112,24 +117,75 @@ class AssistantApp:
         print(f"[DEBUG] Assistant: {assistant_name}")
         print(f"[DEBUG] Attached Images: {self.image_paths}")
 
-        # Send the request to the assistant backend
-        response_text, response_id = send_request(
-            prompt=prompt,
-            assistant_name=assistant_name,
-            previous_response_id=self.response_id,
-            image_paths=self.image_paths 
-        )
-
-        # Update the response_id for future interactions
-        self.response_id = response_id
-        print(f"Stored response_id: {self.response_id}")
-
+        image_paths = self.image_paths
         # Clear after sending
         self.image_paths = []
 
-        # Display the response in the output text box
+        self.send_button.config(state=tk.DISABLED)
+        self.response_box.delete("1.0", tk.END)
+
+        # Stream the request in a worker thread; Tk widgets are only touched from the main loop
+        updates = queue.Queue()
+        threading.Thread(
+            target=self._stream_response_worker,
+            args=(prompt, assistant_name, self.response_id, image_paths, updates),
+            daemon=True
+        ).start()
+        self.root.after(50, self._poll_stream_updates, updates, {"message": "", "items": []})
+
+    # Worker thread: forward streamed updates to the GUI queue
+    def _stream_response_worker(self, prompt, assistant_name, previous_response_id, image_paths, updates):
+        try:
+            for update in stream_request(
+                prompt=prompt,
+                assistant_name=assistant_name,
+                previous_response_id=previous_response_id,
+                image_paths=image_paths
+            ):
+                updates.put(update)
+        except Exception as e:
+            updates.put(("error", f"Error: {e}"))
+
+    # Main loop: render streamed partial output until the response is complete
+    def _poll_stream_updates(self, updates, partial):
+        finished = False
+        changed = False
+
+        while not updates.empty():
+            update = updates.get_nowait()
+            kind = update[0]
+
+            if kind == "text":
+                partial["message"] += update[2]
+                changed = True
+            elif kind == "item":
+                partial["items"].append(f"[{update[1]}] {json.dumps(update[2])}")
+                changed = True
+            elif kind == "done":
+                _, response_text, response_id, timings = update
+                # Update the response_id for future interactions
+                self.response_id = response_id
+                print(f"Stored response_id: {self.response_id}")
+                print(f"⏱️ Timings: {timings}")
+                self._show_response(response_text)
+                finished = True
+            elif kind == "error":
+                self.response_id = None
+                self._show_response(update[1])
+                finished = True
+
+        if finished:
+            self.send_button.config(state=tk.NORMAL)
+            return
+
+        if changed:
+            self._show_response("\n\n".join([partial["message"], *partial["items"]]))
+        self.root.after(50, self._poll_stream_updates, updates, partial)
+
+    # Display text in the output text box
+    def _show_response(self, text):
         self.response_box.delete("1.0", tk.END)
-        self.response_box.insert(tk.END, response_text)
+        self.response_box.insert(tk.END, text)
 
     #Upload and Process File(s)
     def upload_file(self):
@@ -0,0 +1,271 @@
+# Local stand-in for the OpenAI API, used to exercise the pipelines without network access or API costs.
+#
+#   python -m infrastructure.gpt.test_data.mock_openai_server --port 8089
+#   export OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Deterministic unit vector derived from the text, so repeated runs produce identical embeddings
+def fake_embedding(text: str, dimensions: int = 3072) -> list[float]:
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    vector = [rng.uniform(-1.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+# Minimal instance of a JSON schema, used to answer structured-output requests
+def fake_instance(schema: dict, label: str = "mock"):
+    kind = schema.get("type")
+    if kind == "object":
+        return {key: fake_instance(value, key) for key, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [fake_instance(schema.get("items", {}), label)]
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return True
+    return f"Mock {label.replace('_', ' ')}"
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    server_version = "MockOpenAI/1.0"
+    # Keep-alive, like the real API (streamed answers close the connection when done)
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    # Every `rate_limit_every`-th request is answered with a 429 to exercise client backoff
+    def _should_rate_limit(self) -> bool:
+        every = self.server.rate_limit_every
+        if not every:
+            return False
+        with self.server.lock:
+            self.server.request_count += 1
+            return self.server.request_count % every == 0
+
+    # Simulated service time of the endpoint, with +/- `latency_jitter` relative variation
+    def _simulate_latency(self, seconds: float):
+        if seconds > 0:
+            jitter = self.server.latency_jitter
+            time.sleep(seconds * random.uniform(1 - jitter, 1 + jitter))
+
+    def do_POST(self):
+        if self._should_rate_limit():
+            # Consume the body, or it would be read as the next request on this keep-alive connection
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                            headers={"Retry-After": "0.1"})
+            return
+
+        if self.path.rstrip("/").endswith("/embeddings"):
+            body = self._read_json()
+            self._simulate_latency(self.server.embedding_latency)
+            self._handle_embeddings(body)
+        elif self.path.rstrip("/").endswith("/responses"):
+            body = self._read_json()
+            self._simulate_latency(self.server.response_latency)
+            self._handle_responses(body)
+        elif self.path.rstrip("/").endswith("/files"):
+            self._handle_file_upload()
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _handle_embeddings(self, body: dict):
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = body.get("dimensions") or self.server.dimensions
+        with self.server.lock:
+            self.server.embedding_batches.append(inputs)
+
+        data = [
+            {"object": "embedding", "index": i, "embedding": fake_embedding(text, dimensions)}
+            for i, text in enumerate(inputs)
+        ]
+        tokens = sum(len(text.split()) for text in inputs)
+        self._send_json(200, {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-3-large"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    # Accept a multipart file upload; the id is derived from the body, so identical uploads get the same id
+    def _handle_file_upload(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        with self.server.lock:
+            self.server.upload_count += 1
+        self._send_json(200, {
+            "id": f"file-mock{hashlib.sha256(body).hexdigest()[:24]}",
+            "object": "file",
+            "bytes": length,
+            "purpose": "vision",
+            "status": "processed",
+        })
+
+    # Answer a Responses API request with an instance of the requested json_schema
+    def _handle_responses(self, body: dict):
+        schema = body.get("text", {}).get("format", {}).get("schema", {"type": "string"})
+        output_text = json.dumps(fake_instance(schema))
+
+        with self.server.lock:
+            self.server.response_count += 1
+            response_id = f"resp_mock_{self.server.response_count:06d}"
+
+        input_tokens, cached_tokens = self._prompt_tokens(body)
+        output_tokens = len(output_text) // 4
+        with self.server.lock:
+            # A chained request replays the whole conversation so far
+            self.server.conversation_tokens[response_id] = input_tokens + output_tokens
+        response = {
+            "id": response_id,
+            "object": "response",
+            "status": "completed",
+            "model": body.get("model", "gpt-4o"),
+            "previous_response_id": body.get("previous_response_id"),
+            "output": [{
+                "type": "message",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": output_text}],
+            }],
+            "usage": {
+                "input_tokens": input_tokens,
+                "input_tokens_details": {"cached_tokens": cached_tokens},
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        }
+
+        if body.get("stream"):
+            self._stream_response(response, output_text)
+        else:
+            self._send_json(200, response)
+
+    # Input tokens (~4 characters each) and the part of them served from a simulated prompt cache
+    def _prompt_tokens(self, body: dict):
+        """
+        Like the real cache: the replayed conversation of a `previous_response_id` and any message
+        prefix seen before count as cached, once the cached prefix reaches 1024 tokens, in 128-token steps.
+        """
+        messages = body.get("input", [])
+        if isinstance(messages, str):
+            messages = [messages]
+
+        with self.server.lock:
+            history = self.server.conversation_tokens.get(body.get("previous_response_id"), 0)
+            prefix, cached_chars, contiguous = body.get("prompt_cache_key", ""), 0, True
+            for message in messages:
+                part = json.dumps(message, sort_keys=True)
+                prefix += part
+                key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+                # Only a prefix counts: the first message never seen before ends the cached part
+                contiguous = contiguous and key in self.server.seen_prefixes
+                cached_chars += len(part) if contiguous else 0
+                self.server.seen_prefixes.add(key)
+
+        new_tokens = len(json.dumps(messages)) // 4
+        cached = history + cached_chars // 4
+        cached = cached // 128 * 128 if cached >= 1024 else 0
+        return history + new_tokens, min(cached, history + new_tokens)
+
+    # Send the response as server-sent events, splitting the output text into small deltas
+    def _stream_response(self, response: dict, output_text: str, delta_size: int = 12):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send_event(event: dict):
+            self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        send_event({"type": "response.created", "response": {**response, "status": "in_progress", "output": []}})
+        for start in range(0, len(output_text), delta_size):
+            send_event({"type": "response.output_text.delta", "output_index": 0, "content_index": 0,
+                        "delta": output_text[start:start + delta_size]})
+        send_event({"type": "response.output_text.done", "output_index": 0, "content_index": 0, "text": output_text})
+        send_event({"type": "response.completed", "response": response})
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, dimensions: int = 3072,
+                 rate_limit_every: int = 0, verbose: bool = False,
+                 response_latency: float = 0.0, embedding_latency: float = 0.0, latency_jitter: float = 0.0):
+        super().__init__((host, port), MockOpenAIHandler)
+        self.dimensions = dimensions
+        self.rate_limit_every = rate_limit_every
+        self.verbose = verbose
+        # Seconds before a Responses/Embeddings request is answered (time to the full response, not to first token)
+        self.response_latency = response_latency
+        self.embedding_latency = embedding_latency
+        self.latency_jitter = latency_jitter
+        self.request_count = 0
+        self.response_count = 0
+        self.upload_count = 0
+        # Inputs of every answered embeddings request, in arrival order
+        self.embedding_batches = []
+        self.conversation_tokens = {}
+        self.seen_prefixes = set()
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    # Serve from a daemon thread, e.g. inside a benchmark
+    def start_in_background(self) -> "MockOpenAIServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--dimensions", type=int, default=3072)
+    parser.add_argument("--rate-limit-every", type=int, default=0,
+                        help="Answer every N-th request with HTTP 429 (0 disables)")
+    parser.add_argument("--response-latency-ms", type=float, default=0.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0,
+                        help="Relative variation of the latencies, e.g. 0.2 for +/-20%%")
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(args.host, args.port, args.dimensions, args.rate_limit_every, verbose=True,
+                              response_latency=args.response_latency_ms / 1000,
+                              embedding_latency=args.embedding_latency_ms / 1000,
+                              latency_jitter=args.latency_jitter)
+    print(f"🧪 Mock OpenAI API listening on {server.base_url}")
+    server.serve_forever()
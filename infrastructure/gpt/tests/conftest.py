@@ -0,0 +1,11 @@
+import pytest
+
+from infrastructure.gpt.test_data.mock_openai_server import MockOpenAIServer
+
+
+@pytest.fixture
+def mock_openai():
+    server = MockOpenAIServer(dimensions=8).start_in_background()
+    yield server
+    server.shutdown()
+    server.server_close()
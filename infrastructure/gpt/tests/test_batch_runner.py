@@ -0,0 +1,73 @@
+import json
+import sys
+
+import pytest
+
+from infrastructure.gpt.repositories import batch_runner
+from infrastructure.gpt.repositories.batch_runner import load_checkpoint, load_jobs, run_batch_async
+from infrastructure.gpt.repositories.responses_client import ResponsesClient, run_sync
+
+
+def write_jobs(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": f"job-{i}", "assistant": "SUMMARIZING", "prompt": f"Summarize session {i}",
+                                "developer_context": "Session notes"}) + "\n")
+    return str(path)
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def client_factory(mock_openai, monkeypatch):
+    """ResponsesClient pointed at the mock server, also for clients the runner creates itself."""
+
+    def make(**kwargs):
+        return ResponsesClient(api_url=f"{mock_openai.base_url}/responses", api_key="test",
+                               **{"base_delay": 0.01, **kwargs})
+
+    monkeypatch.setattr(batch_runner, "ResponsesClient", make)
+    return make
+
+
+def test_resume_skips_answered_jobs_and_retries_failed_ones(tmp_path, client_factory):
+    jobs = load_jobs(write_jobs(tmp_path / "jobs.jsonl", 3))
+    output = str(tmp_path / "results.jsonl")
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "job-0", "status": "ok"}) + "\n")
+        f.write(json.dumps({"id": "job-1", "status": "failed"}) + "\n")
+        f.write('{"id": "job-2", "sta')  # cut off when the previous run was killed
+
+    report = run_sync(run_batch_async(jobs, output))
+
+    assert (report.skipped, report.succeeded, report.failed) == (1, 2, 0)
+    assert load_checkpoint(output) == {"job-0", "job-1", "job-2"}
+
+
+def test_restart_ignores_earlier_results(tmp_path, client_factory):
+    jobs = load_jobs(write_jobs(tmp_path / "jobs.jsonl", 2))
+    output = str(tmp_path / "results.jsonl")
+    run_sync(run_batch_async(jobs, output))
+
+    report = run_sync(run_batch_async(jobs, output, resume=False))
+    assert (report.skipped, report.succeeded) == (0, 2)
+    assert sorted(record["id"] for record in read_records(output)) == ["job-0", "job-1"]
+
+
+@pytest.mark.parametrize("rate_limited, exit_code", [(False, 0), (True, 1)])
+def test_exit_code_reports_failed_jobs(tmp_path, mock_openai, client_factory, monkeypatch, rate_limited, exit_code):
+    jobs_path = write_jobs(tmp_path / "jobs.jsonl", 2)
+    output = tmp_path / "results.jsonl"
+    if rate_limited:
+        mock_openai.rate_limit_every = 1
+        monkeypatch.setattr(batch_runner, "ResponsesClient", lambda **kwargs: client_factory(max_retries=0, **kwargs))
+    monkeypatch.setattr(sys, "argv", ["batch_runner", jobs_path, "--output", str(output)])
+
+    with pytest.raises(SystemExit) as exit_info:
+        batch_runner.main()
+
+    assert exit_info.value.code == exit_code
+    assert {record["status"] for record in read_records(output)} == {"failed" if rate_limited else "ok"}
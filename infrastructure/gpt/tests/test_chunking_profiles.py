@@ -0,0 +1,19 @@
+from infrastructure.gpt.configs import chunking_profiles
+from infrastructure.gpt.configs.chunking_profiles import get_chunking_profile
+
+
+def test_spreadsheets_are_chunked_by_rows():
+    for file_type in ("spreadsheet", "excel", "csv"):
+        assert get_chunking_profile(file_type).strategy == "table_rows"
+
+
+def test_unknown_file_types_use_the_document_profile():
+    assert get_chunking_profile("pdf").name == "document"
+    assert get_chunking_profile("unknown").name == "document"
+
+
+def test_override_applies_to_prose_but_not_to_spreadsheets(monkeypatch):
+    monkeypatch.setattr(chunking_profiles, "CHUNKING_PROFILE_OVERRIDE", "legacy")
+    assert get_chunking_profile("pdf").name == "legacy"
+    assert get_chunking_profile("webpage").name == "legacy"
+    assert get_chunking_profile("spreadsheet").strategy == "table_rows"
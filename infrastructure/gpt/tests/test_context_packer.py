@@ -0,0 +1,55 @@
+from infrastructure.gpt.files_intake.context_packer import pack_context, query_terms, split_sentences
+
+
+# One token per word keeps the budgets in these tests easy to follow
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def test_split_sentences():
+    assert split_sentences("First one. Second one!\nThird line\n\n") == ["First one.", "Second one!", "Third line"]
+
+
+def test_identifiers_weigh_more():
+    terms = query_terms("Why does D-003 fail in PaymentGateway on ios?")
+    assert terms["d-003"] == 3.0 and terms["paymentgateway"] == 3.0
+    assert terms["fail"] == 1.0 and "on" not in terms
+
+
+def test_chunks_within_budget_are_kept_whole_with_their_source():
+    packed = pack_context([("Login works. Logout works.", "Source: a.pdf"), ("Search is slow.", "Source: b.pdf")],
+                          "login", count_words, budget=100)
+    assert packed.text == "Login works. Logout works.\nSource: a.pdf\n\nSearch is slow.\nSource: b.pdf"
+    assert (packed.chunks, packed.trimmed, packed.duplicates, packed.dropped) == (2, 0, 0, 0)
+    # Newlines are counted as a token each, so the estimate never undercounts
+    assert packed.tokens >= count_words(packed.text)
+
+
+def test_repeated_sentences_are_paid_for_once():
+    first = "The cart total is wrong. Coupons are applied twice."
+    packed = pack_context([
+        (first, "Source: page-1"),
+        (first + " Shipping is free.", "Source: page-2"),  # overlapping neighbour: only its new sentence
+        (first, "Source: copy"),                           # same content under another URL: dropped
+    ], "cart coupons", count_words, budget=100)
+    assert packed.text.count("Coupons are applied twice.") == 1
+    assert "Shipping is free.\nSource: page-2" in packed.text
+    assert packed.duplicates == 1 and packed.chunks == 2
+
+
+def test_long_chunk_keeps_the_sentences_matching_the_query():
+    filler = " ".join(f"Unrelated sentence number {i}." for i in range(20))
+    text = f"{filler} Error D-003 appears after checkout. {filler}"
+    packed = pack_context([(text, "Source: log.txt")], "What causes D-003?", count_words,
+                          budget=100, max_chunk_tokens=20)
+    assert packed.text == "Error D-003 appears after checkout.\nSource: log.txt"
+    assert packed.trimmed == 1 and packed.tokens <= 20
+
+
+def test_chunks_over_budget_are_dropped():
+    chunks = [(f"Chunk {i} talks about payments here.", f"Source: {i}") for i in range(10)]
+    packed = pack_context(chunks, "payments", count_words, budget=20)
+    assert packed.tokens <= 20
+    assert packed.chunks + packed.dropped + packed.duplicates == 10
+    assert packed.dropped > 0
+    assert packed.text.startswith("Chunk 0")
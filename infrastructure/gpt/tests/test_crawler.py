@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+
+from infrastructure.gpt.files_intake.utils.crawler import AsyncCrawler, canonicalize_url
+
+
+def links(*paths):
+    return "<html><body>" + "".join(f'<a href="{path}">{path}</a>' for path in paths) + "</body></html>"
+
+
+def make_crawler(routes, requests=None, **kwargs):
+    """Crawler whose requests are answered from `routes`: path → (status, body[, headers])."""
+
+    def handler(request):
+        if requests is not None:
+            requests.append(request.url.path)
+        status, body, *headers = routes.get(request.url.path, (404, ""))
+        headers = {"Content-Type": "text/html", **(headers[0] if headers else {})}
+        return httpx.Response(status, text=body, headers=headers)
+
+    crawler = AsyncCrawler(**kwargs)
+    crawler._client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+    return crawler
+
+
+def crawled_urls(crawler, start="https://example.com/"):
+    return sorted(page.url for page in asyncio.run(crawler.crawl(start)))
+
+
+def test_robots_txt_is_fetched_once_per_host():
+    requests = []
+    routes = {"/": (200, links("/a", "/b", "/c", "/d")), "/robots.txt": (200, "User-agent: *\nDisallow: /d\n")}
+    for path in "abcd":
+        routes[f"/{path}"] = (200, links("/"))
+    crawler = make_crawler(routes, requests, max_workers=4)
+
+    assert crawled_urls(crawler) == [f"https://example.com/{path}" for path in ("", "a", "b", "c")]
+    assert requests.count("/robots.txt") == 1
+    assert crawler.disallowed == ["https://example.com/d"]
+
+
+@pytest.mark.parametrize("status, allowed", [(404, True), (410, True), (401, False), (403, False), (503, False)])
+def test_robots_txt_status_decides_access(status, allowed):
+    crawler = make_crawler({"/": (200, links()), "/robots.txt": (status, "")})
+    assert crawled_urls(crawler) == (["https://example.com/"] if allowed else [])
+    assert crawler.disallowed == ([] if allowed else ["https://example.com/"])
+
+
+def test_redirects_off_the_site_are_not_kept():
+    def handler(request):
+        if request.url.host == "example.com" and request.url.path == "/out":
+            return httpx.Response(302, headers={"Location": "https://other.org/landing"})
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        body = links("/out", "/in") if request.url.path == "/" else links()
+        return httpx.Response(200, text=body, headers={"Content-Type": "text/html"})
+
+    crawler = AsyncCrawler()
+    crawler._client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+    assert crawled_urls(crawler) == ["https://example.com/", "https://example.com/in"]
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://Example.COM:443/Docs?b=2&a=1#intro", "https://example.com/Docs?a=1&b=2"),
+    ("http://example.com:8080", "http://example.com:8080/"),
+    ("https://example.com/p?utm_source=x&gclid=1&id=7", "https://example.com/p?id=7"),
+    ("mailto:qa@example.com", None),
+    ("javascript:void(0)", None),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_relative_links_are_resolved_against_the_page():
+    assert canonicalize_url("../b#top", "https://example.com/docs/a/") == "https://example.com/docs/b"
+
+
+def test_each_page_is_visited_once_across_url_variants():
+    requests = []
+    routes = {
+        "/": (200, links("/a", "/a#x", "/A/../a", "/a?utm_medium=mail", "/b")),
+        "/a": (200, links("/", "/b")),
+        "/b": (200, links("/a")),
+    }
+    crawler = make_crawler(routes, requests)
+
+    assert crawled_urls(crawler) == ["https://example.com/", "https://example.com/a", "https://example.com/b"]
+    assert sorted(path for path in requests if path != "/robots.txt") == ["/", "/a", "/b"]
+    assert crawler.complete
+
+
+def test_max_depth_stops_the_frontier_and_marks_the_crawl_incomplete():
+    routes = {"/": (200, links("/1")), "/1": (200, links("/2")), "/2": (200, links("/3")), "/3": (200, links())}
+    crawler = make_crawler(routes, max_depth=1)
+
+    assert crawled_urls(crawler) == ["https://example.com/", "https://example.com/1"]
+    assert crawler.depth_limited and not crawler.complete
+
+
+def test_max_links_caps_the_crawl():
+    routes = {"/": (200, links(*(f"/{i}" for i in range(10))))}
+    for i in range(10):
+        routes[f"/{i}"] = (200, links())
+    crawler = make_crawler(routes, max_links=4)
+
+    assert len(crawled_urls(crawler)) == 4
+    assert not crawler.complete
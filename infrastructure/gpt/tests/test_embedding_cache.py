@@ -0,0 +1,53 @@
+import itertools
+
+import pytest
+
+from infrastructure.gpt.files_intake.utils import embedding_cache
+from infrastructure.gpt.files_intake.utils.embedding_cache import EmbeddingCache
+
+
+class Clock:
+    """Strictly increasing time.time(), so access order never ties."""
+
+    def __init__(self):
+        self.ticks = itertools.count(1)
+
+    def time(self):
+        return float(next(self.ticks))
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "time", Clock())
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_hits_and_misses_are_counted_per_text(cache):
+    cache.put_many("model", ["a"], [[0.5, 0.25]])
+    assert cache.get_many("model", ["a", "b", "a"]) == [[0.5, 0.25], None, [0.5, 0.25]]
+    # Another model never shares vectors
+    assert cache.get_many("other", ["a"]) == [None]
+    assert cache.stats() == {"hits": 2, "misses": 2, "hit_rate": 0.5, "entries": 1, "max_entries": 2}
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.put_many("model", ["a"], [[1.0]])
+    cache.put_many("model", ["b"], [[2.0]])
+    cache.get_many("model", ["a"])          # "a" is now more recent than "b"
+    cache.put_many("model", ["c"], [[3.0]])
+
+    assert cache.get_many("model", ["a", "b", "c"]) == [[1.0], None, [3.0]]
+    assert cache.stats()["entries"] == 2
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = tmp_path / "embeddings.sqlite"
+    first = EmbeddingCache(path)
+    first.put_many("model", ["a"], [[0.5]])
+    first.close()
+
+    second = EmbeddingCache(path)
+    assert second.get_many("model", ["a"]) == [[0.5]]
+    second.close()
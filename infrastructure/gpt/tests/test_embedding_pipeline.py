@@ -0,0 +1,62 @@
+import openai
+import pytest
+
+from infrastructure.gpt.files_intake.embedding_pipeline import EmbeddingPipeline
+from infrastructure.gpt.test_data.mock_openai_server import fake_embedding
+
+
+class WordTokenizer:
+    """One token per word, so the limits in these tests are easy to follow."""
+
+    def count_tokens_batch(self, texts):
+        return [len(text.split()) for text in texts]
+
+    def truncate(self, text, max_tokens):
+        return " ".join(text.split()[:max_tokens])
+
+
+def make_pipeline(server, **kwargs):
+    client = openai.OpenAI(base_url=server.base_url, api_key="test")
+    return EmbeddingPipeline(client, WordTokenizer(), max_workers=1, base_delay=0.01, **kwargs)
+
+
+def test_batches_respect_the_token_limit(mock_openai):
+    texts = [f"chunk {i} " + "word " * 3 for i in range(10)]   # 5 tokens each
+    vectors = make_pipeline(mock_openai, max_batch_tokens=12).embed(texts)
+
+    assert vectors == [fake_embedding(text, 8) for text in texts]
+    assert [len(batch) for batch in mock_openai.embedding_batches] == [2, 2, 2, 2, 2]
+
+
+def test_batches_respect_the_input_limit(mock_openai):
+    texts = [f"chunk {i}" for i in range(5)]
+    make_pipeline(mock_openai, max_batch_inputs=2).embed(texts)
+
+    assert [len(batch) for batch in mock_openai.embedding_batches] == [2, 2, 1]
+
+
+def test_oversized_inputs_are_truncated(mock_openai):
+    long_text = " ".join(f"w{i}" for i in range(EmbeddingPipeline.MAX_TOKENS_PER_INPUT + 50))
+    vectors = make_pipeline(mock_openai).embed(["short text", long_text])
+
+    truncated = " ".join(f"w{i}" for i in range(EmbeddingPipeline.MAX_TOKENS_PER_INPUT))
+    assert mock_openai.embedding_batches == [["short text", truncated]]
+    assert vectors[1] == fake_embedding(truncated, 8)
+
+
+def test_rate_limited_requests_are_retried(mock_openai):
+    mock_openai.rate_limit_every = 2
+    texts = [f"chunk {i}" for i in range(4)]
+    vectors = make_pipeline(mock_openai, max_batch_inputs=1).embed(texts)
+
+    assert vectors == [fake_embedding(text, 8) for text in texts]
+    # Every second request got a 429 and was sent again
+    assert mock_openai.request_count == 7
+    assert len(mock_openai.embedding_batches) == 4
+
+
+def test_rate_limit_error_is_raised_after_the_last_retry(mock_openai):
+    mock_openai.rate_limit_every = 1
+    with pytest.raises(openai.RateLimitError):
+        make_pipeline(mock_openai, max_retries=1).embed(["chunk"])
+    assert mock_openai.request_count == 2
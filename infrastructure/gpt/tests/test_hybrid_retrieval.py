@@ -0,0 +1,58 @@
+import pytest
+
+from infrastructure.gpt.files_intake.retrieval import hybrid_search_chunks, reciprocal_rank_fusion
+from infrastructure.gpt.files_intake.vector_db import create_text_index
+
+pd = pytest.importorskip("pandas")
+lancedb = pytest.importorskip("lancedb")
+
+
+def ranking(*row_ids):
+    return pd.DataFrame({"_rowid": list(row_ids), "text": [f"chunk {row_id}" for row_id in row_ids]})
+
+
+def test_rows_found_by_both_rankings_come_first():
+    fused = reciprocal_rank_fusion([ranking(1, 2, 3), ranking(3, 4)], num_results=3, k=60)
+
+    assert list(fused["_rowid"]) == [3, 1, 2]
+    assert fused["_relevance_score"][0] == pytest.approx(1 / 63 + 1 / 61)
+    assert fused["_relevance_score"][1] == pytest.approx(1 / 61)
+
+
+def test_weights_favour_one_ranking():
+    fused = reciprocal_rank_fusion([ranking(1), ranking(2)], num_results=2, weights=[2.0, 1.0])
+    assert list(fused["_rowid"]) == [1, 2]
+
+
+def test_missing_and_empty_rankings_are_skipped():
+    assert list(reciprocal_rank_fusion([None, ranking(5)], num_results=5)["_rowid"]) == [5]
+    empty = reciprocal_rank_fusion([ranking(), None], num_results=5)
+    assert empty.empty and "_rowid" in empty.columns
+
+
+def chunk(text, vector, project_id="alpha"):
+    return {"text": text, "vector": vector, "metadata": {"project_id": project_id, "filename": f"{project_id}.pdf",
+                                                         "file_type": "pdf"}, "dedup_key": f"{project_id}::x"}
+
+
+@pytest.fixture
+def table(tmp_path):
+    table = lancedb.connect(str(tmp_path)).create_table("files", data=[
+        chunk("Defect D-003 crashes the checkout page", [0.0, 1.0]),
+        chunk("Login works on every browser", [1.0, 0.0]),
+        chunk("The payment form rejects valid cards", [0.9, 0.1]),
+        chunk("Defect D-003 was also seen in another project", [1.0, 0.0], project_id="beta"),
+    ])
+    create_text_index(table)
+    return table
+
+
+def test_hybrid_search_fuses_keyword_and_vector_matches(table):
+    results = hybrid_search_chunks(table, "What is D-003?", [1.0, 0.0], num_results=3, project_id="alpha")
+    texts = list(results["text"])
+
+    # The exact identifier is found by the keyword search although its vector is far away
+    assert "Defect D-003 crashes the checkout page" in texts
+    assert "Login works on every browser" in texts
+    assert all("another project" not in text for text in texts)
+    assert list(results["_relevance_score"]) == sorted(results["_relevance_score"], reverse=True)
@@ -0,0 +1,58 @@
+import pytest
+
+from infrastructure.gpt.files_intake.retrieval import build_metadata_filter
+from infrastructure.gpt.files_intake.utils.dedup import build_dedup_key
+
+lancedb = pytest.importorskip("lancedb")
+
+
+def row(filename, project_id, file_type="pdf"):
+    return {
+        "text": filename,
+        "metadata": {"filename": filename, "project_id": project_id, "file_type": file_type},
+        "dedup_key": build_dedup_key(filename, project_id),
+    }
+
+
+@pytest.fixture
+def table(tmp_path):
+    rows = [
+        row("Report.pdf", "alpha"),
+        row("report.pdf", "beta"),
+        row("other_report.pdf", "alpha"),
+        row("notes.csv", "alpha", "csv"),
+        row("https://example.com/Docs/", None, "webpage"),
+    ]
+    return lancedb.connect(str(tmp_path)).create_table("files", data=rows)
+
+
+def matching(table, where):
+    return sorted((r["metadata"]["project_id"] or "", r["text"]) for r in table.search().where(where).to_list())
+
+
+def test_no_conditions():
+    assert build_metadata_filter() is None
+
+
+def test_project_only(table):
+    assert matching(table, build_metadata_filter(project_id="alpha")) == [
+        ("alpha", "Report.pdf"), ("alpha", "notes.csv"), ("alpha", "other_report.pdf"),
+    ]
+
+
+def test_filename_is_normalized_with_and_without_project(table):
+    assert matching(table, build_metadata_filter(project_id="alpha", filename=" REPORT.pdf ")) == [
+        ("alpha", "Report.pdf"),
+    ]
+    # Same normalization without a project; no suffix matches on "other_report.pdf"
+    assert matching(table, build_metadata_filter(filename=" REPORT.pdf ")) == [
+        ("alpha", "Report.pdf"), ("beta", "report.pdf"),
+    ]
+    assert matching(table, build_metadata_filter(filename="HTTPS://example.com/docs/")) == [
+        ("", "https://example.com/Docs/"),
+    ]
+
+
+def test_file_type_and_quotes(table):
+    assert matching(table, build_metadata_filter(project_id="alpha", file_type="csv")) == [("alpha", "notes.csv")]
+    assert matching(table, build_metadata_filter(filename="it's.pdf")) == []
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from infrastructure.gpt.repositories.responses_client import ResponsesClient, iterate_sync, run_sync
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"friendly_message": {"type": "string"}, "goals": {"type": "array", "items": {"type": "string"}}},
+}
+PAYLOAD = {"model": "gpt-4o", "input": [{"role": "user", "content": "Hi"}],
+           "text": {"format": {"type": "json_schema", "name": "answer", "schema": SCHEMA}}}
+
+
+@pytest.fixture
+def client(mock_openai):
+    client = ResponsesClient(api_url=f"{mock_openai.base_url}/responses", api_key="test", base_delay=0.01)
+    yield client
+    run_sync(client.aclose())
+
+
+def test_rate_limited_request_is_retried(mock_openai, client):
+    mock_openai.rate_limit_every = 2
+    first = run_sync(client.post(PAYLOAD))
+    second = run_sync(client.post(PAYLOAD))
+
+    assert (first.status_code, second.status_code) == (200, 200)
+    # The second request got a 429 and was sent again
+    assert mock_openai.request_count == 3
+    assert mock_openai.response_count == 2
+
+
+def test_request_fails_after_the_last_retry(mock_openai, client):
+    mock_openai.rate_limit_every = 1
+    client.max_retries = 1
+    response = run_sync(client.post(PAYLOAD))
+
+    assert response.status_code == 429
+    assert mock_openai.request_count == 2
+
+
+def test_streamed_events_add_up_to_the_final_text(client):
+    events = list(iterate_sync(client.stream(PAYLOAD)))
+
+    assert events[0]["type"] == "response.created"
+    assert events[-1]["type"] == "response.completed"
+    text = "".join(event["delta"] for event in events if event["type"] == "response.output_text.delta")
+    final = events[-1]["response"]["output"][0]["content"][0]["text"]
+    assert text == final
+    assert json.loads(text) == {"friendly_message": "Mock friendly message", "goals": ["Mock goals"]}
+
+
+def test_streamed_error_status_is_yielded_as_an_event(mock_openai, client):
+    mock_openai.rate_limit_every = 1
+    client.max_retries = 0
+    events = list(iterate_sync(client.stream(PAYLOAD)))
+
+    assert [(event["type"], event["status"]) for event in events] == [("error", 429)]
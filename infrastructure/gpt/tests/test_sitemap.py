@@ -0,0 +1,90 @@
+import gzip
+
+import pytest
+
+from infrastructure.gpt.files_intake.utils import sitemap
+from infrastructure.gpt.files_intake.utils.sitemap import SitemapEntry, iter_sitemap_entries
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, status_code: int = 200):
+        self.body = body
+        self.status_code = status_code
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise sitemap.requests.HTTPError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        # Tiny chunks, so elements are split across parser feeds
+        for i in range(0, len(self.body), 7):
+            yield self.body[i:i + 7]
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    documents = {}
+    monkeypatch.setattr(sitemap.requests, "get",
+                        lambda url, **kwargs: FakeResponse(*documents.get(url, (b"", 404))))
+    return documents
+
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1"
+        xmlns:video="http://www.google.com/schemas/sitemap-video/1.1">
+  <url>
+    <loc>https://example.com/a</loc>
+    <image:image><image:loc>https://example.com/a.png</image:loc></image:image>
+    <lastmod>2024-01-02</lastmod>
+    <priority>0.8</priority>
+  </url>
+  <url>
+    <video:video><video:loc>https://example.com/b.mp4</video:loc></video:video>
+    <loc>https://example.com/b</loc>
+    <image:loc>https://example.com/stray.png</image:loc>
+  </url>
+  <url><image:image><image:loc>https://example.com/only-image.png</image:loc></image:image></url>
+</urlset>"""
+
+
+def test_extension_tags_never_replace_the_page_loc(serve):
+    serve["https://example.com/sitemap.xml"] = (URLSET,)
+    assert list(iter_sitemap_entries("https://example.com/sitemap.xml")) == [
+        SitemapEntry("https://example.com/a", "2024-01-02", 0.8),
+        SitemapEntry("https://example.com/b"),
+    ]
+
+
+def test_sitemap_without_namespace(serve):
+    serve["https://example.com/sitemap.xml"] = (b"<urlset><url><loc> https://example.com/x </loc></url></urlset>",)
+    assert list(iter_sitemap_entries("https://example.com/sitemap.xml")) == [SitemapEntry("https://example.com/x")]
+
+
+def test_index_with_gzipped_child_and_max_depth(serve, capsys):
+    serve["https://example.com/index.xml"] = (b"""<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+        <sitemap><loc>https://example.com/pages.xml.gz</loc><lastmod>2024-01-01</lastmod></sitemap>
+        <sitemap><loc>https://example.com/missing.xml</loc></sitemap>
+    </sitemapindex>""",)
+    serve["https://example.com/pages.xml.gz"] = (gzip.compress(URLSET),)
+
+    entries = list(iter_sitemap_entries("https://example.com/index.xml"))
+    assert [entry.loc for entry in entries] == ["https://example.com/a", "https://example.com/b"]
+
+    assert list(iter_sitemap_entries("https://example.com/index.xml", max_depth=0)) == []
+    assert "max depth reached" in capsys.readouterr().out
+
+
+def test_errors_are_reported_as_value_errors(serve):
+    serve["https://example.com/broken.xml"] = (b"<urlset><url><loc>x</url>",)
+    serve["https://example.com/down.xml"] = (b"", 500)
+    with pytest.raises(ValueError, match="parse"):
+        list(iter_sitemap_entries("https://example.com/broken.xml"))
+    with pytest.raises(ValueError, match="fetch"):
+        list(iter_sitemap_entries("https://example.com/down.xml"))
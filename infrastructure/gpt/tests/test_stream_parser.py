@@ -0,0 +1,66 @@
+import json
+
+from infrastructure.gpt.repositories.stream_parser import StreamingJsonAssembler
+
+
+def feed_in_pieces(assembler, text, size):
+    updates = []
+    for i in range(0, len(text), size):
+        updates += assembler.feed(text[i:i + size])
+    return updates
+
+
+def test_streams_text_field_and_completed_items():
+    payload = {"friendly_message": "Hello \"tester\"\nbye", "goals": [{"title": "a"}, {"title": "b"}]}
+    assembler = StreamingJsonAssembler()
+    updates = feed_in_pieces(assembler, json.dumps(payload), 3)
+
+    text = "".join(delta for kind, field, delta in updates if kind == "text")
+    assert text == payload["friendly_message"]
+    assert [(key, item) for kind, key, item in updates if kind == "item"] == [
+        ("goals", {"title": "a"}),
+        ("goals", {"title": "b"}),
+    ]
+    assert assembler.result() == payload
+
+
+def test_nested_items_are_reported_with_their_array_key():
+    payload = {"table": {"rows": [{"cells": [{"v": 1}]}]}}
+    updates = StreamingJsonAssembler().feed(json.dumps(payload))
+    assert [(key, item) for kind, key, item in updates if kind == "item"] == [
+        ("cells", {"v": 1}),
+        ("rows", {"cells": [{"v": 1}]}),
+    ]
+
+
+def test_surrogate_pairs_are_combined():
+    payload = json.dumps({"friendly_message": "ok \U0001F600 done"})  # ensure_ascii → 😀
+    assert "\\ud83d\\ude00" in payload
+
+    for size in (1, 2, 7, len(payload)):
+        assembler = StreamingJsonAssembler()
+        updates = feed_in_pieces(assembler, payload, size)
+        assert "".join(delta for kind, field, delta in updates if kind == "text") == "ok \U0001F600 done"
+
+
+def test_lone_high_surrogate_is_kept_like_json_loads():
+    payload = '{"friendly_message": "a\\ud83db"}'
+    updates = StreamingJsonAssembler().feed(payload)
+    assert "".join(delta for kind, field, delta in updates if kind == "text") == json.loads(payload)["friendly_message"]
+
+
+def test_item_parsing_only_reads_the_item_text():
+    assembler = StreamingJsonAssembler()
+    assembler.feed('{"friendly_message": "' + "x" * 1000 + '", "goals": [')
+    calls = []
+    original = assembler._text
+    assembler._text = lambda start=0: calls.append(start) or original(start)
+    assembler.feed('{"title": "a"}]}')
+    assert calls and all(start > 1000 for start in calls)
+
+
+def test_primitive_array_elements_are_not_reported_as_items():
+    assembler = StreamingJsonAssembler()
+    updates = assembler.feed('{"tags": ["a", "b"], "scores": [1, 2]}')
+    assert [update for update in updates if update[0] == "item"] == []
+    assert assembler.result() == {"tags": ["a", "b"], "scores": [1, 2]}
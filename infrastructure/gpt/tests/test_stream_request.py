@@ -0,0 +1,32 @@
+from infrastructure.gpt.models.assistant_name import AssistantName
+from infrastructure.gpt.repositories.assistant_gpt_repository import stream_request_async
+from infrastructure.gpt.repositories.responses_client import ResponsesClient, iterate_sync, run_sync
+from infrastructure.gpt.test_data import mock_openai_server
+
+
+def stream(mock_openai, assistant_name):
+    client = ResponsesClient(api_url=f"{mock_openai.base_url}/responses", api_key="test", base_delay=0.01)
+    try:
+        return list(iterate_sync(stream_request_async("Summarize the session", assistant_name,
+                                                      developer_text="Project notes", client=client)))
+    finally:
+        run_sync(client.aclose())
+
+
+def test_streamed_answer_is_formatted(mock_openai):
+    updates = stream(mock_openai, AssistantName.TEST_RESULTS)
+
+    assert updates[-1][0] == "done"
+    output, response_id = updates[-1][1:3]
+    assert "Area: Mock area" in output and response_id.startswith("resp_mock_")
+    assert [kind for kind, *_ in updates if kind == "item"] == ["item"]
+
+
+def test_incomplete_answer_is_reported_as_an_error(mock_openai, monkeypatch):
+    # Valid JSON, but the table row lacks the fields the formatter reads
+    monkeypatch.setattr(mock_openai_server, "fake_instance",
+                        lambda schema, label="mock": {"friendly_message": "Hi", "results_table": [{"quality": "ok"}]})
+    updates = stream(mock_openai, AssistantName.TEST_RESULTS)
+
+    assert updates[-1] == ("error", "Error extracting the assistant response.")
+    assert ("item", "results_table", {"quality": "ok"}) in updates
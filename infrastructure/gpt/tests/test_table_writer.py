@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from infrastructure.gpt.files_intake.table_writer import TableWriter
+
+lancedb = pytest.importorskip("lancedb")
+
+
+def record(key, text="chunk", project_id="p", content_hash=None):
+    return {"text": text, "metadata": {"project_id": project_id}, "dedup_key": key, "content_hash": content_hash}
+
+
+@pytest.fixture
+def table(tmp_path):
+    db = lancedb.connect(str(tmp_path))
+    return db.create_table("files", data=[record("p::seed", content_hash="h0")])
+
+
+class FailingTable:
+    """Wraps a table whose next `add` fails once."""
+
+    def __init__(self, table):
+        self.table = table
+        self.fail_next = True
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+    def add(self, records):
+        if self.fail_next:
+            self.fail_next = False
+            raise OSError("disk full")
+        self.table.add(records)
+
+
+def test_add_outside_batch_writes_immediately(table):
+    written = []
+    writer = TableWriter(lambda: table)
+    writer.add([record("p::a")], on_written=lambda: written.append("a"))
+    assert table.count_rows() == 2
+    assert written == ["a"]
+    assert not writer.is_pending("p::a")
+
+
+def test_batch_buffers_until_exit(table):
+    writer = TableWriter(lambda: table)
+    with writer.batch():
+        writer.add([record("p::a", content_hash="ha")])
+        writer.add([record("p::b")])
+        assert table.count_rows() == 1
+        assert writer.is_pending("p::a")
+        assert writer.is_pending(content_hash="ha", project_id="p")
+    assert table.count_rows() == 3
+    assert not writer.is_pending("p::a")
+
+
+def test_failed_flush_keeps_records_callbacks_and_pending_keys(table):
+    failing = FailingTable(table)
+    written = []
+    writer = TableWriter(lambda: failing)
+
+    with pytest.raises(OSError):
+        with writer.batch():
+            writer.add([record("p::a")], on_written=lambda: written.append("a"))
+    assert written == []
+    assert writer.is_pending("p::a")
+    assert table.count_rows() == 1
+
+    # Records added after the failure are written behind the restored ones
+    writer.add([record("p::b")], on_written=lambda: written.append("b"))
+    assert written == ["a", "b"]
+    assert sorted(row["dedup_key"] for row in table.search().to_list()) == ["p::a", "p::b", "p::seed"]
+    assert not writer.is_pending("p::a")
+
+
+def test_delete_counts_removed_rows(table):
+    writer = TableWriter(lambda: table, compact_max_small_fragments=0)
+    writer.add([record("p::a"), record("p::a")])
+    assert writer.delete("dedup_key = 'p::a'") == 2
+    assert writer.delete("dedup_key = 'p::a'") == 0
+    assert table.count_rows() == 1
+
+
+def test_timed_flush_is_retried_after_a_failure(table):
+    failing = FailingTable(table)
+    writer = TableWriter(lambda: failing, max_seconds=0.05)
+    with writer.batch():
+        writer.add([record("p::a")])
+        # The first timed flush fails, the next one writes the records
+        deadline = time.monotonic() + 5
+        while writer.is_pending("p::a") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not failing.fail_next
+        assert table.count_rows() == 2
+        assert not writer.is_pending("p::a")
+
+
+class CountingTable:
+    """Counts `stats()` calls on a table."""
+
+    def __init__(self, table):
+        self.table = table
+        self.stats_calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+    def stats(self):
+        self.stats_calls += 1
+        return self.table.stats()
+
+
+def test_fragments_are_counted_every_few_writes(table):
+    counting = CountingTable(table)
+    writer = TableWriter(lambda: counting, compact_max_small_fragments=1000, fragment_check_every=3)
+    for i in range(7):
+        writer.add([record(f"p::{i}")])
+    assert counting.stats_calls == 2
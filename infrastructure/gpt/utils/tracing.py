@@ -0,0 +1,351 @@
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+# Comma separated exporters a finished request trace is sent to: "console", "jsonl", "prometheus" (or "none")
+TRACE_EXPORTERS = os.getenv("TRACE_EXPORTERS", "console")
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH", "request_traces.jsonl")
+# The Prometheus exporter rewrites this file after every request (node_exporter textfile collector);
+# with METRICS_PORT set it also serves /metrics itself, on METRICS_HOST (local only unless changed)
+PROMETHEUS_TEXTFILE = os.getenv("PROMETHEUS_TEXTFILE")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# Share of requests whose (redacted) payload is attached to the trace; off by default
+PAYLOAD_LOG_SAMPLE_RATE = float(os.getenv("PAYLOAD_LOG_SAMPLE_RATE", "0"))
+# Longest string kept in a logged payload; base64 images and retrieved context are cut to this
+PAYLOAD_LOG_MAX_STRING = int(os.getenv("PAYLOAD_LOG_MAX_STRING", "500"))
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class RequestTrace:
+    """Spans and attributes (status, sizes, token usage) of one assistant request."""
+
+    def __init__(self, name: str, **attributes):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes
+        self.spans = []
+        self.payload = None
+        self.error = None
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self._lock = threading.Lock()
+
+    def set(self, **attributes):
+        with self._lock:
+            self.attributes.update(attributes)
+
+    def add_span(self, span: dict):
+        with self._lock:
+            self.spans.append(span)
+
+    def span_seconds(self, name: str) -> float:
+        return sum(span["duration_s"] for span in self.spans if span["name"] == name)
+
+    def to_dict(self) -> dict:
+        record = {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "timestamp": self.started_at,
+            "duration_s": self.duration,
+            "attributes": self.attributes,
+            "spans": self.spans,
+        }
+        if self.error:
+            record["error"] = self.error
+        if self.payload is not None:
+            record["payload"] = self.payload
+        return record
+
+
+# The trace of the request being handled in this task/thread (asyncio.to_thread carries it over)
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(name: str, **attributes):
+    """Traces one request; the trace is exported when the block exits, also when it raised."""
+    trace = RequestTrace(name, **attributes)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    except GeneratorExit:
+        # A streaming consumer stopped early
+        trace.set(cancelled=True)
+        raise
+    except BaseException as e:
+        trace.error = f"{e.__class__.__name__}: {e}"
+        raise
+    finally:
+        trace.duration = time.perf_counter() - trace._start
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            # An async generator closed from another context (e.g. garbage collected)
+            pass
+        export_trace(trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Times a block as a span of the current trace. Outside a trace it does nothing, so library
+    code (retrieval, ingestion) can be instrumented without caring who calls it. Attributes can
+    be added to the yielded dict while the block runs.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield attributes
+        return
+
+    parent = _current_span.get()
+    token = _current_span.set(name)
+    start = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException as e:
+        attributes["error"] = e.__class__.__name__
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            pass
+        trace.add_span({
+            "name": name,
+            "parent": parent,
+            "start_s": start - trace._start,
+            "duration_s": time.perf_counter() - start,
+            **({"attributes": attributes} if attributes else {}),
+        })
+
+
+#------------------Payload Logging-----------------------------------------------------------------
+
+# Attach the payload to the current trace for a sampled share of requests
+def maybe_log_payload(payload: dict, sample_rate: float = PAYLOAD_LOG_SAMPLE_RATE):
+    trace = _current_trace.get()
+    if trace is not None and sample_rate > 0 and random.random() < sample_rate:
+        trace.payload = redact_payload(payload)
+
+
+# Copy of a payload with data URLs and long texts shortened to what is readable in a log
+def redact_payload(value, max_string: int = PAYLOAD_LOG_MAX_STRING):
+    if isinstance(value, dict):
+        return {key: redact_payload(item, max_string) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact_payload(item, max_string) for item in value]
+    if isinstance(value, str):
+        if value.startswith("data:") and ";base64," in value:
+            header = value.split(",", 1)[0]
+            return f"{header},<{len(value) / 1024:.1f} KB>"
+        if len(value) > max_string:
+            return f"{value[:max_string]}…<{len(value) - max_string} more chars>"
+    return value
+
+
+#------------------Exporters-----------------------------------------------------------------------
+
+class ConsoleExporter:
+    """One summary line per request instead of dumping payloads and responses."""
+
+    def export(self, trace: RequestTrace):
+        attrs = trace.attributes
+        spans = ", ".join(
+            f"{span['name']} {span['duration_s'] * 1000:.0f} ms" for span in trace.spans if span["parent"] is None
+        )
+        tokens = ""
+        if "input_tokens" in attrs:
+            tokens = (f", {attrs['input_tokens']} input tokens ({attrs.get('cached_tokens', 0)} cached), "
+                      f"{attrs.get('output_tokens', 0)} output")
+            if "cache_hit_rate" in attrs:
+                tokens += f", {attrs['cache_hit_rate']:.0%} of input cached so far"
+        outcome = trace.error or attrs.get("status", "-")
+        print(f"📈 {trace.name} {attrs.get('assistant', '')} → {outcome} in {trace.duration * 1000:.0f} ms "
+              f"[{spans}], {attrs.get('request_bytes', 0) / 1024:.1f} KB sent{tokens}")
+
+
+class JsonLinesExporter:
+    """Appends every trace as one JSON document per line."""
+
+    def __init__(self, path: str = TRACE_JSONL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace: RequestTrace):
+        line = json.dumps(trace.to_dict(), ensure_ascii=False, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class PrometheusExporter:
+    """
+    Aggregates traces into counters and histograms and renders them in the Prometheus text
+    format: request count by assistant and status, request and span durations, request
+    payload size and token usage (input, cached, output).
+    """
+
+    def __init__(self, textfile: str = PROMETHEUS_TEXTFILE, port: int = METRICS_PORT, host: str = METRICS_HOST):
+        self.textfile = textfile
+        self.requests = {}      # (assistant, status) → count
+        self.tokens = {}        # (assistant, kind) → count
+        self.durations = {}     # assistant → Histogram
+        self.span_durations = {}  # span name → Histogram
+        self.payload_bytes = {}   # assistant → Histogram
+        self._lock = threading.Lock()
+        if port:
+            self.serve(port, host)
+
+    def export(self, trace: RequestTrace):
+        attrs = trace.attributes
+        assistant = str(attrs.get("assistant", ""))
+        status = "error" if trace.error else str(attrs.get("status", ""))
+        with self._lock:
+            self.requests[(assistant, status)] = self.requests.get((assistant, status), 0) + 1
+            self.durations.setdefault(assistant, Histogram(SECONDS_BUCKETS)).observe(trace.duration)
+            for span in trace.spans:
+                self.span_durations.setdefault(span["name"], Histogram(SECONDS_BUCKETS)).observe(span["duration_s"])
+            if "request_bytes" in attrs:
+                self.payload_bytes.setdefault(assistant, Histogram(BYTES_BUCKETS)).observe(attrs["request_bytes"])
+            for kind in ("input", "cached", "output"):
+                if f"{kind}_tokens" in attrs:
+                    key = (assistant, kind)
+                    self.tokens[key] = self.tokens.get(key, 0) + attrs[f"{kind}_tokens"]
+            text = self.render_locked()
+
+        if self.textfile:
+            # Write and rename, so a scraper never reads a half-written file
+            tmp_path = f"{self.textfile}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self.textfile)
+
+    def render(self) -> str:
+        with self._lock:
+            return self.render_locked()
+
+    def render_locked(self) -> str:
+        lines = [
+            "# HELP assistant_requests_total Assistant requests by assistant and HTTP status",
+            "# TYPE assistant_requests_total counter",
+        ]
+        for (assistant, status), count in sorted(self.requests.items()):
+            lines.append(f'assistant_requests_total{{assistant="{assistant}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP assistant_tokens_total Tokens reported in the usage of assistant responses",
+            "# TYPE assistant_tokens_total counter",
+        ]
+        for (assistant, kind), count in sorted(self.tokens.items()):
+            lines.append(f'assistant_tokens_total{{assistant="{assistant}",kind="{kind}"}} {count}')
+
+        lines += _render_histograms("assistant_request_duration_seconds", "End-to-end request duration",
+                                    "assistant", self.durations)
+        lines += _render_histograms("assistant_span_duration_seconds", "Duration of the steps of a request",
+                                    "span", self.span_durations)
+        lines += _render_histograms("assistant_request_payload_bytes", "Size of the request body",
+                                    "assistant", self.payload_bytes)
+        return "\n".join(lines) + "\n"
+
+    # Serve /metrics from a daemon thread
+    def serve(self, port: int, host: str = METRICS_HOST):
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        print(f"📊 Serving Prometheus metrics on {host}:{port}/metrics")
+        return server
+
+
+def _render_histograms(metric: str, help_text: str, label: str, histograms: dict) -> List[str]:
+    lines = [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+    for value, histogram in sorted(histograms.items()):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {count}')
+        lines.append(f'{metric}_bucket{{{label}="{value}",le="+Inf"}} {histogram.count}')
+        lines.append(f'{metric}_sum{{{label}="{value}"}} {histogram.sum}')
+        lines.append(f'{metric}_count{{{label}="{value}"}} {histogram.count}')
+    return lines
+
+
+EXPORTER_TYPES = {
+    "console": ConsoleExporter,
+    "jsonl": JsonLinesExporter,
+    "prometheus": PrometheusExporter,
+}
+
+_exporters = None
+_exporters_lock = threading.Lock()
+
+
+def get_exporters() -> list:
+    global _exporters
+    with _exporters_lock:
+        if _exporters is None:
+            names = [name.strip() for name in TRACE_EXPORTERS.split(",") if name.strip() not in ("", "none")]
+            _exporters = [EXPORTER_TYPES[name]() for name in names]
+        return _exporters
+
+
+# Replace the configured exporters, e.g. set_exporters([JsonLinesExporter("run.jsonl")]); [] disables tracing output
+def set_exporters(exporters: list):
+    global _exporters
+    with _exporters_lock:
+        _exporters = list(exporters)
+
+
+def add_exporter(exporter):
+    get_exporters()
+    with _exporters_lock:
+        _exporters.append(exporter)
+
+
+# An exporter that fails must not fail the request it traced
+def export_trace(trace: RequestTrace):
+    for exporter in get_exporters():
+        try:
+            exporter.export(trace)
+        except Exception as e:
+            print(f"⚠️ Trace exporter {exporter.__class__.__name__} failed: {e}")